@@ -0,0 +1,51 @@
+import json
+import re
+import time
+from app.geojson_converter import GeoJsonConverter
+
+# Per-airport materialized FeatureCollections behind /api/airport/{icao}.
+# Storage bumps an airport's view version (and drops its body) on every write for
+# that icao_location; the listener re-materializes the airports it touched, and the
+# API materializes on a miss, so the hot path is a single-key read.
+ICAO_REGEX = re.compile(r"^[A-Z0-9]{3,4}$")
+
+
+def normalize_icao(code):
+    """
+    Upper-cased location indicator, or None if it is not 3-4 letters/digits.
+    """
+    code = (code or "").strip().upper()
+    return code if ICAO_REGEX.match(code) else None
+
+
+def render(docs):
+    """
+    Full-resolution GeoJSON FeatureCollection for an airport, serialized as in http_cache.json_response.
+    """
+    return json.dumps(GeoJsonConverter.to_feature_collection(docs), separators=(",", ":"), default=str)
+
+
+def materialize(db, icao):
+    """
+    Recomputes and stores the view for one airport. Returns the view dict; it is
+    still returned (just not saved) if a concurrent write made it stale.
+    """
+    current = db.get_airport_view(icao)
+    version = current["version"] if current else 0
+    docs = db.search_by_icao([icao])[icao]
+    body = render(docs)
+    updated_at = time.time()
+    db.save_airport_view(icao, version, body, len(docs), updated_at)
+    return {"version": version, "body": body, "count": len(docs), "updated_at": updated_at}
+
+
+def refresh(db, codes):
+    """
+    Re-materializes the views of the given airports (e.g. those a message just
+    changed). Returns the number refreshed.
+    """
+    count = 0
+    for code in sorted({normalize_icao(code) for code in codes} - {None}):
+        materialize(db, code)
+        count += 1
+    return count
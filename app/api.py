@@ -1,81 +1,648 @@
-from fastapi import FastAPI, Query
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
+import time
+IMPORT_STARTED = time.perf_counter()
+
+import logging
+import math
 import os
-import sys
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import APIRouter, FastAPI, Query, HTTPException, Request
+from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from pydantic import BaseModel, Field
 
-# Ensure we can import from app
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from app.db_manager import DBManager
 from app.geojson_converter import GeoJsonConverter
-from typing import Optional
+from app import qcodes, warmup, http_cache, freshness, notam_pbf, airport_views, text_search, structured_log
 
-from fastapi.middleware.cors import CORSMiddleware
+router = APIRouter()
+
+logger = logging.getLogger(__name__)
+
+# DB Manager is created on first use, not at import, so workers import quickly
+_db = None
+_db_lock = threading.Lock()
+
+# Startup timings and warm-up state, reported by /api/ready
+startup_state = {"ready": False, "import_seconds": None, "startup_seconds": None, "warmup_seconds": None, "error": None}
+
+def get_db():
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                _db = DBManager()
+    return _db
+
+# Data version behind the ETags, re-read at most every DATA_VERSION_TTL seconds
+data_version = http_cache.DataVersionCache(lambda: get_db().get_data_version())
+
+def _tolerance(zoom, tolerance, lat):
+    # Explicit tolerance wins; otherwise derive it from the map zoom; None keeps full resolution
+    if tolerance is not None:
+        return tolerance
+    if zoom is not None:
+        return GeoJsonConverter.tolerance_for_zoom(zoom, lat)
+    return None
+
+async def _query_etag(request, media_type=None):
+    params = request.query_params.multi_items()
+    if media_type:
+        # Each representation of the same query needs its own validator
+        params = params + [("accept", media_type)]
+    return http_cache.make_etag(request.url.path, params, await data_version.get_async())
+
+# Feature endpoints can answer with GeoJSON or the protobuf encoding (app/notam_features.proto)
+FEATURE_MEDIA_TYPES = ("application/geo+json", "application/json", notam_pbf.MEDIA_TYPE)
+FEATURE_VARY = "Accept, Accept-Encoding"
+
+def _feature_media_type(request):
+    return http_cache.negotiate(request.headers.get("accept"), FEATURE_MEDIA_TYPES)
+
+def _render_features(docs, tolerance_nm, media_type):
+    """
+    FeatureCollection of docs serialized as protobuf, or as GeoJSON for the other media types.
+    """
+    if media_type == notam_pbf.MEDIA_TYPE:
+        return notam_pbf.encode_feature_collection(docs, tolerance_nm)
+    return http_cache.to_json(GeoJsonConverter.to_feature_collection(docs, tolerance_nm))
+
+def _body_media_type(media_type):
+    # GeoJSON is sent as application/json whichever JSON type was negotiated
+    return media_type if media_type == notam_pbf.MEDIA_TYPE else "application/json"
+
+def _feature_response(request, docs, tolerance_nm, etag=None):
+    """
+    FeatureCollection of docs as GeoJSON, or as protobuf when the Accept header prefers it.
+    """
+    media_type = _feature_media_type(request)
+    body = _render_features(docs, tolerance_nm, media_type)
+    return http_cache.encoded_response(request, body, _body_media_type(media_type), etag, FEATURE_VARY)
+
+# Identical concurrent GETs (same ETag: path, parameters, representation and data
+# version) share one query and serialization
+flights = http_cache.SingleFlight()
+
+async def _coalesced(request, etag, render, media_type="application/json", vary="Accept-Encoding"):
+    """
+    Runs render() (blocking: DB query + serialization, returns the body bytes) in
+    the threadpool, once for all concurrent requests with this ETag, and sends
+    the shared body. Compressed variants are shared too.
+    """
+    shared = await flights.run(etag, lambda: {"body": render(), "compressed": {}})
+    return http_cache.encoded_response(request, shared["body"], media_type, etag, vary, shared["compressed"])
+
+MAX_GRID_CELLS = int(os.getenv("MAX_GRID_CELLS", "20000"))
+GRID_GROUPS = ("category", "fir")
+grid_cache = http_cache.VersionedCache(int(os.getenv("GRID_CACHE_SIZE", "64")))
+
+MAX_BATCH_LOCATIONS = int(os.getenv("MAX_BATCH_LOCATIONS", "100"))
+
+TEXT_SEARCH_LIMIT = int(os.getenv("TEXT_SEARCH_LIMIT", "50"))  # Default /api/search/text result count
+MAX_TEXT_SEARCH_LIMIT = int(os.getenv("MAX_TEXT_SEARCH_LIMIT", "500"))
 
-app = FastAPI()
+CHANGES_PAGE_SIZE = int(os.getenv("CHANGES_PAGE_SIZE", "1000"))  # Default /api/changes page
+MAX_CHANGES_PAGE_SIZE = int(os.getenv("MAX_CHANGES_PAGE_SIZE", "5000"))
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Time-window parameters shared by the search endpoints (see parse_window)
+ACTIVE_FROM_DESCRIPTION = "Keep NOTAMs active at some point from this time, schedule included (ISO 8601 UTC or epoch)"
+ACTIVE_TO_DESCRIPTION = "... up to this time (defaults to valid_from: active at that instant)"
 
-# Initialize DB Manager
-db = DBManager()
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # If set, /api/admin/* requires it in the X-Admin-Token header
+
+class BatchLocation(BaseModel):
+    id: Optional[str] = Field(None, description="Key for this location in the response (defaults to the ICAO code or 'lat,lon,radius')")
+    icao: Optional[str] = Field(None, description="ICAO location indicator (e.g. KBOS)")
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    radius: float = Field(10, description="Radius in Nautical Miles (point lookups only)")
+
+class BatchSearchRequest(BaseModel):
+    locations: List[BatchLocation]
+    category: Optional[str] = None
+    q_group: Optional[str] = None
+    subject: Optional[str] = None
+    condition: Optional[str] = None
+
+def _batch_key(location):
+    if location.id:
+        return location.id
+    if location.icao:
+        return location.icao.strip().upper()
+    return f"{location.lat},{location.lon},{location.radius}"
+
+def merge_batch_results(keys, result_lists):
+    """
+    Dedupes NOTAMs that match several inputs.
+    Returns ({notam_id: doc}, {key: [notam_id, ...]}); a repeated key merges its matches.
+    """
+    notams = {}
+    results = {key: [] for key in keys}
+    for key, docs in zip(keys, result_lists):
+        seen = set(results[key])
+        for doc in docs:
+            doc.pop("_id", None)
+            notam_id = doc["notam_id"]
+            notams.setdefault(notam_id, doc)
+            if notam_id not in seen:
+                seen.add(notam_id)
+                results[key].append(notam_id)
+    return notams, results
 
 # API Endpoint
-@app.get("/api/search")
+@router.get("/api/search")
 async def search_notams(
+    request: Request,
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
-    radius: float = Query(10, description="Radius in Nautical Miles")
+    radius: float = Query(10, description="Radius in Nautical Miles"),
+    valid_from: Optional[str] = Query(None, description=ACTIVE_FROM_DESCRIPTION),
+    valid_to: Optional[str] = Query(None, description=ACTIVE_TO_DESCRIPTION)
 ):
-    results = db.search_nearby(lat, lon, radius)
+    try:
+        window = parse_window(valid_from, valid_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    etag = await _query_etag(request)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag)
+    
+    def render():
+        results = get_db().search_nearby(lat, lon, radius, window=window)
+        
+        # Convert ObjectId to string for JSON serialization
+        for r in results:
+            if '_id' in r:
+                r['_id'] = str(r['_id'])
+        return http_cache.to_json({"count": len(results), "results": results})
+    
+    return await _coalesced(request, etag, render)
+
+@router.post("/api/search/batch")
+async def search_notams_batch(request: BatchSearchRequest, http_request: Request):
+    """
+    Looks up NOTAMs for many locations (points with radii and/or ICAO codes) in one call.
+    ICAO codes are resolved in a single query; points run concurrently.
+    Each NOTAM is returned once under "notams"; "results" maps each input key to NOTAM ids.
+    """
+    if not request.locations:
+        raise HTTPException(status_code=400, detail="At least one location is required")
+    if len(request.locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LOCATIONS} locations per batch")
+    
+    for location in request.locations:
+        if not location.icao and (location.lat is None or location.lon is None):
+            raise HTTPException(status_code=400, detail="Each location needs either 'icao' or 'lat' and 'lon'")
+        if not location.icao and not (-90 <= location.lat <= 90 and -180 <= location.lon <= 180):
+            raise HTTPException(status_code=400, detail="Each 'lat' must be within -90..90 and 'lon' within -180..180")
     
-    # Convert ObjectId to string for JSON serialization
-    for r in results:
-        if '_id' in r:
-            r['_id'] = str(r['_id'])
-            
-    return {"count": len(results), "results": results}
+    try:
+        filters = qcodes.build_filter(request.q_group, request.subject, request.condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.category:
+        filters["category"] = request.category
+    
+    point_locations = [loc for loc in request.locations if not loc.icao]
+    icao_locations = [loc for loc in request.locations if loc.icao]
+    
+    point_results, icao_results = await run_in_threadpool(
+        get_db().search_batch,
+        [(loc.lat, loc.lon, loc.radius) for loc in point_locations],
+        [loc.icao for loc in icao_locations],
+        filters
+    )
+    
+    keys = [_batch_key(loc) for loc in point_locations + icao_locations]
+    result_lists = point_results + [icao_results[loc.icao.strip().upper()] for loc in icao_locations]
+    notams, results = merge_batch_results(keys, result_lists)
+    
+    return http_cache.json_response(http_request, {"count": len(notams), "notams": notams, "results": results})
+
+def parse_bbox(value):
+    """
+    "min_lon,min_lat,max_lon,max_lat" -> [min_lon, min_lat, max_lon, max_lat].
+    Raises ValueError if malformed or not min < max.
+    """
+    try:
+        bbox = [float(part) for part in value.split(",")]
+    except ValueError:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    if len(bbox) != 4:
+        raise ValueError("bbox must be min_lon,min_lat,max_lon,max_lat")
+    min_lon, min_lat, max_lon, max_lat = bbox
+    if not (-180 <= min_lon < max_lon <= 180 and -90 <= min_lat < max_lat <= 90):
+        raise ValueError("bbox must be within -180..180 / -90..90 with min < max")
+    return bbox
 
-@app.get("/api/geojson")
+def parse_time(value):
+    """
+    ISO 8601 UTC time ("2025-12-17T12:00:00Z", "2025-12-17T12:00") or epoch
+    seconds -> epoch seconds. Raises ValueError if unreadable.
+    """
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def parse_window(valid_from, valid_to):
+    """
+    valid_from / valid_to query values -> (start, end) epoch seconds, or None if
+    neither is given. valid_to defaults to valid_from (active at that instant).
+    Raises ValueError if unreadable or reversed.
+    """
+    if not (valid_from or valid_to):
+        return None
+    start = parse_time(valid_from or valid_to)
+    end = parse_time(valid_to) if valid_to else start
+    if start > end:
+        raise ValueError("valid_from must not be after valid_to")
+    return start, end
+
+@router.get("/api/search/text")
+async def search_text(
+    request: Request,
+    q: str = Query(..., description="Words that must all appear in the E-field (e.g. ILS, CRANE, FICON)"),
+    lat: Optional[float] = Query(None, description="Latitude (with lon and radius)"),
+    lon: Optional[float] = Query(None, description="Longitude"),
+    radius: float = Query(10, gt=0, description="Radius in Nautical Miles"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat (instead of lat/lon)"),
+    valid_from: Optional[str] = Query(None, description=ACTIVE_FROM_DESCRIPTION),
+    valid_to: Optional[str] = Query(None, description=ACTIVE_TO_DESCRIPTION),
+    category: Optional[str] = Query(None, description="Filter by category (e.g. Runway, Airspace)"),
+    q_group: Optional[str] = Query(None, description="Q-code subject group letter or family"),
+    subject: Optional[str] = Query(None, description="Q-code subject (e.g. MR for runway)"),
+    condition: Optional[str] = Query(None, description="Q-code condition (e.g. LC closed)"),
+    limit: int = Query(TEXT_SEARCH_LIMIT, ge=1, le=MAX_TEXT_SEARCH_LIMIT)
+):
+    """
+    Keyword search over NOTAM E-field text, ranked by relevance (rare words and
+    repeated matches score higher; see app/text_search.py). Every word must
+    match; geo, active-time and Q-code filters run in the same indexed query.
+    "count" is the number of matches, capped at text_search.MAX_TEXT_CANDIDATES
+    (only the newest that many are ranked); "results" the best `limit` with their "score".
+    """
+    if (lat is None) != (lon is None):
+        raise HTTPException(status_code=400, detail="lat and lon must be given together")
+    if lat is not None and bbox:
+        raise HTTPException(status_code=400, detail="Use either lat/lon/radius or bbox")
+    try:
+        box = parse_bbox(bbox) if bbox else None
+        window = parse_window(valid_from, valid_to)
+        filters = qcodes.build_filter(q_group, subject, condition)
+        terms = text_search.query_terms(q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if category:
+        filters["category"] = category
+    
+    etag = await _query_etag(request)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag)
+    
+    near = (lat, lon, radius) if lat is not None else None
+    
+    def render():
+        count, ranked = text_search.search(get_db(), q, limit, near, box, window, filters)
+        results = []
+        for score, doc in ranked:
+            doc.pop("_id", None)
+            results.append({**doc, "score": score})
+        return http_cache.to_json({"terms": terms, "count": count, "results": results})
+    
+    return await _coalesced(request, etag, render)
+
+class Waypoint(BaseModel):
+    lat: float
+    lon: float
+
+class CorridorRequest(BaseModel):
+    waypoints: List[Waypoint]
+    width: float = Field(10, gt=0, description="Full corridor width in Nautical Miles")
+    fl_min: Optional[int] = Field(None, description="Lower flight level of the band (e.g. 100)")
+    fl_max: Optional[int] = Field(None, description="Upper flight level of the band (e.g. 350)")
+    zoom: Optional[float] = Field(None, ge=0, le=24, description="Map zoom level; simplifies geometry to match")
+    tolerance: Optional[float] = Field(None, gt=0, description="Geometry tolerance in NM (overrides zoom)")
+    category: Optional[str] = None
+    q_group: Optional[str] = None
+    subject: Optional[str] = None
+    condition: Optional[str] = None
+
+@router.get("/api/airport/{icao}")
+async def get_airport_geojson(icao: str, request: Request):
+    """
+    All NOTAMs for one location indicator (icao_location, e.g. KBOS) as a GeoJSON
+    FeatureCollection, served from the per-airport materialized view: a single-key
+    read, re-computed only after a write for that airport.
+    The ETag follows the airport's own view, so writes elsewhere don't invalidate it.
+    """
+    code = airport_views.normalize_icao(icao)
+    if code is None:
+        raise HTTPException(status_code=400, detail="icao must be 3-4 letters/digits")
+    
+    def load():
+        db = get_db()
+        view = db.get_airport_view(code)
+        if view is None or view["body"] is None:
+            view = airport_views.materialize(db, code)
+        return {**view, "body": view["body"].encode("utf-8"), "compressed": {}}
+    
+    # Concurrent requests for the airport share one view read (and materialization)
+    view = await flights.run(("airport", code), load)
+    
+    # Versions restart after clear_db; the materialization time keeps old ETags from matching
+    etag = http_cache.make_etag(f"/api/airport/{code}", [], f"a{view['version']}.{int(view['updated_at'] * 1000)}")
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag)
+    return http_cache.encoded_response(request, view["body"], "application/json", etag, compressed=view["compressed"])
+
+@router.post("/api/corridor")
+async def get_corridor_geojson(request: CorridorRequest, http_request: Request):
+    """
+    Returns NOTAMs whose area intersects a route corridor as a GeoJSON FeatureCollection.
+    Optionally limited to NOTAMs whose vertical limits overlap a flight-level band.
+    """
+    if request.fl_min is not None and request.fl_max is not None and request.fl_min > request.fl_max:
+        raise HTTPException(status_code=400, detail="fl_min must not exceed fl_max")
+    
+    try:
+        filters = qcodes.build_filter(request.q_group, request.subject, request.condition)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.category:
+        filters["category"] = request.category
+    
+    waypoints = [[wp.lon, wp.lat] for wp in request.waypoints]
+    try:
+        results = await run_in_threadpool(
+            get_db().search_corridor, waypoints, request.width, request.fl_min, request.fl_max, filters
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    mean_lat = sum(wp.lat for wp in request.waypoints) / len(request.waypoints)
+    tolerance_nm = _tolerance(request.zoom, request.tolerance, mean_lat)
+    return _feature_response(http_request, results, tolerance_nm)
+
+@router.get("/api/geojson")
 async def get_notam_geojson(
+    request: Request,
     lat: float = Query(..., description="Latitude"),
     lon: float = Query(..., description="Longitude"),
     radius: float = Query(10, description="Radius in Nautical Miles"),
-    category: Optional[str] = Query(None, description="Filter by category (e.g. Runway, Airspace)")
+    category: Optional[str] = Query(None, description="Filter by category (e.g. Runway, Airspace)"),
+    q_group: Optional[str] = Query(None, description="Q-code subject group letter or family (e.g. L, lighting, navaid)"),
+    subject: Optional[str] = Query(None, description="Q-code subject (e.g. MR for runway)"),
+    condition: Optional[str] = Query(None, description="Q-code condition (e.g. LC closed, AS unserviceable)"),
+    zoom: Optional[float] = Query(None, ge=0, le=24, description="Map zoom level; simplifies geometry to match"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Geometry tolerance in NM (overrides zoom)"),
+    valid_from: Optional[str] = Query(None, description=ACTIVE_FROM_DESCRIPTION),
+    valid_to: Optional[str] = Query(None, description=ACTIVE_TO_DESCRIPTION)
 ):
     """
     Returns NOTAMs as a GeoJSON FeatureCollection.
-    Approximates circular areas as Polygons.
+    Approximates circular areas as Polygons, at full resolution or, with zoom /
+    tolerance, with just enough vertices and coordinate precision for the display.
+    Category and Q-code filters are applied in the database query (indexed), as
+    is valid_from/valid_to, which keeps NOTAMs active in that window (validity and
+    D-field schedule, via the stored active intervals).
+    Carries an ETag (query + data version); a matching If-None-Match gets a 304
+    without querying.
+    Send "Accept: application/x-protobuf" for the compact binary encoding.
+    Identical concurrent requests share a single query (see _coalesced).
     """
-    results = db.search_nearby(lat, lon, radius)
+    media_type = _feature_media_type(request)
+    etag = await _query_etag(request, media_type if media_type == notam_pbf.MEDIA_TYPE else None)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag, FEATURE_VARY)
+    
+    try:
+        filters = qcodes.build_filter(q_group, subject, condition)
+        window = parse_window(valid_from, valid_to)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Filter by category if provided
     if category:
-        results = [r for r in results if r.get("category") == category]
+        filters["category"] = category
     
-    feature_collection = GeoJsonConverter.to_feature_collection(results)
+    def render():
+        results = get_db().search_nearby(lat, lon, radius, filters, window)
+        return _render_features(results, _tolerance(zoom, tolerance, lat), media_type)
+    
+    return await _coalesced(request, etag, render, _body_media_type(media_type), FEATURE_VARY)
+
+@router.get("/api/stats/grid")
+async def get_grid_stats(
+    request: Request,
+    min_lon: float = Query(..., ge=-180, le=180),
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lon: float = Query(..., ge=-180, le=180),
+    max_lat: float = Query(..., ge=-90, le=90),
+    cell: float = Query(1.0, gt=0, description="Cell size in degrees"),
+    group_by: Optional[str] = Query(None, description="Split counts by 'category' or 'fir'")
+):
+    """
+    NOTAM density: counts per grid cell over a bbox, computed in the database.
+    Cells are [ix, iy] from the bbox's south-west corner, each `cell` degrees wide.
+    Results are cached per data version.
+    """
+    if min_lon >= max_lon or min_lat >= max_lat:
+        raise HTTPException(status_code=400, detail="Bounding box must have min < max")
+    if group_by is not None and group_by not in GRID_GROUPS:
+        raise HTTPException(status_code=400, detail=f"group_by must be one of {', '.join(GRID_GROUPS)}")
     
-    return feature_collection
+    columns = math.ceil((max_lon - min_lon) / cell)
+    rows = math.ceil((max_lat - min_lat) / cell)
+    if columns * rows > MAX_GRID_CELLS:
+        raise HTTPException(status_code=400, detail=f"Grid too fine: {columns * rows} cells (max {MAX_GRID_CELLS})")
+    
+    version = await data_version.get_async()
+    etag = http_cache.make_etag(request.url.path, request.query_params.multi_items(), version)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag)
+    
+    key = (min_lon, min_lat, max_lon, max_lat, cell, group_by)
+    payload = grid_cache.get(key, version)
+    if payload is not None:
+        return http_cache.json_response(request, payload, etag)
+    
+    def render():
+        counts = get_db().grid_counts(min_lon, min_lat, max_lon, max_lat, cell, group_by)
+        
+        # Compact rows: [ix, iy, count] or [ix, iy, group, count]; points on the
+        # max edge are folded into the last cell
+        merged = {}
+        for (ix, iy, group), count in counts.items():
+            cell_key = (min(ix, columns - 1), min(iy, rows - 1), group)
+            merged[cell_key] = merged.get(cell_key, 0) + count
+        cells = [
+            [ix, iy, group, count] if group_by else [ix, iy, count]
+            for (ix, iy, group), count in sorted(merged.items(), key=lambda item: (item[0][0], item[0][1], str(item[0][2])))
+        ]
+        payload = {
+            "bbox": [min_lon, min_lat, max_lon, max_lat],
+            "cell": cell,
+            "columns": columns,
+            "rows": rows,
+            "group_by": group_by,
+            "total": sum(merged.values()),
+            "cells": cells,
+        }
+        grid_cache.put(key, version, payload)
+        return http_cache.to_json(payload)
+    
+    return await _coalesced(request, etag, render)
+
+@router.get("/api/changes")
+async def get_changes(
+    request: Request,
+    since: int = Query(0, ge=0, description="Change sequence from the previous response (0 for a full sync)"),
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=MAX_CHANGES_PAGE_SIZE)
+):
+    """
+    Delta sync for clients keeping a local NOTAM cache: NOTAMs added or updated
+    after change sequence `since` (as GeoJSON features) and the ids of NOTAMs
+    cancelled, replaced or expired since then, oldest first.
+    Pass the returned "seq" as `since` next time; while "more" is true there is
+    another page. "reset" means the changes since `since` are gone (data cleared
+    or tombstones pruned): drop the cache and sync again from since=0.
+    """
+    try:
+        box = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Every write and removal bumps the data version, so idle polls get a 304
+    etag = await _query_etag(request)
+    if http_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        return http_cache.not_modified(etag)
+    
+    def render():
+        page = get_db().get_changes(since, box, limit)
+        return http_cache.to_json({
+            "since": since,
+            "seq": page["seq"],
+            "more": page["more"],
+            "reset": page["reset"],
+            "features": GeoJsonConverter.to_feature_collection(page["upserted"]),
+            "removed": page["removed"],
+        })
+    
+    return await _coalesced(request, etag, render)
+
+@router.get("/api/metrics/freshness")
+async def get_freshness_metrics():
+    """
+    Ingest latency over the listeners' rolling windows, per stage:
+    broker (issued/lastUpdated -> received), parse, db (-> persisted) and total.
+    Each stage has a histogram over `buckets` (seconds), p50/p95 and a max-lag gauge,
+    combined across listeners; `listeners` has each one's own report.
+    """
+    snapshots = await run_in_threadpool(get_db().list_metrics, freshness.metrics_key(""))
+    snapshot = freshness.combine(snapshots)
+    if snapshot is None:
+        return {"available": False}
+    return {
+        "available": True,
+        "snapshot_age_seconds": round(time.time() - snapshot["generated_at"], 1),
+        **snapshot
+    }
+
+@router.get("/api/admin/query-plans")
+async def get_query_plans(request: Request):
+    """
+    Query timings and captured plans from this API process: per-query count,
+    mean and max time, plus explain() summaries of slow (>= SLOW_QUERY_MS) and
+    sampled queries, newest first. Compare each plan's "returned" (from the DB)
+    with the entry's "returned" (after in-process filtering). "single_flight"
+    counts computed vs coalesced GET requests.
+    """
+    if ADMIN_TOKEN and request.headers.get("x-admin-token") != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    return http_cache.json_response(request, {**get_db().profiler.report(), "single_flight": flights.stats})
+
+@router.get("/api/ready")
+async def readiness():
+    """
+    Readiness probe: 200 once the DB is reachable and caches are warm, 503 before.
+    Always reports import and startup timings.
+    """
+    return JSONResponse(status_code=200 if startup_state["ready"] else 503, content=startup_state)
+
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+
+def _warm_up(stop_event):
+    # Retries until the DB answers (it may still be starting), or the app shuts down
+    started = time.perf_counter()
+    while not stop_event.is_set():
+        try:
+            warmup.warm_up(get_db())
+        except Exception as e:
+            startup_state["error"] = str(e)
+            logger.warning("Warm-up failed, retrying", extra={"retry_seconds": WARMUP_RETRY_SECONDS, "error": str(e)})
+            stop_event.wait(WARMUP_RETRY_SECONDS)
+            continue
+        startup_state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+        startup_state["error"] = None
+        startup_state["ready"] = True
+        logger.info("Warm-up complete, ready", extra={"warmup_seconds": startup_state["warmup_seconds"]})
+        return
+
+@asynccontextmanager
+async def lifespan(app):
+    started = time.perf_counter()
+    structured_log.configure()  # Slow-query warnings carry their plan summary as fields
+    # Warm up in the background: the process accepts connections (and answers
+    # /api/ready with 503) instead of blocking boot on Mongo
+    stop_event = threading.Event()
+    warm_thread = threading.Thread(target=_warm_up, args=(stop_event,), name="warmup", daemon=True)
+    warm_thread.start()
+    startup_state["startup_seconds"] = round(time.perf_counter() - started, 3)
+    yield
+    stop_event.set()
+
+def create_app():
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+
+    # Serve Static Files (HTML) - ONLY IN DEV MODE
+    # To enable: set ENV=DEV in environment
+    if os.getenv("ENV") == "DEV":
+        static_dir = os.path.join(os.path.dirname(__file__), "static")
+        logger.info("Mounting static files (DEV mode)", extra={"static_dir": static_dir})
+        if not os.path.exists(static_dir):
+            os.makedirs(static_dir)
+
+        app.mount("/static", StaticFiles(directory=static_dir), name="static")
 
-# Serve Static Files (HTML) - ONLY IN DEV MODE
-# To enable: set ENV=DEV in environment
-if os.getenv("ENV") == "DEV":
-    print("Mounting Static Files (DEV MODE)...")
-    static_dir = os.path.join(os.path.dirname(__file__), "static")
-    if not os.path.exists(static_dir):
-        os.makedirs(static_dir)
+        @app.get("/")
+        async def read_index():
+            return HTMLResponse(open(os.path.join(static_dir, "map.html")).read())
 
-    app.mount("/static", StaticFiles(directory=static_dir), name="static")
+        @app.get("/map.html")
+        async def read_map():
+            return HTMLResponse(open(os.path.join(static_dir, "map.html")).read())
 
-    @app.get("/")
-    async def read_index():
-        return HTMLResponse(open(os.path.join(static_dir, "map.html")).read())
+    return app
 
-    @app.get("/map.html")
-    async def read_map():
-        return HTMLResponse(open(os.path.join(static_dir, "map.html")).read())
+app = create_app()
+startup_state["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
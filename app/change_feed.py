@@ -0,0 +1,49 @@
+import os
+
+# Delta sync (/api/changes). Storage stamps every NOTAM write with the next value
+# of a change sequence ("seq") and moves cancelled, replaced and expired NOTAMs to
+# a tombstone store, also under a new seq, so clients can ask for everything after
+# the last seq they saw.
+EXPIRY_SWEEP_SECONDS = float(os.getenv("EXPIRY_SWEEP_SECONDS", "300"))  # Listener's expiry sweep interval
+TOMBSTONE_RETENTION_HOURS = float(os.getenv("TOMBSTONE_RETENTION_HOURS", "168"))  # Older tombstones are pruned
+
+# Tombstone reasons
+CANCELLED, REPLACED, EXPIRED = "cancelled", "replaced", "expired"
+REFERENCE_REASONS = {"C": CANCELLED, "R": REPLACED}
+
+
+def cancelling(notam_docs):
+    """
+    NOTAMR/NOTAMC documents that name another NOTAM: [(doc, reason)].
+    """
+    return [
+        (doc, REFERENCE_REASONS[doc.get("notam_type")])
+        for doc in notam_docs
+        if doc.get("notam_type") in REFERENCE_REASONS and doc.get("references")
+    ]
+
+
+def merge_page(since, upserted, removed, limit, current_seq, floor):
+    """
+    Builds a page of changes after `since` from live documents and tombstones, each
+    sorted by seq (fetch limit + 1 of each so `more` is known).
+    Returns {"seq", "more", "reset", "upserted": [docs], "removed": [tombstones]}.
+    "seq" is the `since` for the next request: the last seq on a full page, else the
+    current sequence. "reset" means changes after `since` are no longer all known
+    (cleared data, pruned tombstones, or a sequence from another database): the
+    client has to drop its cache and sync again from since=0.
+    """
+    if since and (since < floor or since > current_seq):
+        return {"seq": current_seq, "more": False, "reset": True, "upserted": [], "removed": []}
+
+    events = [(doc["seq"], True, doc) for doc in upserted] + [(tomb["seq"], False, tomb) for tomb in removed]
+    events.sort(key=lambda event: event[0])
+    more = len(events) > limit
+    events = events[:limit]
+    return {
+        "seq": events[-1][0] if more else max(current_seq, since),
+        "more": more,
+        "reset": False,
+        "upserted": [doc for _, live, doc in events if live],
+        "removed": [tomb for _, live, tomb in events if not live],
+    }
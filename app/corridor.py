@@ -0,0 +1,134 @@
+import math
+import os
+
+# Route corridor geometry.
+# Distances use a local equirectangular projection per segment, so long legs are
+# split into segments of at most CORRIDOR_SEGMENT_NM to keep the error small.
+CORRIDOR_SEGMENT_NM = float(os.getenv("CORRIDOR_SEGMENT_NM", "100"))
+MAX_CORRIDOR_SEGMENTS = int(os.getenv("MAX_CORRIDOR_SEGMENTS", "100"))
+CAP_POINTS = 8  # Vertices per semicircular end cap of a buffered segment
+
+# NOTAM radius bands (NM). Each band gets its own buffered query polygon, so a
+# NOTAM area intersects the corridor iff its centre lies inside the corridor
+# widened by the band's upper radius. Radii above the last band are not
+# geo-filtered in the query (FIR-wide NOTAMs are rare) and are checked exactly.
+RADIUS_BANDS = (5, 25, 100, 250)
+
+
+def _project(point, lat0):
+    # [lon, lat] -> planar (x, y) in NM around latitude lat0
+    return point[0] * 60.0 * math.cos(math.radians(lat0)), point[1] * 60.0
+
+
+def _unproject(x, y, lat0):
+    return [x / (60.0 * math.cos(math.radians(lat0))), y / 60.0]
+
+
+def route_segments(waypoints, max_segment_nm=CORRIDOR_SEGMENT_NM):
+    """
+    Splits a route ([[lon, lat], ...]) into straight segments no longer than
+    max_segment_nm. Returns [(a, b), ...]; a single waypoint gives one
+    zero-length segment. Raises ValueError for invalid routes.
+    """
+    if not waypoints:
+        raise ValueError("Route needs at least one waypoint")
+    for lon, lat in waypoints:
+        if not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0):
+            raise ValueError(f"Waypoint out of range: {lat}, {lon}")
+
+    if len(waypoints) == 1:
+        return [(list(waypoints[0]), list(waypoints[0]))]
+
+    segments = []
+    for a, b in zip(waypoints, waypoints[1:]):
+        if abs(b[0] - a[0]) > 180.0:
+            raise ValueError("Routes crossing the antimeridian are not supported")
+        lat0 = (a[1] + b[1]) / 2.0
+        ax, ay = _project(a, lat0)
+        bx, by = _project(b, lat0)
+        pieces = max(1, math.ceil(math.hypot(bx - ax, by - ay) / max_segment_nm))
+        for i in range(pieces):
+            start = [a[0] + (b[0] - a[0]) * i / pieces, a[1] + (b[1] - a[1]) * i / pieces]
+            end = [a[0] + (b[0] - a[0]) * (i + 1) / pieces, a[1] + (b[1] - a[1]) * (i + 1) / pieces]
+            segments.append((start, end))
+
+    if len(segments) > MAX_CORRIDOR_SEGMENTS:
+        raise ValueError(f"Route too long: {len(segments)} segments (max {MAX_CORRIDOR_SEGMENTS})")
+    return segments
+
+
+def buffer_segment(a, b, buffer_nm, cap_points=CAP_POINTS):
+    """
+    GeoJSON Polygon covering every point within buffer_nm of segment a-b
+    (a "stadium": two half circles joined by straight sides).
+    Returns None if the polygon would leave valid lon/lat bounds.
+    """
+    lat0 = (a[1] + b[1]) / 2.0
+    ax, ay = _project(a, lat0)
+    bx, by = _project(b, lat0)
+    heading = math.atan2(by - ay, bx - ax) if (ax, ay) != (bx, by) else 0.0
+    # Vertices sit outside the true circle so the chords never cut into the buffer
+    buffer_nm = buffer_nm / math.cos(math.pi / (2 * cap_points))
+
+    ring = []
+    # Cap around b, then around a, sweeping counter-clockwise
+    for (cx, cy), start in (((bx, by), heading - math.pi / 2), ((ax, ay), heading + math.pi / 2)):
+        for i in range(cap_points + 1):
+            angle = start + math.pi * i / cap_points
+            ring.append(_unproject(cx + buffer_nm * math.cos(angle), cy + buffer_nm * math.sin(angle), lat0))
+    ring.append(ring[0])
+
+    if any(not (-180.0 <= lon <= 180.0 and -90.0 <= lat <= 90.0) for lon, lat in ring):
+        return None
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def route_bbox(segments, buffer_nm):
+    """
+    [min_lon, min_lat, max_lon, max_lat] of the route widened by buffer_nm,
+    or None if that would wrap a pole or the antimeridian.
+    """
+    lons = [p[0] for seg in segments for p in seg]
+    lats = [p[1] for seg in segments for p in seg]
+    dlat = buffer_nm / 60.0
+    if max(abs(min(lats)), abs(max(lats))) + dlat >= 89.0:
+        return None
+    dlon = dlat / math.cos(math.radians(max(abs(min(lats)), abs(max(lats))) + dlat))
+    if min(lons) - dlon < -180.0 or max(lons) + dlon > 180.0:
+        return None
+    return [min(lons) - dlon, min(lats) - dlat, max(lons) + dlon, max(lats) + dlat]
+
+
+def distance_to_segment_nm(point, a, b):
+    lat0 = (a[1] + b[1]) / 2.0
+    px, py = _project(point, lat0)
+    ax, ay = _project(a, lat0)
+    bx, by = _project(b, lat0)
+    dx, dy = bx - ax, by - ay
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length_sq))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def distance_to_route_nm(point, segments):
+    return min(distance_to_segment_nm(point, a, b) for a, b in segments)
+
+
+def radius_bands():
+    """
+    (lower, upper) NOTAM radius ranges for corridor queries: lower is exclusive,
+    upper inclusive, None means unbounded.
+    """
+    bounds = (None,) + RADIUS_BANDS + (None,)
+    return list(zip(bounds, bounds[1:]))
+
+
+def intersects_corridor(doc, segments, half_width_nm):
+    """
+    Exact test: does the NOTAM's circle (location + radius_nm) reach the corridor?
+    """
+    location = doc.get("location")
+    if not location:
+        return False
+    reach = half_width_nm + max(doc.get("radius_nm") or 0, 0)
+    return distance_to_route_nm(location["coordinates"], segments) <= reach
@@ -1,68 +1,156 @@
 import os
-import pymongo
-from pymongo import MongoClient, GEOSPHERE
+from concurrent.futures import ThreadPoolExecutor
+from app.query_profiler import QueryProfiler
 
-DB_NAME = "notam_db"
-COLLECTION_NAME = "notams"
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")  # mongo | sqlite
+BATCH_QUERY_WORKERS = int(os.getenv("BATCH_QUERY_WORKERS", "8"))  # Concurrent point queries per batch search
+
+def create_storage(backend=STORAGE_BACKEND, **options):
+    """
+    Instantiates a storage backend by name. Imports lazily so an embedded
+    (sqlite) deployment never loads pymongo.
+    """
+    if backend == "mongo":
+        from app.mongo_storage import MongoStorage
+        return MongoStorage(**options)
+    if backend == "sqlite":
+        from app.sqlite_storage import SqliteStorage
+        return SqliteStorage(**options)
+    raise ValueError(f"Unknown storage backend '{backend}' (expected mongo or sqlite)")
 
 class DBManager:
-    def __init__(self, uri=MONGO_URI):
-        self.client = MongoClient(uri)
-        self.db = self.client[DB_NAME]
-        self.collection = self.db[COLLECTION_NAME]
-        
+    """
+    Storage facade used by the API, the listener and the scripts.
+    Delegates to the backend selected by STORAGE_BACKEND (MongoStorage or
+    SqliteStorage); both take and return readable NOTAM documents.
+    Backend-specific extras (e.g. Mongo's collection or partition router) are
+    reachable as attributes.
+    Searches are timed by a QueryProfiler (slow-query log and sampled plans).
+    """
+    def __init__(self, backend=STORAGE_BACKEND, **options):
+        self.backend = backend
+        self.storage = create_storage(backend, **options)
+        self.batch_executor = ThreadPoolExecutor(max_workers=BATCH_QUERY_WORKERS)
+        self.profiler = QueryProfiler()
+
+    def __getattr__(self, name):
+        # Only reached for attributes not defined on the facade
+        if name == "storage":
+            raise AttributeError(name)
+        return getattr(self.storage, name)
+
     def init_db(self):
-        """
-        Initializes the database, creating indexes if they don't exist.
-        """
-        # Create 2dsphere index on the 'location' field for geospatial queries
-        print("Ensuring 2dsphere index on 'location' field...")
-        self.collection.create_index([("location", GEOSPHERE)])
-        print("Index ensure complete.")
-        
+        return self.storage.init_db()
+
     def clear_db(self):
-        """
-        Drops the Notam collection.
-        """
-        print(f"Dropping collection '{COLLECTION_NAME}'...")
-        self.collection.drop()
-        print("Collection dropped.")
-        self.init_db() # Re-init indexes
+        return self.storage.clear_db()
 
-        
     def insert_notam(self, notam_doc):
-        """
-        Inserts or updates a NOTAM document.
-        Uses notam_id as the unique identifier.
-        """
-        result = self.collection.update_one(
-            {"notam_id": notam_doc["notam_id"]},
-            {"$set": notam_doc},
-            upsert=True
+        return self.storage.insert_notam(notam_doc)
+
+    def upsert_many(self, notam_docs):
+        return self.storage.upsert_many(notam_docs)
+
+    def _profiled(self, name, params, call):
+        return self.profiler.run(self.storage, name, params, call)
+
+    def search_nearby(self, lat, lon, radius_nm, filters=None, window=None):
+        return self._profiled(
+            "search_nearby", {"lat": lat, "lon": lon, "radius_nm": radius_nm, "filters": filters, "window": window},
+            lambda: self.storage.search_nearby(lat, lon, radius_nm, filters, window)
+        )
+
+    def search_bbox(self, min_lon, min_lat, max_lon, max_lat, filters=None):
+        return self._profiled(
+            "search_bbox", {"bbox": [min_lon, min_lat, max_lon, max_lat], "filters": filters},
+            lambda: self.storage.search_bbox(min_lon, min_lat, max_lon, max_lat, filters)
         )
-        return result
-        
-    def search_nearby(self, lat, lon, radius_nm):
+
+    def search_by_icao(self, icao_codes, filters=None):
+        icao_codes = list(icao_codes)
+        return self._profiled(
+            "search_by_icao", {"icao_codes": icao_codes, "filters": filters},
+            lambda: self.storage.search_by_icao(icao_codes, filters)
+        )
+
+    def search_corridor(self, waypoints, width_nm, fl_min=None, fl_max=None, filters=None):
+        return self._profiled(
+            "search_corridor",
+            {"waypoints": waypoints, "width_nm": width_nm, "fl_min": fl_min, "fl_max": fl_max, "filters": filters},
+            lambda: self.storage.search_corridor(waypoints, width_nm, fl_min, fl_max, filters)
+        )
+
+    def search_text(self, terms, near=None, bbox=None, window=None, filters=None, limit=0):
+        return self._profiled(
+            "search_text",
+            {"terms": list(terms), "near": near, "bbox": bbox, "window": window, "filters": filters, "limit": limit},
+            lambda: self.storage.search_text(terms, near, bbox, window, filters, limit)
+        )
+
+    def term_counts(self, terms):
+        return self.storage.term_counts(terms)
+
+    def search_batch(self, points, icao_codes=(), filters=None):
         """
-        Finds NOTAMs within the specified radius (in nautical miles) of the point.
+        Runs many lookups in one call.
+        points: [(lat, lon, radius_nm)], queried concurrently (bounded by BATCH_QUERY_WORKERS).
+        icao_codes: resolved with a single query.
+        Returns (results per point in input order, {icao_code: [docs]}).
         """
-        # MongoDB $centerSphere uses radians.
-        # Radius in radians = radius_in_miles / 3963.2 (Earth radius in miles)
-        # OR radius_in_nm / 3440.06 (Earth radius in NM)
-        
-        radius_radians = radius_nm / 3440.06
-        
-        query = {
-            "location": {
-                "$geoWithin": {
-                    "$centerSphere": [[lon, lat], radius_radians]
-                }
-            }
-        }
-        
-        results = list(self.collection.find(query))
-        return results
+        point_futures = [
+            self.batch_executor.submit(self.search_nearby, lat, lon, radius_nm, filters)
+            for lat, lon, radius_nm in points
+        ]
+        icao_results = self.search_by_icao(icao_codes, filters) if icao_codes else {}
+        return [future.result() for future in point_futures], icao_results
+
+    def grid_counts(self, min_lon, min_lat, max_lon, max_lat, cell_deg, group_by=None):
+        return self._profiled(
+            "grid_counts", {"bbox": [min_lon, min_lat, max_lon, max_lat], "cell_deg": cell_deg, "group_by": group_by},
+            lambda: self.storage.grid_counts(min_lon, min_lat, max_lon, max_lat, cell_deg, group_by)
+        )
+
+    def get_changes(self, since, bbox=None, limit=1000):
+        return self._profiled(
+            "get_changes", {"since": since, "bbox": bbox, "limit": limit},
+            lambda: self.storage.get_changes(since, bbox, limit)
+        )
+
+    def expire_notams(self, now=None):
+        return self.storage.expire_notams(now)
+
+    def prune_tombstones(self, older_than):
+        return self.storage.prune_tombstones(older_than)
+
+    def get_airport_view(self, icao):
+        return self.storage.get_airport_view(icao)
+
+    def save_airport_view(self, icao, version, body, count, updated_at):
+        return self.storage.save_airport_view(icao, version, body, count, updated_at)
 
     def get_count(self):
-        return self.collection.count_documents({})
+        return self.storage.get_count()
+
+    def get_data_version(self):
+        return self.storage.get_data_version()
+
+    def save_metrics(self, key, value):
+        return self.storage.save_metrics(key, value)
+
+    def get_metrics(self, key):
+        return self.storage.get_metrics(key)
+
+    def list_metrics(self, prefix):
+        return self.storage.list_metrics(prefix)
+
+    def ping(self):
+        return self.storage.ping()
+
+    def get_checkpoints(self):
+        return self.storage.get_checkpoints()
+
+    def save_checkpoint(self, source_id, offset, messages, complete=False):
+        return self.storage.save_checkpoint(source_id, offset, messages, complete)
+
+    def reset_checkpoints(self):
+        return self.storage.reset_checkpoints()
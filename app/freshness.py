@@ -0,0 +1,162 @@
+import bisect
+import os
+import socket
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+# Rolling ingest latency, split by stage so an incident can be pinned on the
+# broker (issued -> received), parsing (received -> parsed) or the DB (parsed -> persisted)
+FRESHNESS_WINDOW_SECONDS = float(os.getenv("FRESHNESS_WINDOW_SECONDS", "900"))
+FRESHNESS_FLUSH_SECONDS = float(os.getenv("FRESHNESS_FLUSH_SECONDS", "10"))  # How often the listener persists a snapshot
+METRICS_KEY = "freshness"
+# Each listener saves its snapshot under its own key, so listeners sharing a
+# non-exclusive queue don't overwrite each other
+LISTENER_ID = os.getenv("LISTENER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+# Histogram bucket upper bounds in seconds (last bucket is everything above)
+BUCKETS = (0.1, 0.5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+STAGES = ("broker", "parse", "db", "total")
+
+
+def parse_iso_timestamp(value):
+    """
+    "2025-12-17T03:52:00.000Z" -> epoch seconds, or None if missing/unparseable.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def source_time(doc):
+    """
+    When the FAA last touched the NOTAM: lastUpdated, falling back to issued.
+    """
+    return parse_iso_timestamp(doc.get("last_updated")) or parse_iso_timestamp(doc.get("issued"))
+
+
+def metrics_key(listener_id=LISTENER_ID):
+    """
+    Metrics key one listener's snapshot is saved under.
+    """
+    return f"{METRICS_KEY}:{listener_id}"
+
+
+def combine(snapshots, now=None):
+    """
+    Merges the listeners' snapshots into one summary for the API. Sample counts
+    and histograms are summed and max is the max over listeners; p50/p95 can't
+    be merged exactly from summaries, so the worst listener's value is reported
+    (an upper bound). A snapshot older than its window holds no live samples:
+    it is listed under "listeners" but left out of the totals.
+    Returns None if no listener has reported.
+    """
+    if not snapshots:
+        return None
+    now = time.time() if now is None else now
+    live = [s for s in snapshots if now - s["generated_at"] <= s["window_seconds"]]
+
+    stages = {}
+    for stage in STAGES:
+        parts = [s["stages"][stage] for s in live]
+        combined = {"count": sum(part["count"] for part in parts)}
+        for stat in ("max", "p50", "p95"):
+            values = [part[stat] for part in parts if part[stat] is not None]
+            combined[stat] = max(values) if values else None
+        combined["histogram"] = [sum(counts) for counts in zip(*(part["histogram"] for part in parts))] or [0] * (len(BUCKETS) + 1)
+        stages[stage] = combined
+
+    persisted = [s["last_persisted_at"] for s in live if s["last_persisted_at"] is not None]
+    return {
+        "generated_at": max(s["generated_at"] for s in snapshots),
+        "window_seconds": max(s["window_seconds"] for s in snapshots),
+        "buckets": list(BUCKETS),
+        "samples": sum(s["samples"] for s in live),
+        "recorded_total": sum(s["recorded_total"] for s in snapshots),
+        "last_persisted_at": max(persisted) if persisted else None,
+        "stages": stages,
+        "listeners": [
+            {
+                "listener": s.get("listener"),
+                "snapshot_age_seconds": round(now - s["generated_at"], 1),
+                "samples": s["samples"],
+                "recorded_total": s["recorded_total"],
+                "stale": s not in live,
+            }
+            for s in sorted(snapshots, key=lambda s: str(s.get("listener")))
+        ],
+    }
+
+
+class LagTracker:
+    """
+    Keeps per-stage latency samples for the last FRESHNESS_WINDOW_SECONDS and
+    summarizes them as histograms, percentiles and a max-lag gauge.
+    Thread-safe; record() is called from the broker callback thread.
+    """
+
+    def __init__(self, window_seconds=FRESHNESS_WINDOW_SECONDS, clock=time.time):
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._samples = deque()  # (persisted_at, {stage: seconds})
+        self.recorded = 0
+
+    def record(self, source_at, received_at, parsed_at, persisted_at):
+        """
+        Adds one NOTAM's timings (epoch seconds). source_at may be None, in
+        which case only the parse and db stages are recorded.
+        """
+        lags = {"parse": parsed_at - received_at, "db": persisted_at - parsed_at}
+        if source_at is not None:
+            lags["broker"] = received_at - source_at
+            lags["total"] = persisted_at - source_at
+        with self._lock:
+            self._samples.append((persisted_at, lags))
+            self.recorded += 1
+            self._expire(self.clock())
+
+    def _expire(self, now):
+        cutoff = now - self.window_seconds
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+
+    def snapshot(self):
+        """
+        Summary of the current window, JSON-serializable.
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            samples = list(self._samples)
+
+        stages = {}
+        for stage in STAGES:
+            values = sorted(lags[stage] for _, lags in samples if stage in lags)
+            histogram = [0] * (len(BUCKETS) + 1)
+            for value in values:
+                histogram[bisect.bisect_left(BUCKETS, value)] += 1
+            stages[stage] = {
+                "count": len(values),
+                "max": values[-1] if values else None,
+                "p50": values[len(values) // 2] if values else None,
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))] if values else None,
+                "histogram": histogram,
+            }
+
+        return {
+            "generated_at": now,
+            "window_seconds": self.window_seconds,
+            "buckets": list(BUCKETS),
+            "samples": len(samples),
+            "recorded_total": self.recorded,
+            "last_persisted_at": samples[-1][0] if samples else None,
+            "stages": stages,
+        }
@@ -1,13 +1,64 @@
 import math
+from functools import lru_cache
 
 class GeoJsonConverter:
     """
     Converts parsed NOTAM data into GeoJSON format.
     Handles Point geometries and approximates circles/radius as Polygons.
     """
+    DEFAULT_CIRCLE_POINTS = 32
+    MIN_CIRCLE_POINTS = 8
+    MAX_CIRCLE_POINTS = 32  # Never more than the fixed-resolution output
+    TOLERANCE_PIXELS = 1.0  # Allowed deviation on screen when a zoom level is given
+    METERS_PER_PIXEL_Z0 = 156543.03392  # Web Mercator ground resolution at zoom 0, equator
+    METERS_PER_NM = 1852.0
 
     @staticmethod
-    def create_circle_polygon(center_lon, center_lat, radius_nm, num_points=32):
+    def tolerance_for_zoom(zoom, lat=0.0):
+        """
+        Geometry tolerance in NM for a web map zoom level: the ground size of
+        TOLERANCE_PIXELS at that zoom and latitude.
+        """
+        meters_per_pixel = GeoJsonConverter.METERS_PER_PIXEL_Z0 * math.cos(math.radians(lat)) / (2 ** zoom)
+        return GeoJsonConverter.TOLERANCE_PIXELS * meters_per_pixel / GeoJsonConverter.METERS_PER_NM
+
+    @staticmethod
+    def vertices_for(radius_nm, tolerance_nm):
+        """
+        Fewest polygon vertices whose chords stay within tolerance_nm of the circle
+        (sagitta r * (1 - cos(pi / n)) <= tolerance), clamped to [MIN, MAX]_CIRCLE_POINTS.
+        """
+        if tolerance_nm is None:
+            return GeoJsonConverter.DEFAULT_CIRCLE_POINTS
+        if tolerance_nm >= radius_nm:
+            return GeoJsonConverter.MIN_CIRCLE_POINTS
+        n = math.ceil(math.pi / math.acos(1.0 - tolerance_nm / radius_nm))
+        return max(GeoJsonConverter.MIN_CIRCLE_POINTS, min(GeoJsonConverter.MAX_CIRCLE_POINTS, n))
+
+    @staticmethod
+    def precision_for(tolerance_nm):
+        """
+        Decimal places for coordinates so rounding error stays under half the tolerance.
+        None (full precision) when no tolerance is given.
+        """
+        if tolerance_nm is None:
+            return None
+        tolerance_deg = tolerance_nm / 60.0
+        return max(0, min(7, math.ceil(-math.log10(tolerance_deg / 2.0))))
+
+    @staticmethod
+    @lru_cache(maxsize=16)
+    def unit_circle(num_points):
+        """
+        (cos, sin) pairs for num_points evenly spaced angles, computed once per size.
+        """
+        return tuple(
+            (math.cos(math.radians(float(i) / num_points * 360.0)), math.sin(math.radians(float(i) / num_points * 360.0)))
+            for i in range(num_points)
+        )
+
+    @staticmethod
+    def create_circle_polygon(center_lon, center_lat, radius_nm, num_points=DEFAULT_CIRCLE_POINTS, precision=None):
         """
         Creates a Polygon geometry approximating a circle.
         
@@ -16,6 +67,7 @@ class GeoJsonConverter:
             center_lat: Latitude of center point
             radius_nm: Radius in Nautical Miles
             num_points: Number of vertices for the polygon (default 32)
+            precision: Decimal places to round coordinates to (default: full precision)
             
         Returns:
             List of coordinates [[lon, lat], ...] closed loop
@@ -23,21 +75,22 @@ class GeoJsonConverter:
         if radius_nm <= 0:
             return None
             
-        coords = []
         # Convert NM to degrees (approximate)
         # 1 NM = 1/60 degree latitude approx
         # For longitude, we need to adjust by cos(lat)
         
         radius_deg = radius_nm / 60.0
+        lon_scale = radius_deg / math.cos(math.radians(center_lat))
         
-        for i in range(num_points):
-            angle = math.radians(float(i) / num_points * 360.0)
-            dx = radius_deg * math.cos(angle) / math.cos(math.radians(center_lat))
-            dy = radius_deg * math.sin(angle)
-            
-            p_lon = center_lon + dx
-            p_lat = center_lat + dy
-            coords.append([p_lon, p_lat])
+        coords = [
+            [center_lon + lon_scale * cos_a, center_lat + radius_deg * sin_a]
+            for cos_a, sin_a in GeoJsonConverter.unit_circle(num_points)
+        ]
+        if precision is not None:
+            # Integer rounding is much cheaper than round(x, ndigits) and gives the same short floats
+            scale = 10.0 ** precision
+            floor = math.floor
+            coords = [[floor(p_lon * scale + 0.5) / scale, floor(p_lat * scale + 0.5) / scale] for p_lon, p_lat in coords]
             
         # Close the loop
         coords.append(coords[0])
@@ -45,9 +98,41 @@ class GeoJsonConverter:
         return [coords] # Polygon format requires list of rings
 
     @staticmethod
-    def to_geojson_feature(notam_doc):
+    def geometry_for(notam_doc, tolerance_nm=None):
+        """
+        GeoJSON geometry for a NOTAM: a circle Polygon for a significant radius,
+        else a Point; None without a location. See to_geojson_feature for tolerance_nm.
+        """
+        if not notam_doc.get("location"):
+            return None
+        center = notam_doc["location"]["coordinates"]
+        radius = notam_doc.get("radius_nm", 0)
+        precision = GeoJsonConverter.precision_for(tolerance_nm)
+        
+        # If significant radius, create Polygon
+        if radius > 0.5 and (tolerance_nm is None or radius > tolerance_nm): # 0.5 NM threshold
+            poly_coords = GeoJsonConverter.create_circle_polygon(
+                center[0], center[1], radius,
+                num_points=GeoJsonConverter.vertices_for(radius, tolerance_nm),
+                precision=precision
+            )
+            return {
+                "type": "Polygon",
+                "coordinates": poly_coords
+            }
+        # Default to Point
+        return {
+            "type": "Point",
+            "coordinates": center if precision is None else [round(c, precision) for c in center]
+        }
+
+    @staticmethod
+    def to_geojson_feature(notam_doc, tolerance_nm=None):
         """
         Converts a single NOTAM document to a GeoJSON Feature.
+        With tolerance_nm (e.g. from tolerance_for_zoom), circles get only as many
+        vertices as the display needs, coordinates are rounded to match, and circles
+        smaller than the tolerance are sent as Points.
         """
         props = notam_doc.copy()
         
@@ -56,29 +141,13 @@ class GeoJsonConverter:
             props["_id"] = str(props["_id"])
         
         # Determine Geometry
-        geometry = None
+        geometry = GeoJsonConverter.geometry_for(notam_doc, tolerance_nm)
         
-        if "location" in notam_doc and notam_doc["location"]:
+        if geometry is not None:
             center = notam_doc["location"]["coordinates"]
             # Expose Decimal Degrees as separate attributes
             props["longitude"] = center[0]
             props["latitude"] = center[1]
-            
-            radius = notam_doc.get("radius_nm", 0)
-            
-            # If significant radius, create Polygon
-            if radius > 0.5: # 0.5 NM threshold
-                poly_coords = GeoJsonConverter.create_circle_polygon(center[0], center[1], radius)
-                geometry = {
-                    "type": "Polygon",
-                    "coordinates": poly_coords
-                }
-            else:
-                # Default to Point
-                geometry = {
-                    "type": "Point",
-                    "coordinates": center
-                }
         
         # Remove location from properties to avoid duplication/confusion
         if "location" in props:
@@ -91,12 +160,12 @@ class GeoJsonConverter:
         }
 
     @staticmethod
-    def to_feature_collection(notam_docs):
+    def to_feature_collection(notam_docs, tolerance_nm=None):
         """
         Converts a list of NOTAM documents to a GeoJSON FeatureCollection.
         """
         features = [
-            GeoJsonConverter.to_geojson_feature(doc) 
+            GeoJsonConverter.to_geojson_feature(doc, tolerance_nm) 
             for doc in notam_docs 
             if doc.get("location") # Only include NOTAMs with location
         ]
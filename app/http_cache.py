@@ -0,0 +1,253 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:  # Optional: br is only offered when the 'brotli' package is installed
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))  # Smaller bodies are sent as-is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "5"))
+DATA_VERSION_TTL = float(os.getenv("DATA_VERSION_TTL", "2"))  # Seconds a data version read is reused
+
+
+class DataVersionCache:
+    """
+    Caches the storage data version for a short TTL so conditional requests
+    don't each cost a DB round trip. fetch() returns the current version.
+    Async handlers use get_async(), which refreshes in the threadpool.
+    """
+
+    def __init__(self, fetch, ttl=DATA_VERSION_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched = 0
+
+    def get(self):
+        now = time.monotonic()
+        if self._value is None or now - self._fetched > self.ttl:
+            with self._lock:
+                if self._value is None or now - self._fetched > self.ttl:
+                    self._value = self.fetch()
+                    self._fetched = time.monotonic()
+        return self._value
+
+    async def get_async(self):
+        """
+        get() for the event loop: a fresh cached version is returned directly;
+        a refresh (a blocking DB read, slow while the DB is down) runs in the
+        threadpool so it never stalls other requests.
+        """
+        if self._value is not None and time.monotonic() - self._fetched <= self.ttl:
+            return self._value
+        return await run_in_threadpool(self.get)
+
+
+class VersionedCache:
+    """
+    Small LRU of computed results, each tagged with the data version it was
+    computed at; an entry from an older version is a miss.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent computations: while one is in flight for a
+    key, later callers await its result instead of starting their own. The
+    function runs in the threadpool (it may block on the DB), in a task of its
+    own, so a caller that disconnects doesn't cancel it for the others.
+    An exception is raised to every caller. Nothing is kept once the flight
+    lands; use a key that changes with the data (e.g. the ETag).
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self.stats = {"computed": 0, "coalesced": 0}
+
+    def _landed(self, key, task):
+        self._flights.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # Retrieved here too, in case every caller went away
+
+    async def run(self, key, fn, *args):
+        task = self._flights.get(key)
+        if task is None:
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args))
+            self._flights[key] = task
+            task.add_done_callback(lambda done: self._landed(key, done))
+            self.stats["computed"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+
+def make_etag(path, params, version):
+    """
+    Weak ETag for a GET query: path + sorted query parameters + data version.
+    Weak because the same entity may be sent with different content encodings.
+    """
+    key = path + "?" + "&".join(f"{k}={v}" for k, v in sorted(params))
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version}-{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Weak comparison of an If-None-Match header against an ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def choose_encoding(accept_encoding):
+    """
+    Picks br (if available) or gzip from an Accept-Encoding header, honouring q=0.
+    Returns None for identity.
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    def allowed(name):
+        return accepted.get(name, accepted.get("*", 0.0)) > 0
+
+    if brotli is not None and allowed("br"):
+        return "br"
+    if allowed("gzip"):
+        return "gzip"
+    return None
+
+
+def compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+def negotiate(accept, offered):
+    """
+    Picks the media type from offered that the Accept header prefers (highest q,
+    ties in offered order). Falls back to offered[0] rather than failing with 406.
+    """
+    ranges = []
+    for part in (accept or "").split(","):
+        media_range, _, params = part.strip().partition(";")
+        if not media_range:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            param = param.strip()
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        ranges.append((media_range.strip().lower(), q))
+
+    def quality(media_type):
+        # Most specific matching range wins: type/subtype, then type/*, then */*
+        main_type = media_type.split("/")[0]
+        for candidate in (media_type, main_type + "/*", "*/*"):
+            for media_range, q in ranges:
+                if media_range == candidate:
+                    return q
+        return 0.0
+
+    best, best_q = offered[0], 0.0
+    for media_type in offered:
+        q = quality(media_type)
+        if q > best_q:
+            best, best_q = media_type, q
+    return best
+
+
+def not_modified(etag, vary="Accept-Encoding"):
+    return Response(status_code=304, headers={"ETag": etag, "Vary": vary})
+
+
+def encoded_response(request, body, media_type, etag=None, vary="Accept-Encoding", compressed=None):
+    """
+    Sends a serialized body, compressing it when the client accepts it and the
+    body is at least COMPRESSION_MIN_BYTES. A body shared by several requests
+    can pass a `compressed` dict, which keeps each encoding for the next one.
+    """
+    headers = {"Vary": vary}
+    if etag:
+        headers["ETag"] = etag
+
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+        if encoding:
+            if compressed is None:
+                body = compress(body, encoding)
+            else:
+                if encoding not in compressed:
+                    compressed[encoding] = compress(body, encoding)
+                body = compressed[encoding]
+            headers["Content-Encoding"] = encoding
+
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def json_response(request, payload, etag=None, vary="Accept-Encoding"):
+    """
+    Serializes payload as compact JSON (see encoded_response).
+    """
+    return encoded_response(request, to_json(payload), "application/json", etag, vary)
+
+
+def to_json(payload):
+    return json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8")
@@ -0,0 +1,237 @@
+import heapq
+import itertools
+import logging
+import mmap
+import os
+import socket
+import struct
+import time
+import zlib
+
+# Append-only journal of raw SWIM payloads, written by the listener so the DB can be
+# rebuilt locally (scripts/rebuild_from_journal.py) instead of re-fetching a snapshot.
+# Layout: <JOURNAL_DIR>/<stream>/journal.NNNNN.log plus a fixed-width journal.NNNNN.idx.
+# One stream per listener process, so several listeners never share a file.
+JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() == "true"
+JOURNAL_DIR = os.getenv("JOURNAL_DIR", os.path.join(os.getenv("DATA_DIR", "data"), "journal"))
+JOURNAL_STREAM = os.getenv("JOURNAL_STREAM", socket.gethostname())
+JOURNAL_SEGMENT_BYTES = int(os.getenv("JOURNAL_SEGMENT_MB", "64")) * 1024 * 1024
+
+# Record: payload length, received_at (epoch seconds), crc32 of the payload, then the payload
+RECORD_HEADER = struct.Struct("<IdI")
+# Index entry per record: byte offset of the record in the log, received_at
+INDEX_ENTRY = struct.Struct("<Qd")
+
+LOG_SUFFIX = ".log"
+INDEX_SUFFIX = ".idx"
+
+logger = logging.getLogger(__name__)
+
+
+def _segment_paths(stream_dir, seq):
+    base = os.path.join(stream_dir, f"journal.{seq:05d}")
+    return base + LOG_SUFFIX, base + INDEX_SUFFIX
+
+
+def _segment_numbers(stream_dir):
+    numbers = []
+    for name in os.listdir(stream_dir):
+        if name.startswith("journal.") and name.endswith(LOG_SUFFIX):
+            try:
+                numbers.append(int(name[len("journal."):-len(LOG_SUFFIX)]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+def _map(path):
+    # mmap refuses empty files
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _scan_records(log, start):
+    """
+    Yields (offset, received_at, payload_end) for every intact record from start,
+    stopping at the first torn or corrupt one.
+    """
+    size = len(log)
+    offset = start
+    while offset + RECORD_HEADER.size <= size:
+        length, received_at, crc = RECORD_HEADER.unpack_from(log, offset)
+        payload_start = offset + RECORD_HEADER.size
+        payload_end = payload_start + length
+        if payload_end > size or zlib.crc32(log[payload_start:payload_end]) != crc:
+            return
+        yield offset, received_at, payload_end
+        offset = payload_end
+
+
+class JournalWriter:
+    """
+    Appends raw payloads to the active segment of one stream, rotating at
+    segment_max_bytes. Each record is flushed to the OS before append() returns
+    (write-ahead of the DB write); segments are fsynced when sealed.
+    Reopening a stream resumes its last segment, dropping a torn trailing record.
+    """
+
+    def __init__(self, journal_dir=JOURNAL_DIR, stream=JOURNAL_STREAM, segment_max_bytes=JOURNAL_SEGMENT_BYTES):
+        self.stream_dir = os.path.join(journal_dir, stream)
+        self.segment_max_bytes = segment_max_bytes
+        self.record_count = 0
+        if not os.path.exists(self.stream_dir):
+            os.makedirs(self.stream_dir)
+
+        numbers = _segment_numbers(self.stream_dir)
+        self.seq = numbers[-1] if numbers else 0
+        self._open(recover=bool(numbers))
+
+    def _open(self, recover=False):
+        log_path, index_path = _segment_paths(self.stream_dir, self.seq)
+        if recover:
+            self._recover(log_path, index_path)
+        self._log = open(log_path, "ab")
+        self._index = open(index_path, "ab")
+        self.size = self._log.tell()
+
+    def _recover(self, log_path, index_path):
+        # Trust the index up to the last entry whose record is intact, re-index
+        # any records written after it, and cut the log after the last good record
+        index_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        entries = index_size // INDEX_ENTRY.size
+        log = _map(log_path)
+        try:
+            good_entries, end = 0, 0
+            if log is not None and entries:
+                with open(index_path, "rb") as f:
+                    index = f.read(entries * INDEX_ENTRY.size)
+                # A crash only tears the tail, so walk back from the last entry
+                for i in range(entries - 1, -1, -1):
+                    offset, _ = INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size)
+                    record = next(_scan_records(log, offset), None)
+                    if record is not None:
+                        good_entries, end = i + 1, record[2]
+                        break
+            missing = list(_scan_records(log, end)) if log is not None else []
+        finally:
+            if log is not None:
+                log.close()
+
+        with open(index_path, "ab") as f:
+            f.truncate(good_entries * INDEX_ENTRY.size)
+            for offset, received_at, payload_end in missing:
+                f.write(INDEX_ENTRY.pack(offset, received_at))
+                end = payload_end
+        with open(log_path, "ab") as f:
+            f.truncate(end)
+        if missing:
+            logger.warning("Re-indexed journal records", extra={"records": len(missing), "path": log_path})
+
+    def _seal(self):
+        for handle in (self._log, self._index):
+            handle.flush()
+            os.fsync(handle.fileno())
+            handle.close()
+
+    def append(self, payload, received_at=None):
+        """
+        Appends one raw payload (str or bytes). Returns the record's received_at.
+        """
+        if received_at is None:
+            received_at = time.time()
+        data = payload.encode("utf-8") if isinstance(payload, str) else payload
+
+        if self.size > 0 and self.size + RECORD_HEADER.size + len(data) > self.segment_max_bytes:
+            self._seal()
+            self.seq += 1
+            self._open()
+
+        offset = self.size
+        self._log.write(RECORD_HEADER.pack(len(data), received_at, zlib.crc32(data)))
+        self._log.write(data)
+        self._log.flush()
+        # Index after the record, so an indexed offset always points at a complete write
+        self._index.write(INDEX_ENTRY.pack(offset, received_at))
+        self._index.flush()
+
+        self.size += RECORD_HEADER.size + len(data)
+        self.record_count += 1
+        return received_at
+
+    def close(self):
+        self._seal()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def list_segments(journal_dir=JOURNAL_DIR):
+    """
+    Returns [(stream, log_path, index_path)] for every segment, streams in name
+    order and segments in write order.
+    """
+    if not os.path.isdir(journal_dir):
+        return []
+    segments = []
+    for stream in sorted(os.listdir(journal_dir)):
+        stream_dir = os.path.join(journal_dir, stream)
+        if not os.path.isdir(stream_dir):
+            continue
+        for seq in _segment_numbers(stream_dir):
+            segments.append((stream, *_segment_paths(stream_dir, seq)))
+    return segments
+
+
+def iter_segment(log_path, index_path, until=None):
+    """
+    Yields (received_at, payload str) for the indexed records of one segment,
+    skipping records received after `until` (epoch seconds).
+    received_at is wall-clock time and can step back (e.g. an NTP correction),
+    so the cut-off is checked on every index entry rather than searched for;
+    skipped records are never read from the log. Records are memory-mapped,
+    not read into Python buffers.
+    """
+    index = _map(index_path) if os.path.exists(index_path) else None
+    log = _map(log_path)
+    if index is None or log is None:
+        for mapped in (index, log):
+            if mapped is not None:
+                mapped.close()
+        return
+    try:
+        for i in range(len(index) // INDEX_ENTRY.size):
+            offset, received_at = INDEX_ENTRY.unpack_from(index, i * INDEX_ENTRY.size)
+            if until is not None and received_at > until:
+                continue
+            length, _, crc = RECORD_HEADER.unpack_from(log, offset)
+            start = offset + RECORD_HEADER.size
+            payload = log[start:start + length]
+            if zlib.crc32(payload) != crc:
+                logger.error("Corrupt journal record, stopping segment", extra={"path": log_path, "offset": offset})
+                return
+            yield received_at, payload.decode("utf-8")
+    finally:
+        index.close()
+        log.close()
+
+
+def _iter_stream(segments, until):
+    for _, log_path, index_path in segments:
+        yield from iter_segment(log_path, index_path, until)
+
+
+def iter_records(journal_dir=JOURNAL_DIR, until=None):
+    """
+    Yields (received_at, payload) for every journaled message, merging the
+    streams by received_at. With several listeners, a NOTAMC/NOTAMR in one
+    stream then replays after the NOTAM it names from another (a cancellation
+    only removes a NOTAM that is already stored). Storage writes and tombstones
+    are version-ordered, so duplicate copies across streams are dropped.
+    """
+    streams = [list(segments) for _, segments in itertools.groupby(list_segments(journal_dir), key=lambda s: s[0])]
+    yield from heapq.merge(*(_iter_stream(segments, until) for segments in streams), key=lambda record: record[0])
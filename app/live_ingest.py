@@ -1,6 +1,6 @@
+import logging
 import os
 import time
-import sys
 import certifi
 from dotenv import load_dotenv
 from solace.messaging.messaging_service import MessagingService, ReconnectionListener, RetryStrategy
@@ -8,44 +8,123 @@ from solace.messaging.resources.queue import Queue
 from solace.messaging.receiver.message_receiver import MessageHandler, InboundMessage
 from .db_manager import DBManager
 from .xml_parser import parse_notam_str
+from .freshness import LagTracker, source_time, metrics_key, FRESHNESS_FLUSH_SECONDS, LISTENER_ID
+from . import airport_views
+from .journal import JournalWriter, JOURNAL_ENABLED, JOURNAL_DIR, JOURNAL_STREAM
+from .change_feed import EXPIRY_SWEEP_SECONDS, TOMBSTONE_RETENTION_HOURS
+from .structured_log import configure as configure_logging
 
 load_dotenv()
 
+# exclusive: one listener owns the queue. non_exclusive: run N listeners on the same
+# queue; writes are version-ordered, so out-of-order delivery across them is safe
+SWIM_QUEUE_ACCESS = os.getenv("SWIM_QUEUE_ACCESS", "exclusive")
+
+logger = logging.getLogger(__name__)
+
 class ServiceEventHandler(ReconnectionListener):
     def on_reconnecting(self, e: Exception, event):
-        print(f"Reconnecting: {e}")
+        logger.warning("Reconnecting", extra={"error": str(e)})
 
     def on_reconnected(self, event):
-        print(f"Reconnected event: {event}")
+        logger.info("Reconnected", extra={"event": event})
 
     def on_service_interruption(self, e: Exception, event):
-        print(f"Service interrupted: {e}")
+        logger.error("Service interrupted", extra={"error": str(e)})
 
 class IngestionHandler(MessageHandler):
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, journal=None):
         self.db = db_manager
+        self.journal = journal
         self.message_count = 0
+        self.stale_count = 0
+        self.lag_tracker = LagTracker()
+        self.last_flush = time.time()
+        self.last_sweep = 0.0
 
     def on_message(self, message: InboundMessage):
+        received_at = time.time()
         self.message_count += 1
         
         payload = message.get_payload_as_string() if message.get_payload_as_string() else str(message.get_payload_as_bytes())
         
+        # Journal the raw payload before parsing, so the DB can be rebuilt from it
+        if self.journal:
+            try:
+                self.journal.append(payload, received_at)
+            except Exception as e:
+                logger.error("Journaling message failed", extra={"message_count": self.message_count, "error": str(e)})
+        
         # Parse and Insert
         # Note: parse_notam_str handles exceptions internally and returns generator
         count = 0
+        changed_airports = set()
         try:
-            for notam in parse_notam_str(payload):
-                self.db.insert_notam(notam)
+            notams = list(parse_notam_str(payload))
+            parsed_at = time.time()
+            received_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(received_at))
+            
+            for notam in notams:
+                notam["received_at"] = received_iso
+                if self.db.insert_notam(notam):
+                    changed_airports.add(notam.get("icao_location"))
+                else:
+                    self.stale_count += 1  # A newer version was already stored
+                self.lag_tracker.record(source_time(notam), received_at, parsed_at, time.time())
                 count += 1
-                # Less verbose logging for prod, but good for now
-                if count % 10 == 0:
-                   sys.stdout.write(f"\r[INGEST] Processed {self.message_count} msgs. Last NOTAM: {notam.get('number', 'N/A')}")
-                   sys.stdout.flush()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Processed message", extra={
+                    "message_count": self.message_count, "notams": count,
+                    "last_notam": notams[-1].get("number") if notams else None
+                })
+        except Exception as e:
+            logger.exception("Processing message failed", extra={"message_count": self.message_count})
+        
+        # Keep the airport views of the changed locations materialized
+        try:
+            airport_views.refresh(self.db, changed_airports)
         except Exception as e:
-            print(f"\n[ERROR] Processing message {self.message_count}: {e}")
+            logger.error("Refreshing airport views failed", extra={"airports": sorted(c for c in changed_airports if c), "error": str(e)})
+        
+        self.flush_metrics()
+
+    def flush_metrics(self, force=False):
+        """
+        Persists the lag snapshot, under this listener's own key, so the API
+        (a separate process) can serve it.
+        """
+        now = time.time()
+        if not force and now - self.last_flush < FRESHNESS_FLUSH_SECONDS:
+            return
+        self.last_flush = now
+        logger.info("Ingest progress", extra={"messages": self.message_count, "stale": self.stale_count})
+        try:
+            self.db.save_metrics(metrics_key(), {"listener": LISTENER_ID, **self.lag_tracker.snapshot()})
+        except Exception as e:
+            logger.error("Saving freshness metrics failed", extra={"error": str(e)})
+
+    def sweep_expired(self, force=False):
+        """
+        Moves NOTAMs past their end time to the tombstones (so /api/changes reports
+        them removed), prunes old tombstones and refreshes the affected airport views.
+        """
+        now = time.time()
+        if not force and now - self.last_sweep < EXPIRY_SWEEP_SECONDS:
+            return
+        self.last_sweep = now
+        try:
+            removed = self.db.expire_notams(now)
+            pruned = self.db.prune_tombstones(now - TOMBSTONE_RETENTION_HOURS * 3600)
+            airport_views.refresh(self.db, {tomb["icao_location"] for tomb in removed})
+            if removed or pruned:
+                logger.info("Expiry sweep", extra={"expired": len(removed), "tombstones_pruned": pruned})
+        except Exception as e:
+            logger.error("Expiry sweep failed", extra={"error": str(e)})
 
 def main():
+    # Records are written by a background thread, so message handling never blocks on the console
+    configure_logging(use_queue=True)
+
     # Broker Configuration
     broker_props = {
         "solace.messaging.transport.host": os.getenv("SWIM_HOST"),
@@ -59,33 +138,45 @@ def main():
     queue_name = os.getenv("SWIM_QUEUE")
     
     # Init DB
-    print("Initializing Database...")
+    logger.info("Initializing database")
     db = DBManager()
     db.init_db()
     
-    print("Initializing Messaging Service...")
+    logger.info("Initializing messaging service")
     messaging_service = MessagingService.builder().from_properties(broker_props).build()
     messaging_service.connect()
-    print("Connected to Solace Broker.")
+    logger.info("Connected to Solace broker")
 
-    durable_exclusive_queue = Queue.durable_exclusive_queue(queue_name)
-    receiver = messaging_service.create_persistent_message_receiver_builder().build(durable_exclusive_queue)
+    if SWIM_QUEUE_ACCESS == "non_exclusive":
+        queue = Queue.durable_non_exclusive_queue(queue_name)
+    else:
+        queue = Queue.durable_exclusive_queue(queue_name)
+    receiver = messaging_service.create_persistent_message_receiver_builder().build(queue)
     receiver.start()
     
-    msg_handler = IngestionHandler(db)
-    print(f"Listening on queue: {queue_name} for real-time ingestion...")
+    journal = None
+    if JOURNAL_ENABLED:
+        journal = JournalWriter()
+        logger.info("Journaling raw messages", extra={"path": os.path.join(JOURNAL_DIR, JOURNAL_STREAM)})
+    
+    msg_handler = IngestionHandler(db, journal)
+    logger.info("Listening for real-time ingestion", extra={"queue": queue_name, "access": SWIM_QUEUE_ACCESS})
     
     receiver.receive_async(msg_handler)
     
     try:
         while True:
             time.sleep(1)
+            msg_handler.flush_metrics()  # Keep the snapshot current while idle
+            msg_handler.sweep_expired()
     except KeyboardInterrupt:
-        print("\nInterrupted by user.")
+        logger.info("Interrupted by user")
     finally:
-        print("Terminating...")
+        logger.info("Terminating")
         receiver.terminate()
         messaging_service.disconnect()
+        if journal:
+            journal.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,879 @@
+import contextlib
+import os
+import re
+import threading
+import time
+import pymongo
+from pymongo import MongoClient, GEOSPHERE, ReturnDocument, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from app import storage_schema, corridor, change_feed, text_search, schedule
+from app.storage_schema import field
+from app.partition_router import PartitionRouter, normalize_fir, radius_bbox
+
+DB_NAME = "notam_db"
+COLLECTION_NAME = "notams"
+CHECKPOINT_COLLECTION_NAME = "load_checkpoints"
+META_COLLECTION_NAME = "notam_meta"
+AIRPORT_VIEW_COLLECTION_NAME = "airport_views"
+FIR_LOOKUP_COLLECTION_NAME = "notam_firs"  # notam_id -> FIR partition, when partitioned
+TOMBSTONE_COLLECTION_NAME = "notam_tombstones"
+SEQ_LEASE_COLLECTION_NAME = "notam_seq_leases"  # Writes holding change sequences not yet landed
+DATA_VERSION_ID = "data_version"
+CHANGE_SEQ_ID = "change_seq"
+CHANGE_FLOOR_ID = "change_floor"
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
+BLOCK_COMPRESSOR = os.getenv("NOTAM_BLOCK_COMPRESSOR", "zstd")  # snappy | zlib | zstd | none
+PARTITION_BY_FIR = os.getenv("NOTAM_PARTITION_BY_FIR", "false").lower() == "true"
+SEQ_LEASE_SECONDS = float(os.getenv("SEQ_LEASE_SECONDS", "60"))  # A lease older than this is from a dead writer
+
+def _plan_stages(node, stages, indexes):
+    # Walks an explain() winningPlan tree (classic inputStage(s), or SBE queryPlan)
+    if not isinstance(node, dict):
+        return
+    stage = node.get("stage")
+    if stage and stage not in stages:
+        stages.append(stage)
+    if node.get("indexName"):
+        indexes.add(node["indexName"])
+    for key in ("queryPlan", "inputStage"):
+        _plan_stages(node.get(key), stages, indexes)
+    for child in node.get("inputStages", []):
+        _plan_stages(child, stages, indexes)
+
+def _interval_key(name):
+    return f"{field('active_intervals')}.{name}"
+
+def _active_conditions(window):
+    """
+    Conditions keeping NOTAMs active at some point in window (start, end): valid
+    then and, if scheduled, inside one of their active intervals. Intervals are at
+    most schedule.MAX_INTERVAL_SECONDS long, so $elemMatch bounds both ends of the
+    interval index scan.
+    """
+    start, end = window
+    return [
+        {"$or": [{field("starts_at"): {"$lte": end}}, {field("starts_at"): None}]},
+        {"$or": [{field("expires_at"): {"$gt": start}}, {field("expires_at"): None}]},
+        {"$or": [
+            {field("active_intervals"): None},
+            {field("active_intervals"): {"$elemMatch": {
+                storage_schema.INTERVAL_START_KEY: {"$gte": start - schedule.MAX_INTERVAL_SECONDS, "$lte": end},
+                storage_schema.INTERVAL_END_KEY: {"$gt": start},
+            }}},
+        ]},
+    ]
+
+class MongoStorage:
+    """
+    MongoDB storage backend: 2dsphere-indexed collection (optionally one per FIR).
+    """
+    def __init__(self, uri=MONGO_URI, partition_by_fir=PARTITION_BY_FIR, db_name=DB_NAME):
+        self.client = MongoClient(uri)
+        self.db = self.client[db_name]
+        self.collection = self.db[COLLECTION_NAME]
+        self.checkpoints = self.db[CHECKPOINT_COLLECTION_NAME]
+        self.meta = self.db[META_COLLECTION_NAME]
+        self.airport_views = self.db[AIRPORT_VIEW_COLLECTION_NAME]  # Keyed by ICAO code (_id)
+        self.tombstones = self.db[TOMBSTONE_COLLECTION_NAME]  # Removed NOTAMs, keyed by notam_id (_id)
+        self.notam_firs = self.db[FIR_LOOKUP_COLLECTION_NAME]  # Partition of each NOTAM, keyed by notam_id (_id)
+        self.seq_leases = self.db[SEQ_LEASE_COLLECTION_NAME]
+        self._local = threading.local()  # Per-thread query trace for explain_trace()
+        
+        # Optional: one collection per FIR, with a router for queries
+        self.router = PartitionRouter(self.db, self._ensure_indexes) if partition_by_fir else None
+        
+    def init_db(self):
+        """
+        Initializes the database, creating indexes if they don't exist.
+        Documents use the compact layout from storage_schema.
+        """
+        self.tombstones.create_index([("seq", 1)])
+        self.tombstones.create_index([("removed_at", 1)])
+        self.seq_leases.create_index([("floor", 1)])
+        if self.router:
+            # Partitions are created (and indexed) on first write; refresh existing ones
+            print("FIR partitioning enabled, ensuring partition indexes...")
+            for fir in self.router.all_firs():
+                self.router.collection_for_fir(fir)
+            self._backfill_notam_firs()
+            print("Index ensure complete.")
+            return
+        
+        self._ensure_indexes(self.collection)
+        print("Index ensure complete.")
+
+    def _ensure_indexes(self, collection):
+        # Create the collection explicitly so WiredTiger block compression can be set
+        if collection.name not in self.db.list_collection_names():
+            print(f"Creating collection '{collection.name}' (block_compressor={BLOCK_COMPRESSOR})...")
+            self.db.create_collection(
+                collection.name,
+                storageEngine={"wiredTiger": {"configString": f"block_compressor={BLOCK_COMPRESSOR}"}}
+            )
+        
+        # Create 2dsphere index on the 'location' field for geospatial queries
+        print(f"Ensuring 2dsphere index on 'location' field ({collection.name})...")
+        collection.create_index([(field("location"), GEOSPHERE)])
+        
+        # Upserts look documents up by notam_id. Unique, so a version-conditional
+        # upsert that misses a newer stored document fails instead of inserting a copy
+        try:
+            collection.create_index([(field("notam_id"), 1)], unique=True)
+        except OperationFailure as e:
+            if e.code not in (85, 86):  # IndexOptionsConflict / IndexKeySpecsConflict
+                raise
+            print(f"Rebuilding notam_id index as unique ({collection.name})...")
+            collection.drop_index([(field("notam_id"), 1)])
+            collection.create_index([(field("notam_id"), 1)], unique=True)
+        
+        # Corridor queries: location per radius band, then flight-level overlap
+        collection.create_index([
+            (field("location"), GEOSPHERE),
+            (field("radius_nm"), 1),
+            (field("lower_fl"), 1),
+            (field("upper_fl"), 1)
+        ])
+        
+        # Batch lookups by ICAO location indicator
+        collection.create_index([(field("icao_location"), 1)])
+        
+        # Q-code families: compound with location so geo queries filter inside the index,
+        # plus single-field indexes for non-geo lookups
+        collection.create_index([
+            (field("location"), GEOSPHERE),
+            (field("q_group"), 1),
+            (field("q_subject"), 1),
+            (field("q_condition"), 1)
+        ])
+        for name in ("q_group", "q_subject", "q_condition"):
+            collection.create_index([(field(name), 1)])
+        
+        # Delta sync: changes by sequence, NOTAMR/NOTAMC targets, expiry sweep
+        collection.create_index([(field("seq"), 1)])
+        collection.create_index([(field("number"), 1), (field("icao_location"), 1)])
+        collection.create_index([(field("expires_at"), 1)])
+        
+        # Text search: multikey index over E-field words
+        collection.create_index([(field("terms"), 1)])
+        
+        # Schedules: multikey index over the active intervals (start, end)
+        collection.create_index([(_interval_key(storage_schema.INTERVAL_START_KEY), 1), (_interval_key(storage_schema.INTERVAL_END_KEY), 1)])
+        
+    def clear_db(self):
+        """
+        Drops the Notam collection (and all FIR partitions).
+        Loader checkpoints describe what is in it, so they are dropped too.
+        The change sequence carries on; changes before the clear are no longer
+        available (see get_changes).
+        """
+        print(f"Dropping collection '{COLLECTION_NAME}'...")
+        self.collection.drop()
+        if self.router:
+            print("Dropping FIR partitions...")
+            self.router.drop_all()
+            self.notam_firs.drop()
+        self.checkpoints.drop()
+        self.airport_views.drop()
+        self.tombstones.drop()
+        self._raise_change_floor(self._current_seq())
+        self._bump_data_version()
+        print("Collection dropped.")
+        self.init_db() # Re-init indexes
+
+    def clear_partition(self, fir):
+        """
+        Drops a single FIR partition so it can be reloaded on its own.
+        """
+        if not self.router:
+            raise RuntimeError("clear_partition requires NOTAM_PARTITION_BY_FIR=true")
+        print(f"Dropping FIR partition '{fir}'...")
+        self.router.drop_partition(fir)
+        self.notam_firs.delete_many({"fir": normalize_fir(fir)})
+
+    def _backfill_notam_firs(self):
+        # Partitions written before the notam_id -> FIR lookup existed
+        if self.notam_firs.estimated_document_count():
+            return
+        for fir in self.router.all_firs():
+            ops = [
+                UpdateOne({"_id": raw[field("notam_id")]}, {"$set": {"fir": fir}}, upsert=True)
+                for raw in self.router.collection_for_fir(fir).find({}, {field("notam_id"): 1})
+            ]
+            if ops:
+                print(f"Recording partition of {len(ops)} NOTAMs ({fir})...")
+                self.notam_firs.bulk_write(ops, ordered=False)
+
+    def _collection_for(self, notam_doc):
+        if self.router:
+            return self.router.collection_for_fir(notam_doc.get("fir"))
+        return self.collection
+        
+    def _version_filter(self, notam_doc):
+        # Matches the stored document only if it is not newer than notam_doc
+        return {
+            field("notam_id"): notam_doc["notam_id"],
+            "$or": [
+                {field("version"): {"$lte": notam_doc.get("version") or ""}},
+                {field("version"): {"$exists": False}}
+            ]
+        }
+
+    def _not_removed(self, notam_docs):
+        """
+        Drops documents of NOTAMs that were cancelled, replaced or expired at the
+        same or a newer version: a late delivery or a journal replay must not bring
+        them back.
+        """
+        ids = [doc["notam_id"] for doc in notam_docs]
+        removed = {
+            tomb["_id"]: tomb.get("version") or ""
+            for tomb in self.tombstones.find({"_id": {"$in": ids}}, {"version": 1})
+        }
+        return [
+            doc for doc in notam_docs
+            if doc["notam_id"] not in removed or (doc.get("version") or "") > removed[doc["notam_id"]]
+        ]
+
+    def _moved_copies(self, notam_docs):
+        """
+        With FIR partitions, a NOTAM whose FIR changed still has its previous copy
+        in the old partition, out of reach of the version filter of the new one.
+        The partition each NOTAM was last written to is looked up in one query;
+        only a NOTAM arriving with a different FIR is looked for in that partition.
+        Returns (notam_docs without those older than such a copy,
+        {notam_id: previous FIR, for every document whose FIR is new or changed}).
+        """
+        if not self.router or not notam_docs:
+            return notam_docs, {}
+        firs = {doc["notam_id"]: normalize_fir(doc.get("fir")) for doc in notam_docs}
+        recorded = {entry["_id"]: entry["fir"] for entry in self.notam_firs.find({"_id": {"$in": list(firs)}})}
+        moved = {notam_id: recorded.get(notam_id) for notam_id, fir in firs.items() if recorded.get(notam_id) != fir}
+
+        ids_by_fir = {}
+        for notam_id, previous in moved.items():
+            if previous is not None:
+                ids_by_fir.setdefault(previous, []).append(notam_id)
+        newer = {}
+        for previous, ids in ids_by_fir.items():
+            query = {field("notam_id"): {"$in": ids}}
+            for raw in self.router.collection_for_fir(previous).find(query, {field("notam_id"): 1, field("version"): 1}):
+                newer[raw[field("notam_id")]] = raw.get(field("version")) or ""
+
+        current = [
+            doc for doc in notam_docs
+            if doc["notam_id"] not in newer or newer[doc["notam_id"]] <= (doc.get("version") or "")
+        ]
+        return current, moved
+
+    def _remove_moved(self, notam_docs, moved):
+        # Deletes the copies left in a NOTAM's previous partition (unless re-written
+        # since) and records the partition each NOTAM now lives in
+        relocated = [doc for doc in notam_docs if doc["notam_id"] in moved]
+        for doc in relocated:
+            if moved[doc["notam_id"]] is not None:
+                self.router.collection_for_fir(moved[doc["notam_id"]]).delete_one(self._version_filter(doc))
+        if relocated:
+            self.notam_firs.bulk_write([
+                UpdateOne({"_id": doc["notam_id"]}, {"$set": {"fir": normalize_fir(doc.get("fir"))}}, upsert=True)
+                for doc in relocated
+            ], ordered=False)
+
+    def _update(self, notam_doc, seq):
+        # $set alone keeps fields a newer version no longer has (e.g. an old
+        # schedule and its intervals), so every other schema key is unset
+        stored = storage_schema.to_storage(notam_doc)
+        stored[field("seq")] = seq
+        stored[field("terms")] = text_search.index_terms(notam_doc)
+        update = {"$set": stored}
+        missing = {key: "" for key in storage_schema.STORED_KEYS if key not in stored}
+        if missing:
+            update["$unset"] = missing
+        return update
+
+    def _conditional_upsert(self, collection, notam_doc, seq):
+        """
+        Applies notam_doc (stamped with change sequence seq) unless the stored
+        version is newer. Returns False if stale.
+        """
+        update = self._update(notam_doc, seq)
+        for _ in range(2):
+            try:
+                collection.update_one(self._version_filter(notam_doc), update, upsert=True)
+                return True
+            except DuplicateKeyError:
+                # Either the stored version is newer, or another listener inserted the
+                # NOTAM between our match and our insert: retry once against its copy
+                continue
+        return False
+
+    def insert_notam(self, notam_doc):
+        """
+        Inserts or updates a NOTAM document, keyed on notam_id.
+        Only applied if its version (sequenceNumber, correctionNumber, lastUpdated)
+        is at least the stored one, and newer than the version the NOTAM was
+        removed at if it has a tombstone, so listeners consuming the same queue can
+        deliver out of order. Returns False if the document was stale.
+        The write carries the next change sequence; a NOTAMR/NOTAMC moves the
+        NOTAM it names to the tombstones. When partitioned, a NOTAM whose FIR
+        changed is removed from its previous partition.
+        """
+        with self._seq_lease():
+            current, moved = self._moved_copies(self._not_removed([notam_doc]))
+            if not current:
+                return False
+            seq = self._next_seqs(1)[0]
+            if not self._conditional_upsert(self._collection_for(notam_doc), notam_doc, seq):
+                return False
+            if self.router:
+                self._remove_moved([notam_doc], moved)
+                self.router.record_extents({notam_doc.get("fir"): [notam_doc]})
+            self._after_write([notam_doc])
+            return True
+
+    def upsert_many(self, notam_docs):
+        """
+        Bulk inserts or updates NOTAM documents in a single round trip
+        (one per FIR partition when partitioned).
+        Same version-ordered semantics as insert_notam, keyed on notam_id.
+        Returns the number of documents sent.
+        """
+        with self._seq_lease():
+            notam_docs, moved = self._moved_copies(self._not_removed(list(notam_docs)))
+            if self.router:
+                docs_by_fir = {}
+                for doc in notam_docs:
+                    docs_by_fir.setdefault(doc.get("fir"), []).append(doc)
+            else:
+                docs_by_fir = {None: notam_docs}
+            
+            count = 0
+            for fir, docs in docs_by_fir.items():
+                if not docs:
+                    continue
+                seqs = self._next_seqs(len(docs))
+                ops = [
+                    UpdateOne(self._version_filter(doc), self._update(doc, seq), upsert=True)
+                    for doc, seq in zip(docs, seqs)
+                ]
+                collection = self._collection_for(docs[0])
+                try:
+                    collection.bulk_write(ops, ordered=False)
+                except BulkWriteError as e:
+                    errors = e.details.get("writeErrors", [])
+                    if any(error["code"] != 11000 for error in errors):
+                        raise
+                    # Stale versions, or inserts racing another writer: settle those one by one
+                    for error in errors:
+                        self._conditional_upsert(collection, docs[error["index"]], seqs[error["index"]])
+                count += len(ops)
+            
+            if self.router:
+                self._remove_moved(notam_docs, moved)
+                self.router.record_extents(docs_by_fir)
+            if count:
+                self._after_write([doc for docs in docs_by_fir.values() for doc in docs])
+            return count
+
+    def _after_write(self, notam_docs):
+        # NOTAMs written again at a newer version than they were removed at are live again
+        self.tombstones.bulk_write([
+            DeleteOne({"_id": doc["notam_id"], "$or": [
+                {"version": {"$lt": doc.get("version") or ""}}, {"version": {"$exists": False}}
+            ]})
+            for doc in notam_docs
+        ], ordered=False)
+        targets = []
+        for doc, reason in change_feed.cancelling(notam_docs):
+            query = {
+                field("number"): doc["references"],
+                field("icao_location"): doc.get("icao_location"),
+                field("notam_id"): {"$ne": doc["notam_id"]},
+            }
+            targets.extend((storage_schema.from_storage(raw), reason) for raw in self._collection_for(doc).find(query))
+        removed = self._tombstone(targets)
+        self._invalidate_airport_views(list(notam_docs) + removed)
+        self._bump_data_version()
+
+    def _tombstone(self, targets):
+        """
+        Moves NOTAMs ([(readable doc, reason)]) to the tombstones, each under a new
+        change sequence. A NOTAM re-written since it was read is left alone.
+        Returns the tombstones written.
+        """
+        removed = []
+        for doc, reason in targets:
+            deleted = self._collection_for(doc).delete_one({
+                field("notam_id"): doc["notam_id"], field("version"): doc.get("version")
+            })
+            if not deleted.deleted_count:
+                continue
+            tombstone = {
+                "_id": doc["notam_id"],
+                "seq": self._next_seqs(1)[0],
+                "icao_location": doc.get("icao_location"),
+                "reason": reason,
+                "removed_at": time.time(),
+                "version": doc.get("version") or "",
+            }
+            if doc.get("location"):
+                tombstone["location"] = doc["location"]
+            self.tombstones.replace_one({"_id": doc["notam_id"]}, tombstone, upsert=True)
+            removed.append({"notam_id": tombstone.pop("_id"), **tombstone})
+        return removed
+
+    def expire_notams(self, now=None):
+        """
+        Moves NOTAMs whose end time (expires_at) has passed to the tombstones.
+        Returns the tombstones written.
+        """
+        now = time.time() if now is None else now
+        query = {field("expires_at"): {"$lt": now}}
+        if self.router:
+            raw = self.router.find(self.router.all_firs(), query)
+        else:
+            raw = self.collection.find(query)
+        with self._seq_lease():
+            removed = self._tombstone([(storage_schema.from_storage(doc), change_feed.EXPIRED) for doc in raw])
+        if removed:
+            self._invalidate_airport_views(removed)
+            self._bump_data_version()
+        return removed
+
+    def prune_tombstones(self, older_than):
+        """
+        Deletes tombstones written before the epoch time older_than. Clients that
+        last synced before the newest pruned one are told to reset. Returns the count.
+        """
+        # Leases of writers that died mid-write are ignored by get_changes; clear them out
+        self.seq_leases.delete_many({"at": {"$lt": time.time() - SEQ_LEASE_SECONDS}})
+        newest = self.tombstones.find_one({"removed_at": {"$lt": older_than}}, sort=[("seq", -1)])
+        if newest is None:
+            return 0
+        self._raise_change_floor(newest["seq"])
+        return self.tombstones.delete_many({"seq": {"$lte": newest["seq"]}}).deleted_count
+
+    def get_changes(self, since, bbox=None, limit=1000):
+        """
+        NOTAMs written and removed after change sequence `since`, optionally limited
+        to locations inside bbox [min_lon, min_lat, max_lon, max_lat], oldest first.
+        See change_feed.merge_page for the result.
+        Sequences are reserved before writing, so with several listeners a higher
+        sequence can land before a lower one; changes are only served up to the
+        lowest sequence still in flight (see _seq_lease), so none is skipped.
+        """
+        current_seq = self._committed_seq()
+        floor = self._meta_value(CHANGE_FLOOR_ID)
+        query = {field("seq"): {"$gt": since, "$lte": current_seq}}
+        tombstone_query = {"seq": {"$gt": since, "$lte": current_seq}}
+        if bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+            within = {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}
+            query[field("location")] = within
+            tombstone_query["location"] = within
+
+        if self.router:
+            firs = self.router.firs_for_bbox(bbox)
+            raw = self.router.find(firs, query, sort=(field("seq"), 1), limit=limit + 1)
+        else:
+            firs = None
+            raw = self.collection.find(query).sort(field("seq"), 1).limit(limit + 1)
+        upserted = [storage_schema.from_storage(doc) for doc in raw]
+        self._trace({"filter": query, "firs": firs})
+        removed = [
+            {"notam_id": tomb["_id"], "seq": tomb["seq"], "reason": tomb["reason"]}
+            for tomb in self.tombstones.find(tombstone_query).sort("seq", 1).limit(limit + 1)
+        ]
+        return change_feed.merge_page(since, upserted, removed, limit, current_seq, floor)
+
+    def _invalidate_airport_views(self, notam_docs):
+        # Bump the view version of every airport touched, so an in-flight refresh
+        # computed from older data cannot be saved over it
+        codes = sorted({doc["icao_location"] for doc in notam_docs if doc.get("icao_location")})
+        if codes:
+            self.airport_views.bulk_write([
+                UpdateOne({"_id": code}, {"$inc": {"version": 1}, "$unset": {"body": ""}}, upsert=True)
+                for code in codes
+            ], ordered=False)
+
+    def get_airport_view(self, icao):
+        """
+        Materialized view for an airport: {"version", "body", "count", "updated_at"},
+        body None if a write invalidated it. None if the airport was never written or viewed.
+        A single _id lookup.
+        """
+        doc = self.airport_views.find_one({"_id": icao})
+        if doc is None:
+            return None
+        return {
+            "version": doc.get("version", 0),
+            "body": doc.get("body"),
+            "count": doc.get("count"),
+            "updated_at": doc.get("updated_at"),
+        }
+
+    def save_airport_view(self, icao, version, body, count, updated_at):
+        """
+        Stores a materialized view computed at `version`. Returns False (nothing
+        saved) if a write has bumped the version since.
+        """
+        try:
+            result = self.airport_views.update_one(
+                {"_id": icao, "version": version},
+                {"$set": {"body": body, "count": count, "updated_at": updated_at}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False  # Version moved on: the upsert collided with the existing view
+        return result.matched_count == 1 or result.upserted_id is not None
+
+    def _find(self, query, bbox=None, sort=None, limit=0):
+        """
+        Runs a find over the collection, or over the FIR partitions overlapping bbox.
+        With sort (key, 1 or -1), returns at most `limit` documents in that order.
+        Returns readable documents.
+        """
+        if self.router:
+            firs = self.router.firs_for_bbox(bbox)
+            raw = self.router.find(firs, query, sort, limit)
+        else:
+            firs = None
+            raw = self.collection.find(query)
+            if sort is not None:
+                raw = raw.sort(*sort).limit(limit)
+        self._trace({"filter": query, "firs": firs})
+        return [storage_schema.from_storage(doc) for doc in raw]
+
+    def start_trace(self):
+        """
+        Starts recording the queries run by this thread, for explain_trace().
+        """
+        self._local.trace = []
+
+    def _trace(self, entry):
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.append(entry)
+
+    def explain_trace(self):
+        """
+        explain() summary for the queries recorded since start_trace(), summed over
+        queries and FIR partitions: winning-plan stages, indexes used (none means a
+        COLLSCAN), keys/docs examined and documents returned by the server.
+        Re-runs each query with executionStats, so only call it for slow or sampled queries.
+        """
+        trace = getattr(self._local, "trace", None) or []
+        stages, indexes = [], set()
+        summary = {"queries": len(trace), "keys_examined": 0, "docs_examined": 0, "returned": 0}
+        for entry in trace:
+            if entry["firs"] is None:
+                collections = [self.collection]
+            else:
+                collections = [self.router.collection_for_fir(fir) for fir in entry["firs"]]
+            for collection in collections:
+                explain = collection.find(entry["filter"]).explain()
+                _plan_stages(explain.get("queryPlanner", {}).get("winningPlan"), stages, indexes)
+                stats = explain.get("executionStats", {})
+                summary["keys_examined"] += stats.get("totalKeysExamined", 0)
+                summary["docs_examined"] += stats.get("totalDocsExamined", 0)
+                summary["returned"] += stats.get("nReturned", 0)
+        summary["indexes"] = sorted(indexes)
+        summary["stages"] = stages
+        return summary
+        
+    def search_nearby(self, lat, lon, radius_nm, filters=None, window=None):
+        """
+        Finds NOTAMs within the specified radius (in nautical miles) of the point.
+        Optional filters (e.g. from qcodes.build_filter, or category) are applied
+        in the same query, as is window (start, end) epoch seconds, keeping NOTAMs
+        active at some point in it.
+        """
+        # MongoDB $centerSphere uses radians.
+        # Radius in radians = radius_in_miles / 3963.2 (Earth radius in miles)
+        # OR radius_in_nm / 3440.06 (Earth radius in NM)
+        
+        radius_radians = radius_nm / 3440.06
+        
+        query = {
+            field("location"): {
+                "$geoWithin": {
+                    "$centerSphere": [[lon, lat], radius_radians]
+                }
+            }
+        }
+        if window is not None:
+            query["$and"] = _active_conditions(window)
+        if filters:
+            query.update(storage_schema.to_query(filters))
+        
+        results = self._find(query, radius_bbox(lat, lon, radius_nm))
+        return results
+
+    def search_by_icao(self, icao_codes, filters=None):
+        """
+        Finds NOTAMs for a set of ICAO location indicators in one query.
+        Returns {icao_code: [docs]} with an entry for every requested code.
+        """
+        codes = sorted({code.strip().upper() for code in icao_codes})
+        query = {field("icao_location"): {"$in": codes}}
+        if filters:
+            query.update(storage_schema.to_query(filters))
+        
+        results = {code: [] for code in codes}
+        for doc in self._find(query):
+            results[doc["icao_location"]].append(doc)
+        return results
+
+    def search_text(self, terms, near=None, bbox=None, window=None, filters=None, limit=0):
+        """
+        NOTAMs whose E-field contains every term (see text_search), matched on the
+        multikey terms index. Optional in the same query: near (lat, lon, radius_nm),
+        bbox and window (start, end) epoch seconds, keeping NOTAMs active at some
+        point in the window. With limit, only the `limit` most recently written.
+        Unranked.
+        """
+        query = {field("terms"): {"$all": list(terms)}}
+        area = None
+        if near is not None:
+            lat, lon, radius_nm = near
+            query[field("location")] = {"$geoWithin": {"$centerSphere": [[lon, lat], radius_nm / 3440.06]}}
+            area = radius_bbox(lat, lon, radius_nm)
+        elif bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = bbox
+            ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+            query[field("location")] = {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}
+            area = bbox
+        if window is not None:
+            query["$and"] = _active_conditions(window)
+        if filters:
+            query.update(storage_schema.to_query(filters))
+        if limit:
+            return self._find(query, area, sort=(field("seq"), -1), limit=limit)
+        return self._find(query, area)
+
+    def term_counts(self, terms):
+        """
+        ({term: number of NOTAMs containing it}, number of NOTAMs), for ranking.
+        One aggregation over the terms index; the total is the collection estimate.
+        """
+        pipeline = [
+            {"$match": {field("terms"): {"$in": list(terms)}}},
+            {"$project": {"t": {"$setIntersection": ["$" + field("terms"), list(terms)]}}},
+            {"$unwind": "$t"},
+            {"$group": {"_id": "$t", "count": {"$sum": 1}}},
+        ]
+        if self.router:
+            rows = self.router.aggregate(self.router.all_firs(), pipeline)
+            total = self.router.count()
+        else:
+            rows = self.collection.aggregate(pipeline)
+            total = self.collection.estimated_document_count()
+        counts = {}
+        for row in rows:
+            counts[row["_id"]] = counts.get(row["_id"], 0) + row["count"]
+        return counts, total
+
+    def search_corridor(self, waypoints, width_nm, fl_min=None, fl_max=None, filters=None):
+        """
+        Finds NOTAMs whose area (centre + radius) intersects a route corridor.
+        waypoints: [[lon, lat], ...]; width_nm is the full corridor width.
+        The optional flight-level band keeps NOTAMs whose lower_fl/upper_fl range
+        overlaps it; NOTAMs without limits (or with the parser's upper_fl 0 default)
+        are kept.
+        Raises ValueError for invalid routes.
+        """
+        segments = corridor.route_segments(waypoints)
+        half_width = width_nm / 2.0
+        
+        # One clause per radius band (and segment): centre within the corridor widened by that radius
+        clauses = []
+        for lower, upper in corridor.radius_bands():
+            radius_query = {}
+            if lower is not None:
+                radius_query["$gt"] = lower
+            if upper is not None:
+                radius_query["$lte"] = upper
+            band = {field("radius_nm"): radius_query}
+            
+            polygons = [corridor.buffer_segment(a, b, half_width + upper) for a, b in segments] if upper is not None else [None]
+            if None in polygons:
+                clauses.append({**band, field("location"): {"$exists": True}})
+            else:
+                clauses.extend(
+                    {**band, field("location"): {"$geoWithin": {"$geometry": polygon}}}
+                    for polygon in polygons
+                )
+        
+        conditions = [{"$or": clauses}]
+        if fl_max is not None:
+            conditions.append({"$or": [{field("lower_fl"): {"$lte": fl_max}}, {field("lower_fl"): None}]})
+        if fl_min is not None:
+            conditions.append({"$or": [
+                {field("upper_fl"): {"$gte": fl_min}}, {field("upper_fl"): 0}, {field("upper_fl"): None}
+            ]})
+        query = {"$and": conditions}
+        if filters:
+            query.update(storage_schema.to_query(filters))
+        
+        # Partition extents already include each NOTAM's radius
+        candidates = self._find(query, corridor.route_bbox(segments, half_width))
+        return [doc for doc in candidates if corridor.intersects_corridor(doc, segments, half_width)]
+
+    def search_bbox(self, min_lon, min_lat, max_lon, max_lat, filters=None):
+        """
+        Finds NOTAMs whose location lies inside the bounding box.
+        """
+        ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+        query = {
+            field("location"): {
+                "$geoWithin": {
+                    "$geometry": {"type": "Polygon", "coordinates": [ring]}
+                }
+            }
+        }
+        if filters:
+            query.update(storage_schema.to_query(filters))
+        
+        return self._find(query, [min_lon, min_lat, max_lon, max_lat])
+
+    def grid_counts(self, min_lon, min_lat, max_lon, max_lat, cell_deg, group_by=None):
+        """
+        Counts NOTAM locations per grid cell inside the bbox, in an aggregation pipeline.
+        Cells are indexed from the bbox's south-west corner: ix = floor((lon - min_lon) / cell_deg).
+        group_by: None, "category" or "fir".
+        Returns {(ix, iy, group): count} (group is None when not grouping).
+        """
+        ring = [[min_lon, min_lat], [max_lon, min_lat], [max_lon, max_lat], [min_lon, max_lat], [min_lon, min_lat]]
+        location = "$" + field("location") + ".coordinates"
+        group_id = {
+            "x": {"$floor": {"$divide": [{"$subtract": [{"$arrayElemAt": [location, 0]}, min_lon]}, cell_deg]}},
+            "y": {"$floor": {"$divide": [{"$subtract": [{"$arrayElemAt": [location, 1]}, min_lat]}, cell_deg]}},
+        }
+        if group_by:
+            group_id["g"] = "$" + field(group_by)
+        pipeline = [
+            {"$match": {field("location"): {"$geoWithin": {"$geometry": {"type": "Polygon", "coordinates": [ring]}}}}},
+            {"$group": {"_id": group_id, "count": {"$sum": 1}}},
+        ]
+        
+        if self.router:
+            firs = self.router.firs_for_bbox([min_lon, min_lat, max_lon, max_lat])
+            rows = self.router.aggregate(firs, pipeline)
+        else:
+            firs = None
+            rows = self.collection.aggregate(pipeline)
+        self._trace({"filter": pipeline[0]["$match"], "firs": firs})  # The $match decides index use
+        
+        counts = {}
+        for row in rows:
+            key = (int(row["_id"]["x"]), int(row["_id"]["y"]), row["_id"].get("g"))
+            counts[key] = counts.get(key, 0) + row["count"]
+        return counts
+
+    def get_checkpoints(self):
+        """
+        Returns snapshot load checkpoints as {source_id: {"offset", "messages", "complete"}}.
+        """
+        return {doc.pop("_id"): doc for doc in self.checkpoints.find()}
+
+    def save_checkpoint(self, source_id, offset, messages, complete=False):
+        """
+        Records how far a snapshot source has been loaded.
+        Offset is the decompressed byte offset just past the last loaded message.
+        """
+        self.checkpoints.update_one(
+            {"_id": source_id},
+            {"$set": {"offset": offset, "messages": messages, "complete": complete}},
+            upsert=True
+        )
+
+    def reset_checkpoints(self):
+        self.checkpoints.delete_many({})
+
+    def time_limit(self, seconds):
+        """
+        Context manager bounding every operation inside it (server selection
+        included) to `seconds` in total, so a down server fails fast.
+        """
+        return pymongo.timeout(seconds)
+
+    def ping(self):
+        """
+        Round trip to the server; also loads the partition catalog when partitioned.
+        """
+        self.client.admin.command("ping")
+        if self.router:
+            self.router.partitions()
+
+    def _meta_value(self, key):
+        doc = self.meta.find_one({"_id": key})
+        return doc["value"] if doc else 0
+
+    def _next_seqs(self, count):
+        # Reserves `count` consecutive change sequences
+        doc = self.meta.find_one_and_update(
+            {"_id": CHANGE_SEQ_ID}, {"$inc": {"value": count}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return list(range(doc["value"] - count + 1, doc["value"] + 1))
+
+    def _current_seq(self):
+        return self._meta_value(CHANGE_SEQ_ID)
+
+    @contextlib.contextmanager
+    def _seq_lease(self):
+        """
+        Holds a lease while the block reserves and writes change sequences. The
+        lease records the counter before any reservation, so every sequence the
+        block takes is above its floor; get_changes serves nothing past the
+        lowest floor in flight.
+        """
+        lease = self.seq_leases.insert_one({"floor": self._current_seq(), "at": time.time()}).inserted_id
+        try:
+            yield
+        finally:
+            self.seq_leases.delete_one({"_id": lease})
+
+    def _committed_seq(self):
+        # Every change at or below this has landed: the counter, held back by writes in flight.
+        # Read the counter first: a lease taken after it can only cover higher sequences
+        seq = self._current_seq()
+        oldest = self.seq_leases.find_one({"at": {"$gte": time.time() - SEQ_LEASE_SECONDS}}, sort=[("floor", 1)])
+        return min(seq, oldest["floor"]) if oldest else seq
+
+    def _raise_change_floor(self, seq):
+        # Changes at or below the floor may be missing from get_changes
+        self.meta.update_one({"_id": CHANGE_FLOOR_ID}, {"$max": {"value": seq}}, upsert=True)
+
+    def _bump_data_version(self):
+        # Never reset (not even by clear_db) so an old ETag can't match new data
+        self.meta.update_one({"_id": DATA_VERSION_ID}, {"$inc": {"value": 1}}, upsert=True)
+
+    def get_data_version(self):
+        """
+        Counter that changes whenever NOTAM data is written or cleared.
+        """
+        doc = self.meta.find_one({"_id": DATA_VERSION_ID})
+        return doc["value"] if doc else 0
+
+    def save_metrics(self, key, value):
+        """
+        Stores a small JSON-like metrics document (e.g. listener freshness) under key.
+        """
+        self.meta.update_one({"_id": f"metrics:{key}"}, {"$set": {"value": value}}, upsert=True)
+
+    def get_metrics(self, key):
+        doc = self.meta.find_one({"_id": f"metrics:{key}"})
+        return doc["value"] if doc else None
+
+    def list_metrics(self, prefix):
+        """
+        Every metrics document whose key starts with prefix (e.g. one per listener).
+        """
+        docs = self.meta.find({"_id": {"$regex": "^" + re.escape(f"metrics:{prefix}")}}).sort("_id", 1)
+        return [doc["value"] for doc in docs]
+
+    def get_count(self):
+        if self.router:
+            return self.router.count()
+        return self.collection.count_documents({})
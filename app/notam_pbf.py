@@ -0,0 +1,204 @@
+import math
+import struct
+from app.geojson_converter import GeoJsonConverter
+
+# Protobuf encoding of NOTAM features (schema: app/notam_features.proto), written
+# by hand so the API needs no protobuf runtime. Geometry comes from GeoJsonConverter,
+# so zoom/tolerance simplification matches the JSON output.
+MEDIA_TYPE = "application/x-protobuf"
+DEFAULT_PRECISION = 7  # ~1 cm; used when no tolerance is given (JSON sends full floats)
+
+# Feature string fields: (field number, document key)
+STRING_FIELDS = (
+    (1, "notam_id"), (2, "number"), (5, "category"), (6, "icao_location"), (7, "fir"),
+    (8, "start_time"), (9, "end_time"), (13, "q_code"), (14, "subject"), (15, "condition"), (16, "text"),
+)
+FLOAT_STRUCT = struct.Struct("<f")
+
+VARINT, FIXED64, LENGTH_DELIMITED, FIXED32 = 0, 1, 2, 5
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _tag(field_number, wire_type):
+    out = bytearray()
+    _write_varint(out, (field_number << 3) | wire_type)
+    return bytes(out)
+
+
+TAGS = {number: _tag(number, LENGTH_DELIMITED) for number in range(1, 17)}
+RADIUS_TAG = _tag(10, FIXED32)
+LOWER_FL_TAG = _tag(11, VARINT)
+UPPER_FL_TAG = _tag(12, VARINT)
+PRECISION_TAG = _tag(1, VARINT)
+
+
+def _write_bytes(out, tag, data):
+    out += tag
+    _write_varint(out, len(data))
+    out += data
+
+
+def _write_packed_sint(out, tag, values):
+    packed = bytearray()
+    for value in values:
+        _write_varint(packed, (value << 1) ^ (value >> 63))  # zigzag
+    _write_bytes(out, tag, packed)
+
+
+def encode_feature(notam_doc, tolerance_nm=None, scale=10 ** DEFAULT_PRECISION):
+    """
+    One NOTAM with a location -> serialized notam.Feature.
+    """
+    out = bytearray()
+    for number, key in STRING_FIELDS:
+        value = notam_doc.get(key)
+        if value:
+            _write_bytes(out, TAGS[number], str(value).encode("utf-8"))
+
+    floor = math.floor
+    lon, lat = notam_doc["location"]["coordinates"]
+    x, y = floor(lon * scale + 0.5), floor(lat * scale + 0.5)
+    _write_packed_sint(out, TAGS[3], (x, y))
+
+    geometry = GeoJsonConverter.geometry_for(notam_doc, tolerance_nm)
+    if geometry["type"] == "Polygon":
+        deltas = []
+        for p_lon, p_lat in geometry["coordinates"][0][:-1]:
+            px, py = floor(p_lon * scale + 0.5), floor(p_lat * scale + 0.5)
+            deltas.append(px - x)
+            deltas.append(py - y)
+            x, y = px, py
+        _write_packed_sint(out, TAGS[4], deltas)
+
+    radius = notam_doc.get("radius_nm")
+    if radius:
+        out += RADIUS_TAG
+        out += FLOAT_STRUCT.pack(radius)
+    for tag, key in ((LOWER_FL_TAG, "lower_fl"), (UPPER_FL_TAG, "upper_fl")):
+        value = notam_doc.get(key)
+        if value is not None:
+            out += tag
+            _write_varint(out, value & 0xFFFFFFFFFFFFFFFF)  # int32: negatives as 10-byte two's complement
+    return bytes(out)
+
+
+def encode_feature_collection(notam_docs, tolerance_nm=None):
+    """
+    NOTAM documents -> serialized notam.FeatureCollection. Like
+    GeoJsonConverter.to_feature_collection, NOTAMs without a location are skipped.
+    Coordinate precision follows the tolerance (GeoJsonConverter.precision_for).
+    """
+    precision = GeoJsonConverter.precision_for(tolerance_nm)
+    if precision is None:
+        precision = DEFAULT_PRECISION
+    scale = 10 ** precision
+
+    out = bytearray(PRECISION_TAG)
+    _write_varint(out, precision)
+    features_tag = TAGS[2]
+    for doc in notam_docs:
+        if doc.get("location"):
+            _write_bytes(out, features_tag, encode_feature(doc, tolerance_nm, scale))
+    return bytes(out)
+
+
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _iter_fields(data):
+    # Yields (field number, wire type, value); length-delimited values as memoryview slices
+    pos, end = 0, len(data)
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        number, wire_type = key >> 3, key & 0x07
+        if wire_type == VARINT:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == LENGTH_DELIMITED:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        elif wire_type == FIXED32:
+            value = data[pos:pos + 4]
+            pos += 4
+        elif wire_type == FIXED64:
+            value = data[pos:pos + 8]
+            pos += 8
+        else:
+            raise ValueError(f"Unsupported wire type {wire_type}")
+        yield number, wire_type, value
+
+
+def _unpack_sint(data):
+    values, pos = [], 0
+    while pos < len(data):
+        value, pos = _read_varint(data, pos)
+        values.append((value >> 1) ^ -(value & 1))
+    return values
+
+
+def _to_int32(value):
+    value &= 0xFFFFFFFF
+    return value - (1 << 32) if value & 0x80000000 else value
+
+
+def decode_feature_collection(data):
+    """
+    Serialized notam.FeatureCollection -> GeoJSON-shaped dict (reference decoder
+    for Python clients and tests). Properties hold the encoded core fields only.
+    """
+    data = memoryview(data)
+    precision = DEFAULT_PRECISION
+    raw_features = []
+    for number, _, value in _iter_fields(data):
+        if number == 1:
+            precision = value
+        elif number == 2:
+            raw_features.append(value)
+
+    names = dict(STRING_FIELDS)
+    scale = 10 ** precision
+    features = []
+    for raw in raw_features:
+        props, center, ring = {}, [], []
+        for number, _, value in _iter_fields(raw):
+            if number in names:
+                props[names[number]] = bytes(value).decode("utf-8")
+            elif number == 3:
+                center = _unpack_sint(value)
+            elif number == 4:
+                ring = _unpack_sint(value)
+            elif number == 10:
+                props["radius_nm"] = FLOAT_STRUCT.unpack(value)[0]
+            elif number == 11:
+                props["lower_fl"] = _to_int32(value)
+            elif number == 12:
+                props["upper_fl"] = _to_int32(value)
+
+        lon, lat = center[0] / scale, center[1] / scale
+        props["longitude"], props["latitude"] = lon, lat
+        if ring:
+            x, y = center
+            coords = []
+            for i in range(0, len(ring), 2):
+                x, y = x + ring[i], y + ring[i + 1]
+                coords.append([x / scale, y / scale])
+            coords.append(coords[0])
+            geometry = {"type": "Polygon", "coordinates": [coords]}
+        else:
+            geometry = {"type": "Point", "coordinates": [lon, lat]}
+        features.append({"type": "Feature", "geometry": geometry, "properties": props})
+    return {"type": "FeatureCollection", "features": features}
@@ -1,5 +1,6 @@
 import re
 import math
+from app import qcodes
 
 class NotamTextParser:
     """
@@ -23,36 +24,72 @@ class NotamTextParser:
         r"(?P<radius>[0-9]{3})?" # Optional Radius
     )
     
-    # NOTAM Code decoding (Partial list for common types)
-    # First letter: Subject (M=Movement Area, F=Facilities, O=Obstruction, R=Airspace)
+    # NOTAM Code decoding (full ICAO tables live in app.qcodes)
+    # First letter: Subject group (M=Movement Area, F=Facilities, O=Other, R=Airspace restrictions...)
     # Second, Third: Subject details
     # Fourth, Fifth: Condition
-    SUBJECT_CODES = {
-        'MR': 'Runway',
-        'MX': 'Taxiway',
-        'FA': 'Aerodrome',
-        'OB': 'Obstacle',
-        'RT': 'Restricted Area'
-    }
-    
-    CONDITION_CODES = {
-        'LC': 'Closed',
-        'LT': 'Limited',
-        'OG': 'Operating',
-        'AP': 'Available Prior Permission',
-        'AN': 'Available on Notice'
-    }
+    SUBJECT_CODES = qcodes.SUBJECT_CODES
+    CONDITION_CODES = qcodes.CONDITION_CODES
+
+    # ICAO field markers Q) A) B) C) D) E) F) G) and their required order
+    FIELD_RANK = {letter: rank for rank, letter in enumerate("QABCDEFG")}
+
+    # Validity field values: YYMMDDHHMM (optionally suffixed, e.g. EST) or PERM
+    VALIDITY_REGEX = re.compile(r"\s*(\d{10}|PERM)")
+
+    # Header: "A1888/25 NOTAMN", or "A3913/25 NOTAMC A3909/25" naming the NOTAM replaced/cancelled
+    HEADER_REGEX = re.compile(r"\bNOTAM([NRC])(?:\s+([A-Z]\d{4})/(\d{2})\b)?")
 
     @staticmethod
-    def parse_q_line(text):
+    def tokenize(text):
         """
-        Extracts structured data from the Q-line.
-        Returns a dictionary or None if no Q-line found.
+        Splits an ICAO-format NOTAM into its lettered fields in a single pass.
+        Returns a dict keyed by field letter ('Q', 'A', ... 'G'), plus 'header'
+        for the text before the first field (e.g. "A1888/25 NOTAMN").
+        Markers must appear in ICAO order, so a later "C)" or "F)" inside the
+        E-field text stays part of E. Text with neither a Q) field nor an A)/E)
+        pair (plain text, SNOWTAM) is not an ICAO NOTAM and is returned whole as
+        the E-field.
         """
-        match = NotamTextParser.Q_LINE_REGEX.search(text)
-        if not match:
-            return None
+        fields = {}
+        key = "header"
+        rank = -1
+        start = 0
+        
+        # Walk the ')' characters with str.find (C speed) rather than a regex scan;
+        # a marker is a field letter at the start of the text or after whitespace
+        pos = text.find(")", 1)
+        while pos != -1:
+            marker_rank = NotamTextParser.FIELD_RANK.get(text[pos - 1], -1)
+            if marker_rank > rank and (pos == 1 or text[pos - 2].isspace()):
+                fields[key] = text[start:pos - 1].strip()
+                key = text[pos - 1]
+                rank = marker_rank
+                start = pos + 1
+            pos = text.find(")", pos + 1)
             
+        fields[key] = text[start:].strip()
+        
+        if "Q" not in fields and not ("A" in fields and "E" in fields):
+            return {"header": "", "E": text.strip()}
+        return fields
+
+    @staticmethod
+    def parse_header(header):
+        """
+        Reads the NOTAM type and reference from the header (the text before Q).
+        Returns (type, reference): type is N, R or C (None if absent); reference is
+        the replaced/cancelled NOTAM's number in document form ("A3909/2025"), or None.
+        """
+        match = NotamTextParser.HEADER_REGEX.search(header or "")
+        if not match:
+            return None, None
+        notam_type, number, year = match.groups()
+        reference = f"{number}/20{year}" if number and notam_type != "N" else None
+        return notam_type, reference
+
+    @staticmethod
+    def _decode_q_match(match):
         data = match.groupdict()
         
         # Decode NOTAM Code
@@ -62,13 +99,8 @@ class NotamTextParser:
         subject_code = code[1:3] # e.g. MR
         condition_code = code[3:5] # e.g. LC
         
-        # Determine Category
-        category = "Other"
-        if subject_code == 'MR': category = "Runway"
-        elif subject_code == 'MX': category = "Taxiway"
-        elif subject_code == 'FA': category = "Aerodrome"
-        elif subject_code == 'OB': category = "Obstruction"
-        elif subject_code == 'RT': category = "Airspace"
+        # Determine Category and compact integer codes from the precomputed tables
+        decoded = qcodes.decode_q_code(code)
         
         return {
             "fir": data['fir'],
@@ -82,9 +114,34 @@ class NotamTextParser:
             "upper_fl": int(data['upper']) if data['upper'] else 0, # Default to 0 per user request
             "raw_coords": data['coords'],
             "radius_nm": int(data['radius']) if data.get('radius') else 0,
-            "category": category
+            **decoded
         }
 
+    @staticmethod
+    def parse_q_line(text):
+        """
+        Extracts structured data from the Q-line.
+        Searches free text; use parse_q_field when the text is already tokenized.
+        Returns a dictionary or None if no Q-line found.
+        """
+        match = NotamTextParser.Q_LINE_REGEX.search(text)
+        if not match:
+            return None
+        return NotamTextParser._decode_q_match(match)
+
+    @staticmethod
+    def parse_q_field(q_field):
+        """
+        Decodes the Q) field value produced by tokenize().
+        Returns a dictionary or None if missing or malformed.
+        """
+        if not q_field:
+            return None
+        match = NotamTextParser.Q_LINE_REGEX.match(q_field)
+        if not match:
+            return None
+        return NotamTextParser._decode_q_match(match)
+
     @staticmethod
     def parse_e_field(text, category):
         """
@@ -147,14 +204,42 @@ class NotamTextParser:
             
         return [lon_val, lat_val] # GeoJSON uses [Lon, Lat]
 
+    @staticmethod
+    def _convert_to_iso(dt_str):
+        if not dt_str: return None
+        if dt_str == "PERM": return None # Permanent
+        try:
+            # YYMMDDHHMM -> 20YY-MM-DDTHH:MM:00
+            year = int(dt_str[:2])
+            month = int(dt_str[2:4])
+            day = int(dt_str[4:6])
+            hour = int(dt_str[6:8])
+            minute = int(dt_str[8:10])
+            
+            # Assumption: 2000-2099
+            full_year = 2000 + year
+            return f"{full_year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:00"
+        except:
+            return None
+
+    @staticmethod
+    def _guess_missing_times(text, start_str, end_str):
+        # Fallback: Find any 10-digit sequence that looks like a date
+        # If strict B/C checks failed, try to guess from raw text
+        if not start_str or not end_str:
+            timestamps = re.findall(r"\b(\d{10})\b", text)
+            if len(timestamps) >= 1 and not start_str:
+                start_str = timestamps[0]
+            if len(timestamps) >= 2 and not end_str:
+                end_str = timestamps[1]
+        return start_str, end_str
+
     @staticmethod
     def parse_validity_times(text):
         """
         Extracts start and end validity times from text.
         Look for B) YYMMDDHHMM and C) YYMMDDHHMM, or standalone timestamps.
         """
-        import datetime
-        
         # Regex for B) and C) fields
         # B) 2512160925 C) 2512161200
         b_match = re.search(r"B\)\s*(\d{10})", text)
@@ -163,30 +248,30 @@ class NotamTextParser:
         start_str = b_match.group(1) if b_match else None
         end_str = c_match.group(1) if c_match else None
         
-        # Fallback: Find any 10-digit sequence that looks like a date
-        # If strict B/C checks failed, try to guess from raw text
-        if not start_str or not end_str:
-            timestamps = re.findall(r"\b(\d{10})\b", text)
-            if len(timestamps) >= 1 and not start_str:
-                start_str = timestamps[0]
-            if len(timestamps) >= 2 and not end_str:
-                end_str = timestamps[1]
+        start_str, end_str = NotamTextParser._guess_missing_times(text, start_str, end_str)
+        return NotamTextParser._convert_to_iso(start_str), NotamTextParser._convert_to_iso(end_str)
 
-        def convert_to_iso(dt_str):
-            if not dt_str: return None
-            if dt_str == "PERM": return None # Permanent
-            try:
-                # YYMMDDHHMM -> 20YY-MM-DDTHH:MM:00
-                year = int(dt_str[:2])
-                month = int(dt_str[2:4])
-                day = int(dt_str[4:6])
-                hour = int(dt_str[6:8])
-                minute = int(dt_str[8:10])
-                
-                # Assumption: 2000-2099
-                full_year = 2000 + year
-                return f"{full_year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:00"
-            except:
-                return None
-
-        return convert_to_iso(start_str), convert_to_iso(end_str)
+    @staticmethod
+    def parse_validity_fields(fields, text):
+        """
+        Same as parse_validity_times, but reads B) and C) from tokenize() output.
+        The guess-from-any-timestamp fallback only applies to text that is not in
+        ICAO format: a tokenized NOTAM without C) (e.g. NOTAMC) has no end time,
+        and guessing would pick up observation times from the E-field.
+        """
+        b_match = NotamTextParser.VALIDITY_REGEX.match(fields.get("B", ""))
+        c_match = NotamTextParser.VALIDITY_REGEX.match(fields.get("C", ""))
+        
+        start_str = b_match.group(1) if b_match and b_match.group(1) != "PERM" else None
+        end_str = c_match.group(1) if c_match else None
+        
+        if "Q" not in fields and "A" not in fields:
+            start_str, end_str = NotamTextParser._guess_missing_times(text, start_str, end_str)
+            return NotamTextParser._convert_to_iso(start_str), NotamTextParser._convert_to_iso(end_str)
+        
+        # Values matched VALIDITY_REGEX, so they are 10 digits (or PERM): format by slicing
+        def slice_to_iso(dt_str):
+            if not dt_str or dt_str == "PERM": return None
+            return f"20{dt_str[:2]}-{dt_str[2:4]}-{dt_str[4:6]}T{dt_str[6:8]}:{dt_str[8:10]}:00"
+        
+        return slice_to_iso(start_str), slice_to_iso(end_str)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+
+import msgpack
+
+from app import notam_text_parser, xml_parser
+
+CACHE_FILENAME = "parsed_notams.cache"
+CACHE_FORMAT = 2
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def parser_stamp():
+    """
+    Identifies the parser that produced a cache.
+    Combines the declared PARSER_VERSION with a digest of the parser sources,
+    so an un-bumped code change still invalidates stale caches.
+    """
+    digest = hashlib.sha256()
+    for module in (xml_parser, notam_text_parser):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return f"{xml_parser.PARSER_VERSION}:{digest.hexdigest()[:16]}"
+
+
+def input_digest(sources):
+    """
+    Hashes the snapshot files (as stored on disk, i.e. still compressed).
+    """
+    digest = hashlib.sha256()
+    for path in sources:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Compact msgpack cache of parsed NOTAM documents, stored next to the snapshot.
+    Documents are a plain msgpack stream so they can be streamed in and out without
+    holding the whole set in memory; a small JSON manifest beside it records the
+    cache key and is only written once the cache is complete.
+    """
+
+    def __init__(self, data_dir):
+        self.path = os.path.join(data_dir, CACHE_FILENAME)
+        self.manifest_path = self.path + ".json"
+
+    def key_for(self, sources):
+        return {"input": input_digest(sources), "parser": parser_stamp()}
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path) or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except ValueError:
+            return None
+
+    def matches(self, key):
+        """
+        True if a complete cache exists for this input and parser.
+        """
+        manifest = self.manifest()
+        return bool(manifest) and manifest.get("format") == CACHE_FORMAT and manifest.get("key") == key
+
+    def iter_docs(self):
+        """
+        Streams cached documents back in the order they were written.
+        """
+        with open(self.path, "rb") as f:
+            yield from msgpack.Unpacker(f, raw=False)
+
+    def writer(self, key):
+        return ParseCacheWriter(self, key)
+
+
+class ParseCacheWriter:
+    """
+    Writes a cache to a temp file and only publishes it on a clean close,
+    so an interrupted load never leaves a cache that looks valid.
+    """
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        self.tmp_path = cache.path + ".tmp"
+        self.count = 0
+        self.sources = {}  # Extra per-source state stored in the manifest
+        self._packer = msgpack.Packer()
+        self._file = open(self.tmp_path, "wb")
+
+    def append(self, doc):
+        self._file.write(self._packer.pack(doc))
+        self.count += 1
+
+    def commit(self):
+        self._file.close()
+        # Drop the old manifest first so a crash mid-publish leaves no valid-looking cache
+        if os.path.exists(self.cache.manifest_path):
+            os.remove(self.cache.manifest_path)
+        os.replace(self.tmp_path, self.cache.path)
+
+        manifest = {"format": CACHE_FORMAT, "key": self.key, "count": self.count, "sources": self.sources}
+        tmp_manifest = self.cache.manifest_path + ".tmp"
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, self.cache.manifest_path)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
@@ -0,0 +1,186 @@
+import heapq
+import itertools
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PARTITION_PREFIX = "notams_fir_"
+CATALOG_COLLECTION_NAME = "notam_partitions"
+UNKNOWN_FIR = "UNKN"
+QUERY_WORKERS = int(os.getenv("PARTITION_QUERY_WORKERS", "8"))
+CATALOG_TTL_SECONDS = float(os.getenv("PARTITION_CATALOG_TTL", "30"))
+
+FIR_REGEX = re.compile(r"^[A-Z0-9]{4}$")
+
+
+def normalize_fir(fir):
+    """
+    Partition key for a FIR code; anything malformed goes to the UNKN partition.
+    """
+    fir = (fir or "").strip().upper()
+    return fir if FIR_REGEX.match(fir) else UNKNOWN_FIR
+
+
+def radius_bbox(lat, lon, radius_nm):
+    """
+    Conservative [min_lon, min_lat, max_lon, max_lat] around a point.
+    Returns None when the box would wrap a pole or the antimeridian,
+    in which case callers should treat it as "everywhere".
+    """
+    dlat = radius_nm / 60.0
+    if abs(lat) + dlat >= 89.0:
+        return None
+    dlon = dlat / math.cos(math.radians(lat))
+    if lon - dlon < -180.0 or lon + dlon > 180.0:
+        return None
+    return [lon - dlon, lat - dlat, lon + dlon, lat + dlat]
+
+
+def boxes_intersect(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class PartitionRouter:
+    """
+    Stores NOTAMs in one collection per FIR and routes queries to the partitions
+    whose recorded extent overlaps the query area.
+    A small catalog collection keeps each partition's bounding box (NOTAM centres
+    expanded by their radius), cached in memory for CATALOG_TTL_SECONDS.
+    """
+
+    def __init__(self, db, ensure_indexes):
+        self.db = db
+        self.catalog = db[CATALOG_COLLECTION_NAME]
+        self.ensure_indexes = ensure_indexes  # Called once per partition collection
+        self.executor = ThreadPoolExecutor(max_workers=QUERY_WORKERS)
+        self._indexed = set()
+        self._cache = None
+        self._cache_time = 0
+
+    def collection_for_fir(self, fir):
+        name = PARTITION_PREFIX + normalize_fir(fir)
+        collection = self.db[name]
+        if name not in self._indexed:
+            self.ensure_indexes(collection)
+            self._indexed.add(name)
+        return collection
+
+    def record_extents(self, docs_by_fir):
+        """
+        Grows each partition's catalog extent to cover newly written documents.
+        docs_by_fir: {fir: [readable NOTAM docs]}
+        """
+        for fir, docs in docs_by_fir.items():
+            boxes = []
+            for doc in docs:
+                location = doc.get("location")
+                if not location:
+                    continue
+                lon, lat = location["coordinates"]
+                box = radius_bbox(lat, lon, max(doc.get("radius_nm") or 0, 0)) or [-180.0, -90.0, 180.0, 90.0]
+                boxes.append(box)
+            if not boxes:
+                continue
+
+            self.catalog.update_one(
+                {"_id": normalize_fir(fir)},
+                {
+                    "$set": {"collection": PARTITION_PREFIX + normalize_fir(fir)},
+                    "$min": {"min_lon": min(b[0] for b in boxes), "min_lat": min(b[1] for b in boxes)},
+                    "$max": {"max_lon": max(b[2] for b in boxes), "max_lat": max(b[3] for b in boxes)},
+                },
+                upsert=True
+            )
+        self._cache = None
+
+    def partitions(self):
+        """
+        Returns the catalog as {fir: extent dict}, cached briefly.
+        """
+        now = time.time()
+        if self._cache is None or now - self._cache_time > CATALOG_TTL_SECONDS:
+            self._cache = {doc["_id"]: doc for doc in self.catalog.find()}
+            self._cache_time = now
+        return self._cache
+
+    def firs_for_bbox(self, bbox):
+        """
+        FIRs whose extent overlaps bbox ([min_lon, min_lat, max_lon, max_lat]).
+        A None bbox selects every partition, including ones without an extent
+        (holding only NOTAMs without a location).
+        """
+        if bbox is None:
+            return self.all_firs()
+        selected = []
+        for fir, entry in self.partitions().items():
+            extent = [entry.get("min_lon"), entry.get("min_lat"), entry.get("max_lon"), entry.get("max_lat")]
+            if bbox is None or None in extent or boxes_intersect(bbox, extent):
+                selected.append(fir)
+        return selected
+
+    def all_firs(self):
+        """
+        Every partition collection, including ones without a catalog extent
+        (e.g. holding only NOTAMs without a location).
+        """
+        names = self.db.list_collection_names(filter={"name": {"$regex": f"^{PARTITION_PREFIX}"}})
+        return [name[len(PARTITION_PREFIX):] for name in names]
+
+    def find(self, firs, query, sort=None, limit=0, projection=None):
+        """
+        Runs the same query on each partition concurrently and merges the results.
+        With sort (key, 1 or -1), each partition returns at most `limit` documents
+        in that order and the sorted runs are merged, so only the overall first
+        `limit` are returned.
+        """
+        def run(fir):
+            cursor = self.collection_for_fir(fir).find(query, projection)
+            if sort is not None:
+                cursor = cursor.sort(*sort).limit(limit)
+            return list(cursor)
+
+        if len(firs) == 1:
+            return run(firs[0])
+
+        partials = list(self.executor.map(run, firs))
+        if sort is not None:
+            key, direction = sort
+            merged = heapq.merge(*partials, key=lambda doc: doc[key], reverse=direction < 0)
+            return list(itertools.islice(merged, limit)) if limit else list(merged)
+
+        results = []
+        for partial in partials:
+            results.extend(partial)
+        return results
+
+    def aggregate(self, firs, pipeline):
+        """
+        Runs the same aggregation pipeline on each partition concurrently and
+        concatenates the outputs (callers merge partial groups).
+        """
+        def run(fir):
+            return list(self.collection_for_fir(fir).aggregate(pipeline))
+
+        results = []
+        for partial in self.executor.map(run, firs):
+            results.extend(partial)
+        return results
+
+    def count(self):
+        return sum(self.collection_for_fir(fir).estimated_document_count() for fir in self.all_firs())
+
+    def drop_partition(self, fir):
+        fir = normalize_fir(fir)
+        self.db[PARTITION_PREFIX + fir].drop()
+        self.catalog.delete_one({"_id": fir})
+        self._indexed.discard(PARTITION_PREFIX + fir)
+        self._cache = None
+
+    def drop_all(self):
+        for fir in self.all_firs():
+            self.db[PARTITION_PREFIX + fir].drop()
+        self.catalog.drop()
+        self._indexed.clear()
+        self._cache = None
@@ -0,0 +1,440 @@
+# ICAO NOTAM code (Q-code) decode tables, per ICAO Doc 8126 / PANS-ABC.
+#
+# A Q-code is Q + 2-letter subject + 2-letter condition, e.g. QMRLC = Runway / Closed.
+# The first subject letter is the subject group (L = lighting, N = navaids, ...).
+#
+# Codes are stored as small integers derived directly from the letters, so they are
+# compact, indexable and stable even when these tables grow:
+#     group     = letter index (A=1 .. Z=26)
+#     subject   = first * 32 + second   (e.g. MR -> 13 * 32 + 18 = 434)
+#     condition = first * 32 + second
+
+SUBJECT_GROUPS = {
+    'A': "Airspace organization",
+    'C': "Communications and surveillance",
+    'F': "Facilities and services",
+    'G': "GNSS services",
+    'I': "Instrument and microwave landing systems",
+    'K': "Checklist",
+    'L': "Lighting facilities",
+    'M': "Movement and landing area",
+    'N': "Terminal and en-route navigation facilities",
+    'O': "Other information",
+    'P': "Air traffic procedures",
+    'R': "Airspace restrictions",
+    'S': "Air traffic and VOLMET services",
+    'T': "Trigger NOTAM",
+    'W': "Navigation warnings",
+    'X': "Other",
+}
+
+# Short family names accepted by the API in place of the group letter
+SUBJECT_GROUP_ALIASES = {
+    'airspace': 'A',
+    'comms': 'C',
+    'facilities': 'F',
+    'gnss': 'G',
+    'ils': 'I',
+    'checklist': 'K',
+    'lighting': 'L',
+    'movement': 'M',
+    'navaid': 'N',
+    'other_info': 'O',
+    'procedures': 'P',
+    'restrictions': 'R',
+    'ats': 'S',
+    'trigger': 'T',
+    'warnings': 'W',
+    'other': 'X',
+}
+
+SUBJECT_CODES = {
+    # Airspace organization
+    'AA': "Minimum altitude",
+    'AC': "Class B, C, D or E surface area / control zone",
+    'AD': "Air defense identification zone",
+    'AE': "Control area",
+    'AF': "Flight information region",
+    'AH': "Upper control area",
+    'AL': "Minimum usable flight level",
+    'AN': "Area navigation route",
+    'AO': "Oceanic control area",
+    'AP': "Reporting point",
+    'AR': "ATS route",
+    'AT': "Terminal control area",
+    'AU': "Upper flight information region",
+    'AV': "Upper advisory area",
+    'AX': "Significant point",
+    'AZ': "Aerodrome traffic zone",
+    # Communications and surveillance
+    'CA': "Air/ground facility",
+    'CB': "ADS-B",
+    'CC': "ADS-C",
+    'CD': "CPDLC",
+    'CE': "En-route surveillance radar",
+    'CG': "Ground controlled approach system",
+    'CL': "SELCAL",
+    'CM': "Surface movement radar",
+    'CP': "Precision approach radar",
+    'CR': "Surveillance radar element of PAR",
+    'CS': "Secondary surveillance radar",
+    'CT': "Terminal area surveillance radar",
+    # Facilities and services
+    'FA': "Aerodrome",
+    'FB': "Friction measuring device",
+    'FC': "Ceiling measurement equipment",
+    'FD': "Docking system",
+    'FE': "Oxygen",
+    'FF': "Fire fighting and rescue",
+    'FG': "Ground movement control",
+    'FH': "Helicopter alighting area/platform",
+    'FI': "Aircraft de-icing",
+    'FJ': "Oils",
+    'FL': "Landing direction indicator",
+    'FM': "Meteorological service",
+    'FO': "Fog dispersal system",
+    'FP': "Heliport",
+    'FS': "Snow removal equipment",
+    'FT': "Transmissometer",
+    'FU': "Fuel availability",
+    'FW': "Wind direction indicator",
+    'FZ': "Customs/immigration",
+    # GNSS services
+    'GA': "GNSS airfield-specific operations",
+    'GW': "GNSS area-wide operations",
+    # Instrument and microwave landing systems
+    'IC': "Instrument landing system",
+    'ID': "DME associated with ILS",
+    'IG': "Glide path (ILS)",
+    'II': "Inner marker (ILS)",
+    'IL': "Localizer (ILS)",
+    'IM': "Middle marker (ILS)",
+    'IN': "Localizer (not associated with ILS)",
+    'IO': "Outer marker (ILS)",
+    'IS': "ILS category I",
+    'IT': "ILS category II",
+    'IU': "ILS category III",
+    'IW': "Microwave landing system",
+    'IX': "Locator, outer (ILS)",
+    'IY': "Locator, middle (ILS)",
+    # Checklist
+    'KK': "Checklist",
+    # Lighting facilities
+    'LA': "Approach lighting system",
+    'LB': "Aerodrome beacon",
+    'LC': "Runway centre line lights",
+    'LD': "Landing direction indicator lights",
+    'LE': "Runway edge lights",
+    'LF': "Sequenced flashing lights",
+    'LG': "Pilot-controlled lighting",
+    'LH': "High intensity runway lights",
+    'LI': "Runway end identifier lights",
+    'LJ': "Runway alignment indicator lights",
+    'LK': "Category II components of approach lighting system",
+    'LL': "Low intensity runway lights",
+    'LM': "Medium intensity runway lights",
+    'LP': "Precision approach path indicator",
+    'LR': "All landing area lighting facilities",
+    'LS': "Stopway lights",
+    'LT': "Threshold lights",
+    'LU': "Helicopter approach path indicator",
+    'LV': "Visual approach slope indicator system",
+    'LW': "Heliport lighting",
+    'LX': "Taxiway centre line lights",
+    'LY': "Taxiway edge lights",
+    'LZ': "Runway touchdown zone lights",
+    # Movement and landing area
+    'MA': "Movement area",
+    'MB': "Bearing strength",
+    'MC': "Clearway",
+    'MD': "Declared distances",
+    'MG': "Taxiing guidance system",
+    'MH': "Runway arresting gear",
+    'MK': "Parking area",
+    'MM': "Daylight markings",
+    'MN': "Apron",
+    'MO': "Stopbar",
+    'MP': "Aircraft stands",
+    'MR': "Runway",
+    'MS': "Stopway",
+    'MT': "Threshold",
+    'MU': "Runway turning bay",
+    'MW': "Strip/shoulder",
+    'MX': "Taxiway",
+    'MY': "Rapid exit taxiway",
+    # Terminal and en-route navigation facilities
+    'NA': "All radio navigation facilities",
+    'NB': "Non-directional radio beacon",
+    'NC': "DECCA",
+    'ND': "DME",
+    'NF': "Fan marker",
+    'NL': "Locator",
+    'NM': "VOR/DME",
+    'NN': "TACAN",
+    'NO': "OMEGA",
+    'NT': "VORTAC",
+    'NV': "VOR",
+    'NX': "Direction finding station",
+    # Other information
+    'OA': "Aeronautical information service",
+    'OB': "Obstacle",
+    'OE': "Aircraft entry requirements",
+    'OL': "Obstacle lights",
+    'OR': "Rescue coordination centre",
+    # Air traffic procedures
+    'PA': "Standard instrument arrival",
+    'PB': "Standard VFR arrival",
+    'PC': "Contingency procedures",
+    'PD': "Standard instrument departure",
+    'PE': "Standard VFR departure",
+    'PF': "Flow control procedure",
+    'PH': "Holding procedure",
+    'PI': "Instrument approach procedure",
+    'PK': "VFR approach procedure",
+    'PL': "Flight plan processing",
+    'PM': "Aerodrome operating minima",
+    'PN': "Noise operating restriction",
+    'PO': "Obstacle clearance altitude and height",
+    'PR': "Radio failure procedures",
+    'PT': "Transition altitude or transition level",
+    'PU': "Missed approach procedure",
+    'PX': "Minimum holding altitude",
+    'PZ': "ADIZ procedure",
+    # Airspace restrictions
+    'RA': "Airspace reservation",
+    'RD': "Danger area",
+    'RM': "Military operating area",
+    'RO': "Overflying",
+    'RP': "Prohibited area",
+    'RR': "Restricted area",
+    'RT': "Temporary restricted area",
+    # Air traffic and VOLMET services
+    'SA': "Automatic terminal information service",
+    'SB': "ATS reporting office",
+    'SC': "Area control centre",
+    'SE': "Flight information service",
+    'SF': "Aerodrome flight information service",
+    'SL': "Flow control centre",
+    'SO': "Oceanic area control centre",
+    'SP': "Approach control service",
+    'SS': "Flight service station",
+    'ST': "Aerodrome control tower",
+    'SU': "Upper area control centre",
+    'SV': "VOLMET broadcast",
+    'SY': "Upper advisory service",
+    # Trigger NOTAM
+    'TT': "Trigger NOTAM",
+    # Navigation warnings
+    'WA': "Air display",
+    'WB': "Aerobatics",
+    'WC': "Captive balloon or kite",
+    'WD': "Demolition of explosives",
+    'WE': "Exercises",
+    'WF': "Air refueling",
+    'WG': "Glider flying",
+    'WH': "Blasting",
+    'WJ': "Banner/target towing",
+    'WL': "Ascent of free balloon",
+    'WM': "Missile, gun or rocket firing",
+    'WP': "Parachute jumping exercise",
+    'WR': "Radioactive materials or toxic chemicals",
+    'WS': "Burning or blowing gas",
+    'WT': "Mass movement of aircraft",
+    'WU': "Unmanned aircraft",
+    'WV': "Formation flight",
+    'WW': "Significant volcanic activity",
+    'WY': "Aerial survey",
+    'WZ': "Model flying",
+    # Plain language
+    'XX': "Plain language",
+}
+
+CONDITION_GROUPS = {
+    'A': "Availability",
+    'C': "Changes",
+    'H': "Hazard conditions",
+    'K': "Checklist",
+    'L': "Limitations",
+    'T': "Trigger NOTAM",
+    'X': "Other",
+}
+
+CONDITION_CODES = {
+    # Availability
+    'AC': "Withdrawn for maintenance",
+    'AD': "Available for daylight operation",
+    'AF': "Flight checked and found reliable",
+    'AG': "Operating but ground checked only",
+    'AH': "Hours of service are now",
+    'AK': "Resumed normal operation",
+    'AL': "Operative subject to previously published limitations",
+    'AM': "Military operations only",
+    'AN': "Available for night operation",
+    'AO': "Operational",
+    'AP': "Available, prior permission required",
+    'AR': "Available on request",
+    'AS': "Unserviceable",
+    'AU': "Not available",
+    'AW': "Completely withdrawn",
+    'AX': "Previously promulgated shutdown cancelled",
+    # Changes
+    'CA': "Activated",
+    'CC': "Completed",
+    'CD': "Deactivated",
+    'CE': "Erected",
+    'CF': "Operating frequency changed",
+    'CG': "Downgraded",
+    'CH': "Changed",
+    'CI': "Identification or radio call sign changed",
+    'CL': "Realigned",
+    'CM': "Displaced",
+    'CN': "Cancelled",
+    'CO': "Operating",
+    'CP': "Operating on reduced power",
+    'CR': "Temporarily replaced",
+    'CS': "Installed",
+    'CT': "On test, do not use",
+    # Hazard conditions
+    'HA': "Braking action is",
+    'HB': "Friction coefficient is",
+    'HC': "Covered by compacted snow",
+    'HD': "Covered by dry snow",
+    'HE': "Covered by water",
+    'HF': "Totally free of snow and ice",
+    'HG': "Grass cutting in progress",
+    'HH': "Hazard due to",
+    'HI': "Covered by ice",
+    'HJ': "Launch planned",
+    'HK': "Bird migration in progress",
+    'HL': "Snow clearance completed",
+    'HM': "Marked by",
+    'HN': "Covered by wet snow or slush",
+    'HO': "Obscured by snow",
+    'HP': "Snow clearance in progress",
+    'HQ': "Operation cancelled",
+    'HR': "Standing water",
+    'HS': "Sanding in progress",
+    'HT': "Approach according to signal area only",
+    'HU': "Launch in progress",
+    'HV': "Work completed",
+    'HW': "Work in progress",
+    'HX': "Concentration of birds",
+    'HY': "Snow banks exist",
+    'HZ': "Covered by frozen ruts and ridges",
+    # Checklist
+    'KK': "Checklist",
+    # Limitations
+    'LA': "Operating on auxiliary power supply",
+    'LB': "Reserved for aircraft based therein",
+    'LC': "Closed",
+    'LD': "Unsafe",
+    'LE': "Operating without auxiliary power supply",
+    'LF': "Interference from",
+    'LG': "Operating without identification",
+    'LH': "Unserviceable for aircraft heavier than",
+    'LI': "Closed to IFR operations",
+    'LK': "Operating as a fixed light",
+    'LL': "Usable for length and width",
+    'LN': "Closed to all night operations",
+    'LP': "Prohibited to",
+    'LR': "Aircraft restricted to runways and taxiways",
+    'LS': "Subject to interruption",
+    'LT': "Limited to",
+    'LV': "Closed to VFR operations",
+    'LW': "Will take place",
+    'LX': "Operating but caution advised",
+    # Trigger NOTAM
+    'TT': "Trigger NOTAM",
+    # Plain language
+    'XX': "Plain language",
+}
+
+# Legacy coarse categories (kept for existing clients and E-field parsing)
+SUBJECT_CATEGORIES = {
+    'MR': "Runway",
+    'MX': "Taxiway",
+    'FA': "Aerodrome",
+    'OB': "Obstruction",
+    'RT': "Airspace",
+}
+
+
+def encode_letter(letter):
+    """
+    A=1 .. Z=26; 0 for anything else.
+    """
+    if len(letter) == 1 and 'A' <= letter <= 'Z':
+        return ord(letter) - 64
+    return 0
+
+
+def encode_pair(pair):
+    """
+    Two-letter subject/condition code -> compact integer (0 if malformed).
+    """
+    if len(pair) != 2:
+        return 0
+    first, second = encode_letter(pair[0]), encode_letter(pair[1])
+    if not first or not second:
+        return 0
+    return first * 32 + second
+
+
+def decode_pair(value):
+    """
+    Inverse of encode_pair.
+    """
+    if not value:
+        return None
+    return chr(value // 32 + 64) + chr(value % 32 + 64)
+
+
+# Precomputed decode tables keyed by the stored integers
+SUBJECT_NAMES_BY_ID = {encode_pair(code): name for code, name in SUBJECT_CODES.items()}
+CONDITION_NAMES_BY_ID = {encode_pair(code): name for code, name in CONDITION_CODES.items()}
+
+
+def decode_q_code(code):
+    """
+    Decodes a 5-letter Q-code (e.g. QMRLC) into names and integer codes.
+    Unknown subjects/conditions keep their integer code with a None name.
+    """
+    subject_code = code[1:3]
+    condition_code = code[3:5]
+    return {
+        "q_group": encode_letter(subject_code[:1]),
+        "q_subject": encode_pair(subject_code),
+        "q_condition": encode_pair(condition_code),
+        "subject_group": SUBJECT_GROUPS.get(subject_code[:1]),
+        "subject": SUBJECT_CODES.get(subject_code),
+        "condition": CONDITION_CODES.get(condition_code),
+        "category": SUBJECT_CATEGORIES.get(subject_code, "Other"),
+    }
+
+
+def build_filter(q_group=None, subject=None, condition=None):
+    """
+    Turns API Q-code filter parameters into an indexed query on the integer fields.
+    q_group accepts a group letter (e.g. 'L') or family alias (e.g. 'lighting');
+    subject and condition accept 2-letter codes (e.g. 'MR', 'LC').
+    Raises ValueError on unknown values.
+    """
+    query = {}
+
+    if q_group:
+        letter = SUBJECT_GROUP_ALIASES.get(q_group.lower(), q_group.upper())
+        if letter not in SUBJECT_GROUPS:
+            raise ValueError(f"Unknown Q-code subject group '{q_group}'")
+        query["q_group"] = encode_letter(letter)
+
+    if subject:
+        if subject.upper() not in SUBJECT_CODES:
+            raise ValueError(f"Unknown Q-code subject '{subject}'")
+        query["q_subject"] = encode_pair(subject.upper())
+
+    if condition:
+        if condition.upper() not in CONDITION_CODES:
+            raise ValueError(f"Unknown Q-code condition '{condition}'")
+        query["q_condition"] = encode_pair(condition.upper())
+
+    return query
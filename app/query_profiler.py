@@ -0,0 +1,113 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+# Query timing for DBManager: every search is timed, and slow (or randomly sampled)
+# queries get an explain() summary from the backend, kept for /api/admin/query-plans
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+QUERY_PLAN_SAMPLE_RATE = float(os.getenv("QUERY_PLAN_SAMPLE_RATE", "0.01"))  # Fraction of fast queries explained too
+QUERY_PLAN_HISTORY = int(os.getenv("QUERY_PLAN_HISTORY", "200"))  # Captured plans kept in memory
+
+logger = logging.getLogger(__name__)
+
+
+def result_count(result):
+    # Search results are lists, {icao: [docs]} or {cell: count}
+    if isinstance(result, dict):
+        return sum(len(value) if isinstance(value, list) else 1 for value in result.values())
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+class QueryProfiler:
+    """
+    Times queries run through DBManager. Keeps per-query totals, logs queries
+    slower than threshold_ms with their parameters and plan summary, and keeps
+    the last `history` captured plans (slow ones plus a sample_rate sample).
+    """
+
+    def __init__(self, threshold_ms=SLOW_QUERY_MS, sample_rate=QUERY_PLAN_SAMPLE_RATE, history=QUERY_PLAN_HISTORY):
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.plans = deque(maxlen=history)
+
+    def run(self, storage, name, params, call):
+        """
+        Runs call() (a query against storage), timing it and capturing the plan
+        if it was slow or sampled. Returns call()'s result.
+        """
+        tracing = hasattr(storage, "start_trace")
+        if tracing:
+            storage.start_trace()
+        started = time.perf_counter()
+        result = call()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        slow = elapsed_ms >= self.threshold_ms
+        with self._lock:
+            stat = self.stats.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "slow": 0})
+            stat["count"] += 1
+            stat["total_ms"] += elapsed_ms
+            stat["max_ms"] = max(stat["max_ms"], elapsed_ms)
+            stat["slow"] += slow
+
+        if tracing and (slow or random.random() < self.sample_rate):
+            self._capture(storage, name, params, result, elapsed_ms, slow)
+        return result
+
+    def _capture(self, storage, name, params, result, elapsed_ms, slow):
+        try:
+            plan = storage.explain_trace()
+        except Exception as e:
+            plan = {"error": f"{type(e).__name__}: {e}"}
+        entry = {
+            "query": name,
+            "params": params,
+            "ms": round(elapsed_ms, 1),
+            "at": time.time(),
+            "slow": slow,
+            "returned": result_count(result),  # After any in-process filtering; compare with plan["returned"]
+            "plan": plan,
+        }
+        with self._lock:
+            self.plans.append(entry)
+        if slow:
+            logger.warning("Slow query", extra={
+                "query": name,
+                "ms": entry["ms"],
+                "params": params,
+                "returned": entry["returned"],
+                "indexes": plan.get("indexes"),
+                "keys_examined": plan.get("keys_examined"),
+                "docs_examined": plan.get("docs_examined"),
+                "db_returned": plan.get("returned"),
+            })
+
+    def report(self):
+        """
+        Per-query totals and captured plans (newest first), JSON-serializable.
+        """
+        with self._lock:
+            stats = {
+                name: {
+                    "count": stat["count"],
+                    "mean_ms": round(stat["total_ms"] / stat["count"], 2),
+                    "max_ms": round(stat["max_ms"], 1),
+                    "slow": stat["slow"],
+                }
+                for name, stat in self.stats.items()
+            }
+            plans = list(reversed(self.plans))
+        return {
+            "threshold_ms": self.threshold_ms,
+            "sample_rate": self.sample_rate,
+            "stats": stats,
+            "plans": plans,
+        }
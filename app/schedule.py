@@ -0,0 +1,229 @@
+import calendar
+import re
+import time
+
+# Expansion of the D) field (the schedule within the B)-C) validity) into concrete
+# UTC intervals, done once by the parser and stored as "active_intervals". Storage
+# indexes the intervals, so "active at T / during a window" is an indexed range
+# check instead of every client re-reading the schedule text.
+#
+# Understood: weekdays and weekday ranges (MON-FRI), DAILY/DLY, dates and date
+# ranges with optional month and year (2025 DEC 21-30, 31-2026 JAN 09), time
+# ranges (1200-2000, 2300/0815 overnight), H24 and EXC exclusions. Anything else
+# (SR/SS, HJ, free text) is left unexpanded: the NOTAM then counts as active for
+# its whole validity, as before.
+MAX_INTERVAL_SECONDS = 86400  # Longer runs are split, bounding the index range scan
+MAX_EXPANSION_DAYS = 366  # Longer (or open-ended) validities are not expanded
+DAY_SECONDS = 86400
+
+WEEKDAYS = ("MON", "TUE", "WED", "THU", "FRI", "SAT", "SUN")  # time.gmtime tm_wday order
+MONTHS = ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC")
+
+TOKEN_REGEX = re.compile(r"(\d{4})\s*[-/]\s*(\d{4})|([A-Z0-9]+)|(-)|(,)|(\S)")
+
+
+def _tokenize(text):
+    tokens = []
+    for match in TOKEN_REGEX.finditer(text.upper()):
+        time_from, time_to, word, dash, comma, other = match.groups()
+        if time_from:
+            tokens.append(("time", (_minutes(time_from), _minutes(time_to))))
+        elif word:
+            if word in WEEKDAYS:
+                tokens.append(("weekday", WEEKDAYS.index(word)))
+            elif word in MONTHS:
+                tokens.append(("month", MONTHS.index(word) + 1))
+            elif word.isdigit():
+                tokens.append(("number", int(word)))
+            elif word in ("DAILY", "DLY"):
+                tokens.append(("daily", None))
+            elif word in ("H24", "EXC", "AND"):
+                tokens.append((word.lower(), None))
+            else:
+                raise ValueError(f"unsupported schedule word {word}")
+        elif dash:
+            tokens.append(("dash", None))
+        elif comma:
+            tokens.append(("comma", None))
+        else:
+            raise ValueError(f"unsupported schedule character {other}")
+    return tokens
+
+
+def _minutes(hhmm):
+    hours, minutes = int(hhmm[:2]), int(hhmm[2:])
+    if hours > 24 or minutes > 59 or (hours == 24 and minutes):
+        raise ValueError(f"invalid time {hhmm}")
+    return hours * 60 + minutes
+
+
+def _date_range(first, last):
+    """
+    Every (year, month, day) from first to last, inclusive.
+    """
+    start = calendar.timegm((*first, 0, 0, 0))
+    end = calendar.timegm((*last, 0, 0, 0))
+    if end < start or end - start > MAX_EXPANSION_DAYS * DAY_SECONDS:
+        raise ValueError("invalid date range")
+    return {time.gmtime(day)[:3] for day in range(start, end + 1, DAY_SECONDS)}
+
+
+def _new_clause():
+    return {"dates": set(), "weekdays": set(), "exc_dates": set(), "exc_weekdays": set(), "times": []}
+
+
+def parse(text, year, month):
+    """
+    D-field text -> clauses, each {dates, weekdays, exc_dates, exc_weekdays, times}
+    (empty selector sets match every day; times are (start, end) minutes of the
+    day, end <= start running past midnight). year/month apply to dates until the
+    text names others. Raises ValueError for schedules that are not understood.
+    """
+    tokens = _tokenize(text)
+    clauses = [_new_clause()]
+    excluding = False
+    i = 0
+
+    def peek(offset=0):
+        return tokens[i + offset][0] if i + offset < len(tokens) else None
+
+    def selector():
+        # A day selector after the times of a clause starts the next clause, unless it follows EXC
+        if clauses[-1]["times"] and not excluding:
+            clauses.append(_new_clause())
+        return clauses[-1]
+
+    def read_month_year():
+        # [YYYY] [MON] before a day; a month earlier than the last one without a year rolls over
+        nonlocal i, year, month
+        if peek() == "number" and tokens[i][1] >= 1900 and peek(1) == "month":
+            year = tokens[i][1]
+            i += 1
+            month = None
+        if peek() == "month":
+            if month is not None and tokens[i][1] < month:
+                year += 1
+            month = tokens[i][1]
+            i += 1
+
+    while i < len(tokens):
+        kind, value = tokens[i]
+        if kind in ("number", "month"):
+            clause = selector()
+            read_month_year()
+            if peek() != "number":
+                raise ValueError("month without a day")
+            if month is None:
+                raise ValueError("year without a month")
+            first = (year, month, tokens[i][1])
+            i += 1
+            days = {first}
+            if peek() == "dash":
+                i += 1
+                start_month = month
+                read_month_year()
+                if peek() != "number":
+                    raise ValueError("unterminated date range")
+                if month == start_month and tokens[i][1] < first[2]:
+                    year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+                days = _date_range(first, (year, month, tokens[i][1]))
+                i += 1
+            else:
+                if not 1 <= first[2] <= calendar.monthrange(year, month)[1]:
+                    raise ValueError("invalid date")
+            (clause["exc_dates"] if excluding else clause["dates"]).update(days)
+            continue
+        if kind == "weekday":
+            clause = selector()
+            days = {value}
+            if peek(1) == "dash" and peek(2) == "weekday":
+                last = tokens[i + 2][1]
+                days = {(value + offset) % 7 for offset in range((last - value) % 7 + 1)}
+                i += 2
+            (clause["exc_weekdays"] if excluding else clause["weekdays"]).update(days)
+        elif kind == "daily":
+            selector()
+        elif kind in ("time", "h24"):
+            clauses[-1]["times"].append(value if kind == "time" else (0, 24 * 60))
+            excluding = False
+        elif kind == "exc":
+            excluding = True
+        elif kind == "comma":
+            if clauses[-1]["times"]:
+                clauses.append(_new_clause())
+                excluding = False
+        elif kind != "and":
+            raise ValueError("unexpected schedule token")
+        i += 1
+
+    clauses = [clause for clause in clauses if clause != _new_clause()]
+    if not clauses:
+        raise ValueError("empty schedule")
+    if len(clauses) > 1 and not clauses[-1]["times"]:
+        # "1200-2000 MON-FRI": days after the times are ambiguous, not a second H24 clause
+        raise ValueError("day selector without times")
+    for clause in clauses:
+        if not clause["times"]:
+            clause["times"] = [(0, 24 * 60)]  # Days without hours: the whole day
+    return clauses
+
+
+def _matches(clause, date, weekday):
+    return (
+        (not clause["dates"] or date in clause["dates"])
+        and (not clause["weekdays"] or weekday in clause["weekdays"])
+        and date not in clause["exc_dates"]
+        and weekday not in clause["exc_weekdays"]
+    )
+
+
+def expand(text, starts_at, expires_at):
+    """
+    Concrete UTC active intervals [[start, end], ...] (epoch seconds, sorted,
+    merged, none longer than MAX_INTERVAL_SECONDS) of a D-field schedule within
+    starts_at..expires_at. None when there is nothing to expand: no schedule,
+    an open-ended or very long validity, or a schedule that is not understood.
+    """
+    if not text or starts_at is None or expires_at is None:
+        return None
+    if expires_at <= starts_at or expires_at - starts_at > MAX_EXPANSION_DAYS * DAY_SECONDS:
+        return None
+    start_date = time.gmtime(starts_at)
+    try:
+        clauses = parse(text, start_date.tm_year, start_date.tm_mon)
+    except ValueError:
+        return None
+
+    # From the day before the start, for overnight times running into it
+    intervals = []
+    first_day = int(starts_at // DAY_SECONDS) * DAY_SECONDS - DAY_SECONDS
+    for day in range(first_day, int(expires_at) + 1, DAY_SECONDS):
+        date = time.gmtime(day)
+        for clause in clauses:
+            if not _matches(clause, date[:3], date.tm_wday):
+                continue
+            for start_minute, end_minute in clause["times"]:
+                start = day + start_minute * 60
+                end = day + end_minute * 60 + (DAY_SECONDS if end_minute <= start_minute else 0)
+                start, end = max(start, starts_at), min(end, expires_at)
+                if end > start:
+                    intervals.append([start, end])
+    if not intervals:
+        return None
+
+    intervals.sort()
+    merged = [intervals[0]]
+    for start, end in intervals[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+
+    result = []
+    for start, end in merged:
+        while end - start > MAX_INTERVAL_SECONDS:
+            result.append([start, start + MAX_INTERVAL_SECONDS])
+            start += MAX_INTERVAL_SECONDS
+        result.append([start, end])
+    return result
+
@@ -0,0 +1,283 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import time
+
+try:
+    import zstandard
+except ImportError:  # Optional: only needed for SNAPSHOT_COMPRESSION=zstd
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Capture Settings
+SNAPSHOT_BASENAME = "raw_notam_dump"
+INDEX_FILENAME = "snapshot_index.json"
+LEGACY_FILENAME = "raw_notam_dump.xml"
+SNAPSHOT_COMPRESSION = os.getenv("SNAPSHOT_COMPRESSION", "gzip")  # gzip | zstd | none
+SEGMENT_MAX_BYTES = int(os.getenv("SNAPSHOT_SEGMENT_MB", "64")) * 1024 * 1024  # Uncompressed bytes per segment
+WRITE_BUFFER_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+SOURCE_ID_HEAD_BYTES = 1024  # Enough to cover the first message id of a legacy dump
+
+EXTENSIONS = {"gzip": ".xml.gz", "zstd": ".xml.zst", "none": ".xml"}
+
+SNAPSHOT_HEADER = b"<FNS_Snapshot>\n"
+SNAPSHOT_FOOTER = b"</FNS_Snapshot>\n"
+
+# Message boundaries inside a segment (default namespace or prefixed root)
+MESSAGE_START_REGEX = re.compile(rb"<(?:[\w.-]+:)?AIXMBasicMessage\b")
+MESSAGE_END_REGEX = re.compile(rb"</(?:[\w.-]+:)?AIXMBasicMessage\s*>")
+
+# Raised when a compressed segment ends mid-stream (capture killed before the
+# compressor flushed its trailer)
+TRUNCATED_STREAM_ERRORS = (EOFError,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+
+def _open_compressed_writer(path, compression):
+    """
+    Opens a binary write handle for a segment, compressing on the fly.
+    """
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("SNAPSHOT_COMPRESSION=zstd requires the 'zstandard' package")
+        raw = open(path, "wb")
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=True)
+    return open(path, "wb")
+
+
+def open_segment(path):
+    """
+    Opens a snapshot segment (or legacy dump) as a decompressed binary stream.
+    Compression is detected from the file extension.
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError(f"Reading {path} requires the 'zstandard' package")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def load_index(data_dir):
+    """
+    Returns the segment index for a capture directory, or None if there is none.
+    """
+    index_path = os.path.join(data_dir, INDEX_FILENAME)
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_index(data_dir, index):
+    # Write-then-rename so readers never see a half-written index
+    index_path = os.path.join(data_dir, INDEX_FILENAME)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+    os.replace(tmp_path, index_path)
+
+
+def list_sources(data_dir):
+    """
+    Returns the snapshot files to load, in capture order.
+    Prefers indexed segments; falls back to the legacy single XML dump.
+    """
+    index = load_index(data_dir)
+    if index:
+        return [os.path.join(data_dir, seg["file"]) for seg in index["segments"]]
+
+    for candidate in (os.path.join(data_dir, LEGACY_FILENAME), LEGACY_FILENAME):
+        if os.path.exists(candidate):
+            return [candidate]
+    return []
+
+
+def _source_id(path, created=None):
+    # Stable identity for checkpoints: a re-captured segment reusing the same
+    # filename gets a new id because its creation stamp (or, for the unindexed
+    # legacy dump, its leading bytes) differ
+    digest = hashlib.sha1(os.path.basename(path).encode("utf-8"))
+    if created:
+        digest.update(created.encode("utf-8"))
+    else:
+        with open(path, "rb") as f:
+            digest.update(f.read(SOURCE_ID_HEAD_BYTES))
+    return f"{os.path.basename(path)}:{digest.hexdigest()[:16]}"
+
+
+def describe_sources(data_dir):
+    """
+    Like list_sources, but returns dicts with path, a stable source_id and
+    whether the file is sealed (no more messages will be appended to it).
+    """
+    index = load_index(data_dir)
+    if index:
+        return [
+            {
+                "path": os.path.join(data_dir, seg["file"]),
+                "source_id": _source_id(os.path.join(data_dir, seg["file"]), seg.get("created")),
+                "sealed": seg.get("sealed", False),
+            }
+            for seg in index["segments"]
+            if os.path.exists(os.path.join(data_dir, seg["file"]))
+        ]
+
+    # Legacy single dump may still be appended to
+    return [
+        {"path": path, "source_id": _source_id(path), "sealed": False}
+        for path in list_sources(data_dir)
+    ]
+
+
+def iter_messages(path, start_offset=0):
+    """
+    Streams raw AIXM messages out of a snapshot file without loading it whole.
+    Yields (end_offset, xml_str) where end_offset is the decompressed byte
+    offset just past the message, usable as a resume point.
+    A truncated trailing message (e.g. capture crashed mid-write) is skipped,
+    and so is the tail of a compressed segment that was never closed: reading
+    stops at the last complete message.
+    """
+    with open_segment(path) as stream:
+        if start_offset:
+            stream.seek(start_offset)
+
+        buffer = b""
+        buffer_offset = start_offset  # Decompressed offset of buffer[0]
+
+        while True:
+            try:
+                chunk = stream.read1(READ_CHUNK_BYTES)  # Partial reads: a truncated tail only loses its own bytes
+            except TRUNCATED_STREAM_ERRORS as e:
+                logger.warning("Truncated snapshot segment, stopping at last complete message",
+                               extra={"path": path, "offset": buffer_offset, "error": str(e)})
+                break
+            if not chunk:
+                break
+            buffer += chunk
+
+            pos = 0
+            while True:
+                end_match = MESSAGE_END_REGEX.search(buffer, pos)
+                if not end_match:
+                    break
+                start_match = MESSAGE_START_REGEX.search(buffer, pos, end_match.start())
+                if start_match:
+                    yield buffer_offset + end_match.end(), buffer[start_match.start():end_match.end()].decode("utf-8")
+                pos = end_match.end()
+
+            buffer = buffer[pos:]
+            buffer_offset += pos
+
+
+class SnapshotWriter:
+    """
+    Captures raw SWIM payloads into compressed, size-bounded segments.
+    Keeps a single buffered handle open instead of reopening the dump per message,
+    and maintains a small JSON index describing each segment.
+    """
+
+    def __init__(self, data_dir, compression=SNAPSHOT_COMPRESSION, segment_max_bytes=SEGMENT_MAX_BYTES, append=False):
+        if compression not in EXTENSIONS:
+            raise ValueError(f"Unknown snapshot compression '{compression}'")
+
+        self.data_dir = data_dir
+        self.compression = compression
+        self.segment_max_bytes = segment_max_bytes
+        self.message_count = 0
+
+        self._handle = None
+        self._segment = None
+
+        existing = load_index(data_dir)
+        if existing and append:
+            self.index = existing
+        else:
+            if existing:
+                self._remove_segments(existing)
+            self.index = {"format": 1, "segments": []}
+        _save_index(self.data_dir, self.index)
+
+    def _remove_segments(self, index):
+        for seg in index["segments"]:
+            path = os.path.join(self.data_dir, seg["file"])
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _open_segment(self):
+        seq = len(self.index["segments"])
+        filename = f"{SNAPSHOT_BASENAME}.{seq:05d}{EXTENSIONS[self.compression]}"
+        path = os.path.join(self.data_dir, filename)
+
+        compressed = _open_compressed_writer(path, self.compression)
+        self._handle = io.BufferedWriter(compressed, buffer_size=WRITE_BUFFER_BYTES)
+        self._handle.write(SNAPSHOT_HEADER)
+
+        self._segment = {
+            "file": filename,
+            "messages": 0,
+            "raw_bytes": len(SNAPSHOT_HEADER),
+            "stored_bytes": 0,
+            "sealed": False,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        }
+        self.index["segments"].append(self._segment)
+        _save_index(self.data_dir, self.index)
+
+    def _seal_segment(self):
+        if self._handle is None:
+            return
+        self._handle.write(SNAPSHOT_FOOTER)
+        self._handle.close()  # Closes the compressor and underlying file
+
+        self._segment["raw_bytes"] += len(SNAPSHOT_FOOTER)
+        self._segment["stored_bytes"] = os.path.getsize(os.path.join(self.data_dir, self._segment["file"]))
+        self._segment["sealed"] = True
+        _save_index(self.data_dir, self.index)
+
+        self._handle = None
+        self._segment = None
+
+    def write(self, payload):
+        """
+        Appends one raw XML payload, rotating to a new segment when full.
+        """
+        # Strip XML Declaration to allow concatenation
+        if payload.lstrip().startswith("<?xml"):
+            idx = payload.find("?>")
+            if idx != -1:
+                payload = payload[idx + 2:]
+
+        data = payload.strip().encode("utf-8") + b"\n"
+
+        if self._handle is None:
+            self._open_segment()
+        elif self._segment["raw_bytes"] + len(data) > self.segment_max_bytes and self._segment["messages"] > 0:
+            self._seal_segment()
+            self._open_segment()
+
+        self._handle.write(data)
+        self._segment["messages"] += 1
+        self._segment["raw_bytes"] += len(data)
+        self.message_count += 1
+
+    def close(self):
+        """
+        Seals the active segment and writes the final index.
+        """
+        self._seal_segment()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
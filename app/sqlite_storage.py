@@ -0,0 +1,680 @@
+import contextlib
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import msgpack
+from app import storage_schema, corridor, change_feed, text_search, schedule
+from app.partition_router import radius_bbox
+
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join("data", "notams.sqlite"))
+EARTH_RADIUS_NM = 3440.06
+
+# Fields with their own (indexed) column; other filter fields are checked on the decoded document
+FILTER_COLUMNS = ("icao_location", "fir", "category", "q_group", "q_subject", "q_condition")
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS notams (
+        id INTEGER PRIMARY KEY,
+        notam_id TEXT NOT NULL UNIQUE,
+        icao_location TEXT,
+        fir TEXT,
+        category TEXT,
+        q_group INTEGER,
+        q_subject INTEGER,
+        q_condition INTEGER,
+        radius_nm REAL,
+        lower_fl INTEGER,
+        upper_fl INTEGER,
+        lon REAL,
+        lat REAL,
+        version TEXT NOT NULL DEFAULT '',
+        seq INTEGER,
+        number TEXT,
+        starts_at REAL,
+        expires_at REAL,
+        doc BLOB NOT NULL
+    )""",
+    # R*Tree over NOTAM centres (zero-area boxes); rows share ids with notams
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notams_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_icao ON notams(icao_location)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_q ON notams(q_group, q_subject, q_condition)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_q_subject ON notams(q_subject)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_q_condition ON notams(q_condition)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_fl ON notams(radius_nm, lower_fl, upper_fl)",
+    # Survives clear_db, so the data version never goes backwards
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    # Inverted index for text search: E-field word -> notams.id
+    "CREATE TABLE IF NOT EXISTS notam_terms (term TEXT NOT NULL, id INTEGER NOT NULL, PRIMARY KEY (term, id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_notam_terms_id ON notam_terms(id)",
+    # Active intervals of scheduled NOTAMs (D-field, see app.schedule); unscheduled NOTAMs have none
+    "CREATE TABLE IF NOT EXISTS notam_intervals (id INTEGER NOT NULL, start_at REAL NOT NULL, end_at REAL NOT NULL, PRIMARY KEY (id, start_at)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS metrics (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+    # Cancelled, replaced and expired NOTAMs, for /api/changes
+    """CREATE TABLE IF NOT EXISTS notam_tombstones (
+        notam_id TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        icao_location TEXT,
+        lon REAL,
+        lat REAL,
+        reason TEXT NOT NULL,
+        removed_at REAL NOT NULL,
+        version TEXT NOT NULL DEFAULT ''
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_tombstones_seq ON notam_tombstones(seq)",
+    # Materialized per-airport FeatureCollections; version is bumped (and body cleared) by writes
+    """CREATE TABLE IF NOT EXISTS airport_views (
+        icao TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        body TEXT,
+        count INTEGER,
+        updated_at REAL
+    )""",
+    """CREATE TABLE IF NOT EXISTS load_checkpoints (
+        source_id TEXT PRIMARY KEY,
+        offset INTEGER NOT NULL,
+        messages INTEGER NOT NULL,
+        complete INTEGER NOT NULL
+    )""",
+)
+
+# Columns added after the first release: (table, name, definition), added by init_db when missing
+MIGRATED_COLUMNS = (
+    ("notams", "version", "TEXT NOT NULL DEFAULT ''"),  # Version-ordered upserts
+    ("notams", "seq", "INTEGER"),  # Change sequence (delta sync)
+    ("notams", "number", "TEXT"),
+    ("notams", "starts_at", "REAL"),
+    ("notams", "expires_at", "REAL"),
+    ("notam_tombstones", "version", "TEXT NOT NULL DEFAULT ''"),  # Version the NOTAM was removed at
+)
+
+# Indexes on migrated columns, created once the columns exist
+MIGRATED_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_notams_seq ON notams(seq)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_number ON notams(number, icao_location)",
+    "CREATE INDEX IF NOT EXISTS idx_notams_expires ON notams(expires_at)",
+)
+
+UPSERT_SQL = (
+    "INSERT INTO notams (notam_id, icao_location, fir, category, q_group, q_subject, q_condition, "
+    "radius_nm, lower_fl, upper_fl, lon, lat, version, seq, number, starts_at, expires_at, doc) "
+    "SELECT ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ? "
+    # A NOTAM removed at this version or a newer one stays removed (late or replayed copies)
+    "WHERE NOT EXISTS (SELECT 1 FROM notam_tombstones t WHERE t.notam_id = ? AND t.version >= ?) "
+    "ON CONFLICT(notam_id) DO UPDATE SET icao_location = excluded.icao_location, fir = excluded.fir, "
+    "category = excluded.category, q_group = excluded.q_group, q_subject = excluded.q_subject, "
+    "q_condition = excluded.q_condition, radius_nm = excluded.radius_nm, lower_fl = excluded.lower_fl, "
+    "upper_fl = excluded.upper_fl, lon = excluded.lon, lat = excluded.lat, version = excluded.version, "
+    "seq = excluded.seq, number = excluded.number, starts_at = excluded.starts_at, "
+    "expires_at = excluded.expires_at, doc = excluded.doc "
+    # Version-ordered: a stale document updates nothing and returns no row
+    "WHERE excluded.version >= notams.version "
+    "RETURNING id"
+)
+
+RTREE_JOIN = (
+    "JOIN notams_rtree r ON r.id = n.id "
+    "AND r.min_lon <= ? AND r.max_lon >= ? AND r.min_lat <= ? AND r.max_lat >= ?"
+)
+
+
+# Index names in EXPLAIN QUERY PLAN details
+PLAN_INDEX_REGEX = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _great_circle_nm(lon1, lat1, lon2, lat2):
+    # Haversine, same sphere as Mongo's $centerSphere conversion
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _rtree_args(bbox):
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return [max_lon, min_lon, max_lat, min_lat]
+
+
+def _active_conditions(window):
+    """
+    SQL conditions and args keeping NOTAMs active at some point in window
+    (start, end): valid then and, if scheduled, inside one of their active
+    intervals. Intervals are at most schedule.MAX_INTERVAL_SECONDS long, so the
+    interval check is a bounded range on the (id, start_at) key.
+    """
+    start, end = window
+    where = [
+        "(n.starts_at IS NULL OR n.starts_at <= ?)",
+        "(n.expires_at IS NULL OR n.expires_at > ?)",
+        "(NOT EXISTS (SELECT 1 FROM notam_intervals i WHERE i.id = n.id) "
+        "OR EXISTS (SELECT 1 FROM notam_intervals i WHERE i.id = n.id "
+        "AND i.start_at BETWEEN ? AND ? AND i.end_at > ?))",
+    ]
+    return where, [end, start, start - schedule.MAX_INTERVAL_SECONDS, end, start]
+
+
+class SqliteStorage:
+    """
+    Embedded storage backend: a single SQLite file with an R*Tree over NOTAM
+    centres and B-tree indexes mirroring the Mongo ones. Documents are kept in the
+    compact storage_schema layout, msgpack-encoded.
+    Each thread gets its own connection; the file uses WAL so readers don't block the writer.
+    """
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self.router = None  # FIR partitioning is Mongo-only
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def init_db(self):
+        """
+        Creates tables and indexes if they don't exist.
+        """
+        with self.conn:
+            for statement in SCHEMA:
+                self.conn.execute(statement)
+            for table, name, definition in MIGRATED_COLUMNS:
+                columns = {row[1] for row in self.conn.execute(f"PRAGMA table_info({table})")}
+                if name not in columns:
+                    self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            for statement in MIGRATED_INDEXES:
+                self.conn.execute(statement)
+        print(f"SQLite schema ensured ({self.path}).")
+
+    def clear_db(self):
+        """
+        Drops all NOTAMs and loader checkpoints. The change sequence carries on;
+        changes before the clear are no longer available (see get_changes).
+        """
+        print(f"Dropping SQLite tables ({self.path})...")
+        with self.conn:
+            for table in ("notams", "notams_rtree", "notam_terms", "notam_intervals", "notam_tombstones", "load_checkpoints", "airport_views"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        print("Tables dropped.")
+        self.init_db()
+        with self.conn:
+            self._raise_change_floor(self._current_seq())
+            self._bump_data_version()
+
+    def clear_partition(self, fir):
+        raise RuntimeError("FIR partitions are only supported by the mongo backend")
+
+    def insert_notam(self, notam_doc):
+        """
+        Inserts or updates a NOTAM document, keyed on notam_id, unless the stored
+        version is newer or the NOTAM was removed at the same or a newer version.
+        Returns False if the document was stale.
+        """
+        return self.upsert_many([notam_doc]) == 1
+
+    def upsert_many(self, notam_docs):
+        """
+        Inserts or updates NOTAM documents in one transaction, skipping any whose
+        version is older than the stored one, or not newer than the version it
+        was cancelled, replaced or expired at (see MongoStorage.insert_notam).
+        Each applied document gets the next change sequence; NOTAMR/NOTAMC
+        documents move the NOTAM they name to the tombstones.
+        Returns the number of documents written.
+        """
+        written = []
+        changed_codes = set()
+        with self.conn:
+            for doc in notam_docs:
+                location = doc.get("location")
+                lon, lat = location["coordinates"] if location else (None, None)
+                seq = self._next_seq()
+                stored = storage_schema.to_storage(doc)
+                stored[storage_schema.field("seq")] = seq
+                row = (
+                    doc["notam_id"], doc.get("icao_location"), doc.get("fir"), doc.get("category"),
+                    doc.get("q_group"), doc.get("q_subject"), doc.get("q_condition"),
+                    doc.get("radius_nm"), doc.get("lower_fl"), doc.get("upper_fl"), lon, lat,
+                    doc.get("version") or "", seq, doc.get("number"), doc.get("starts_at"), doc.get("expires_at"),
+                    msgpack.packb(stored, use_bin_type=True), doc["notam_id"], doc.get("version") or "",
+                )
+                returned = self.conn.execute(UPSERT_SQL, row).fetchone()
+                if returned is None:
+                    continue
+                row_id = returned[0]
+                if location:
+                    self.conn.execute("INSERT OR REPLACE INTO notams_rtree VALUES (?, ?, ?, ?, ?)", (row_id, lon, lon, lat, lat))
+                else:
+                    self.conn.execute("DELETE FROM notams_rtree WHERE id = ?", (row_id,))
+                self.conn.execute("DELETE FROM notam_terms WHERE id = ?", (row_id,))
+                self.conn.executemany(
+                    "INSERT INTO notam_terms VALUES (?, ?)", [(term, row_id) for term in text_search.index_terms(doc)]
+                )
+                self.conn.execute("DELETE FROM notam_intervals WHERE id = ?", (row_id,))
+                self.conn.executemany(
+                    "INSERT INTO notam_intervals VALUES (?, ?, ?)",
+                    [(row_id, start, end) for start, end in doc.get("active_intervals") or ()]
+                )
+                if doc.get("icao_location"):
+                    changed_codes.add(doc["icao_location"])
+                written.append(doc)
+            if written:
+                # Written again at a newer version than it was removed at: live, so no longer removed
+                self.conn.executemany(
+                    "DELETE FROM notam_tombstones WHERE notam_id = ? AND version < ?",
+                    [(doc["notam_id"], doc.get("version") or "") for doc in written]
+                )
+                for doc, reason in change_feed.cancelling(written):
+                    rows = self.conn.execute(
+                        "SELECT id, notam_id, icao_location, lon, lat, version FROM notams "
+                        "WHERE number = ? AND icao_location IS ? AND notam_id != ?",
+                        (doc["references"], doc.get("icao_location"), doc["notam_id"])
+                    ).fetchall()
+                    changed_codes.update(tomb["icao_location"] for tomb in self._tombstone(rows, reason))
+                self._invalidate_airport_views(changed_codes)
+                self._bump_data_version()
+        return len(written)
+
+    def _invalidate_airport_views(self, codes):
+        # Called inside the writing transaction
+        codes = sorted(code for code in codes if code)
+        if codes:
+            self.conn.executemany(
+                "INSERT INTO airport_views (icao, version) VALUES (?, 1) "
+                "ON CONFLICT(icao) DO UPDATE SET version = version + 1, body = NULL",
+                [(code,) for code in codes]
+            )
+
+    def _tombstone(self, rows, reason):
+        """
+        Moves NOTAM rows (id, notam_id, icao_location, lon, lat, version) to the tombstones,
+        each under a new change sequence. Called inside the writing transaction.
+        Returns the tombstones.
+        """
+        removed_at = time.time()
+        tombstones = []
+        for row_id, notam_id, icao, lon, lat, version in rows:
+            seq = self._next_seq()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO notam_tombstones "
+                "(notam_id, seq, icao_location, lon, lat, reason, removed_at, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (notam_id, seq, icao, lon, lat, reason, removed_at, version)
+            )
+            self.conn.execute("DELETE FROM notams WHERE id = ?", (row_id,))
+            self.conn.execute("DELETE FROM notams_rtree WHERE id = ?", (row_id,))
+            self.conn.execute("DELETE FROM notam_terms WHERE id = ?", (row_id,))
+            self.conn.execute("DELETE FROM notam_intervals WHERE id = ?", (row_id,))
+            tombstones.append({"notam_id": notam_id, "seq": seq, "icao_location": icao, "reason": reason})
+        return tombstones
+
+    def expire_notams(self, now=None):
+        """
+        Moves NOTAMs whose end time (expires_at) has passed to the tombstones.
+        Returns the tombstones written.
+        """
+        now = time.time() if now is None else now
+        with self.conn:
+            rows = self.conn.execute(
+                "SELECT id, notam_id, icao_location, lon, lat, version FROM notams WHERE expires_at < ?", (now,)
+            ).fetchall()
+            tombstones = self._tombstone(rows, change_feed.EXPIRED)
+            if tombstones:
+                self._invalidate_airport_views(tomb["icao_location"] for tomb in tombstones)
+                self._bump_data_version()
+        return tombstones
+
+    def prune_tombstones(self, older_than):
+        """
+        Deletes tombstones written before the epoch time older_than. Clients that
+        last synced before the newest pruned one are told to reset. Returns the count.
+        """
+        with self.conn:
+            newest = self.conn.execute(
+                "SELECT MAX(seq) FROM notam_tombstones WHERE removed_at < ?", (older_than,)
+            ).fetchone()[0]
+            if newest is None:
+                return 0
+            self._raise_change_floor(newest)
+            return self.conn.execute("DELETE FROM notam_tombstones WHERE seq <= ?", (newest,)).rowcount
+
+    def get_changes(self, since, bbox=None, limit=1000):
+        """
+        NOTAMs written and removed after change sequence `since`, optionally limited
+        to centres inside bbox [min_lon, min_lat, max_lon, max_lat], oldest first.
+        See change_feed.merge_page for the result.
+        """
+        with self.conn:
+            # One read transaction, so the sequence matches what the queries see
+            self.conn.execute("BEGIN")
+            current_seq = self._current_seq()
+            floor = self._meta_value("change_floor")
+            upserted = self._find(["n.seq > ?"], [since], bbox=bbox, order_by="n.seq", limit=limit + 1)
+
+            sql = "SELECT notam_id, seq, reason FROM notam_tombstones WHERE seq > ?"
+            args = [since]
+            if bbox is not None:
+                sql += " AND lon BETWEEN ? AND ? AND lat BETWEEN ? AND ?"
+                args += [bbox[0], bbox[2], bbox[1], bbox[3]]
+            sql += " ORDER BY seq LIMIT ?"
+            removed = [
+                {"notam_id": notam_id, "seq": seq, "reason": reason}
+                for notam_id, seq, reason in self.conn.execute(sql, args + [limit + 1])
+            ]
+        return change_feed.merge_page(since, upserted, removed, limit, current_seq, floor)
+
+    def _find(self, where=(), args=(), filters=None, bbox=None, order_by=None, limit=None):
+        """
+        Selects documents matching SQL conditions (ANDed), optionally restricted
+        to centres inside bbox via the R*Tree. Returns readable documents.
+        limit applies before filters evaluated on the decoded documents.
+        """
+        where = list(where)
+        args = list(args)
+        join_args = []
+        extra = {}
+        for key, value in (filters or {}).items():
+            if key in FILTER_COLUMNS:
+                where.append(f"n.{key} = ?")
+                args.append(value)
+            else:
+                extra[key] = value
+
+        sql = "SELECT n.doc FROM notams n "
+        if bbox is not None:
+            sql += RTREE_JOIN
+            join_args = _rtree_args(bbox)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            args.append(limit)
+
+        docs = []
+        scanned = 0
+        for (blob,) in self.conn.execute(sql, join_args + args):
+            scanned += 1
+            doc = storage_schema.from_storage(msgpack.unpackb(blob, raw=False))
+            if all(doc.get(key) == value for key, value in extra.items()):
+                docs.append(doc)
+        self._trace({"sql": sql, "args": join_args + args, "scanned": scanned, "matched": len(docs)})
+        return docs
+
+    def start_trace(self):
+        """
+        Starts recording the SQL run by this thread, for explain_trace().
+        """
+        self._local.trace = []
+
+    def _trace(self, entry):
+        trace = getattr(self._local, "trace", None)
+        if trace is not None:
+            trace.append(entry)
+
+    def explain_trace(self):
+        """
+        Plan summary for the statements recorded since start_trace(): EXPLAIN QUERY
+        PLAN details, indexes used, rows read from SQL (docs_examined) and rows
+        left after filters evaluated on the decoded documents (returned).
+        """
+        trace = getattr(self._local, "trace", None) or []
+        stages, indexes = [], set()
+        for entry in trace:
+            for row in self.conn.execute("EXPLAIN QUERY PLAN " + entry["sql"], entry["args"]):
+                detail = row[-1]
+                if detail not in stages:
+                    stages.append(detail)
+                match = PLAN_INDEX_REGEX.search(detail)
+                if match:
+                    indexes.add(match.group(1))
+                elif "VIRTUAL TABLE INDEX" in detail:
+                    indexes.add("notams_rtree")
+        return {
+            "queries": len(trace),
+            "indexes": sorted(indexes),
+            "stages": stages,
+            "keys_examined": None,  # Not reported by SQLite
+            "docs_examined": sum(entry["scanned"] or 0 for entry in trace),
+            "returned": sum(entry["matched"] for entry in trace),
+        }
+
+    def search_nearby(self, lat, lon, radius_nm, filters=None, window=None):
+        """
+        Finds NOTAMs whose centre is within radius_nm (great circle) of the point.
+        With window (start, end) epoch seconds, only NOTAMs active at some point in it.
+        """
+        bbox = radius_bbox(lat, lon, radius_nm)
+        where, args = _active_conditions(window) if window is not None else ([], [])
+        candidates = self._find(["n.lon IS NOT NULL"] + where, args, filters, bbox)
+        return [
+            doc for doc in candidates
+            if _great_circle_nm(lon, lat, *doc["location"]["coordinates"]) <= radius_nm
+        ]
+
+    def search_by_icao(self, icao_codes, filters=None):
+        """
+        Finds NOTAMs for a set of ICAO location indicators in one query.
+        Returns {icao_code: [docs]} with an entry for every requested code.
+        """
+        codes = sorted({code.strip().upper() for code in icao_codes})
+        placeholders = ", ".join("?" for _ in codes)
+        results = {code: [] for code in codes}
+        for doc in self._find([f"n.icao_location IN ({placeholders})"], codes, filters):
+            results[doc["icao_location"]].append(doc)
+        return results
+
+    def search_corridor(self, waypoints, width_nm, fl_min=None, fl_max=None, filters=None):
+        """
+        Same semantics as the Mongo backend: per radius band, R*Tree candidates in
+        the corridor's bounding box widened by the band radius, then an exact check.
+        Raises ValueError for invalid routes.
+        """
+        segments = corridor.route_segments(waypoints)
+        half_width = width_nm / 2.0
+
+        where = ["n.lon IS NOT NULL"]
+        args = []
+        if fl_max is not None:
+            where.append("(n.lower_fl IS NULL OR n.lower_fl <= ?)")
+            args.append(fl_max)
+        if fl_min is not None:
+            where.append("(n.upper_fl IS NULL OR n.upper_fl = 0 OR n.upper_fl >= ?)")
+            args.append(fl_min)
+
+        results = {}
+        for lower, upper in corridor.radius_bands():
+            band_where = list(where)
+            band_args = list(args)
+            if lower is not None:
+                band_where.append("COALESCE(n.radius_nm, 0) > ?")
+                band_args.append(lower)
+            if upper is not None:
+                band_where.append("COALESCE(n.radius_nm, 0) <= ?")
+                band_args.append(upper)
+            bbox = corridor.route_bbox(segments, half_width + upper) if upper is not None else None
+
+            for doc in self._find(band_where, band_args, filters, bbox):
+                if corridor.intersects_corridor(doc, segments, half_width):
+                    results[doc["notam_id"]] = doc
+        return list(results.values())
+
+    def search_text(self, terms, near=None, bbox=None, window=None, filters=None, limit=0):
+        """
+        NOTAMs whose E-field contains every term (see text_search), resolved
+        through the notam_terms inverted index. Optional in the same query:
+        near (lat, lon, radius_nm), bbox and window (start, end) epoch seconds,
+        keeping NOTAMs active at some point in the window. With limit, only the
+        `limit` most recently written candidates are read. Unranked.
+        """
+        placeholders = ", ".join("?" for _ in terms)
+        where = [f"n.id IN (SELECT id FROM notam_terms WHERE term IN ({placeholders}) GROUP BY id HAVING COUNT(*) = ?)"]
+        args = list(terms) + [len(terms)]
+        if window is not None:
+            active_where, active_args = _active_conditions(window)
+            where += active_where
+            args += active_args
+        if near is not None:
+            lat, lon, radius_nm = near
+            where.append("n.lon IS NOT NULL")
+            area = radius_bbox(lat, lon, radius_nm)
+        else:
+            area = bbox
+        order_by, limit = ("n.seq DESC", limit) if limit else (None, None)
+        docs = self._find(where, args, filters, area, order_by, limit)
+        if near is not None:
+            return [doc for doc in docs if _great_circle_nm(lon, lat, *doc["location"]["coordinates"]) <= radius_nm]
+        return docs
+
+    def term_counts(self, terms):
+        """
+        ({term: number of NOTAMs containing it}, number of NOTAMs), for ranking.
+        """
+        placeholders = ", ".join("?" for _ in terms)
+        rows = self.conn.execute(
+            f"SELECT term, COUNT(*) FROM notam_terms WHERE term IN ({placeholders}) GROUP BY term", list(terms)
+        )
+        return dict(rows), self.get_count()
+
+    def search_bbox(self, min_lon, min_lat, max_lon, max_lat, filters=None):
+        """
+        Finds NOTAMs whose location lies inside the bounding box.
+        """
+        return self._find(filters=filters, bbox=[min_lon, min_lat, max_lon, max_lat])
+
+    def grid_counts(self, min_lon, min_lat, max_lon, max_lat, cell_deg, group_by=None):
+        """
+        Counts NOTAM locations per grid cell inside the bbox with a GROUP BY over
+        R*Tree candidates. Same cell indexing and return shape as the Mongo backend.
+        """
+        if group_by not in (None, "category", "fir"):
+            raise ValueError(f"Unknown grid grouping '{group_by}'")
+        group_column = f"n.{group_by}" if group_by else "NULL"
+        sql = (
+            f"SELECT CAST((n.lon - ?) / ? AS INTEGER), CAST((n.lat - ?) / ? AS INTEGER), {group_column}, COUNT(*) "
+            f"FROM notams n {RTREE_JOIN} GROUP BY 1, 2, 3"
+        )
+        args = [min_lon, cell_deg, min_lat, cell_deg] + _rtree_args([min_lon, min_lat, max_lon, max_lat])
+        counts = {(ix, iy, group): count for ix, iy, group, count in self.conn.execute(sql, args)}
+        self._trace({"sql": sql, "args": args, "scanned": sum(counts.values()), "matched": len(counts)})
+        return counts
+
+    def get_checkpoints(self):
+        """
+        Returns snapshot load checkpoints as {source_id: {"offset", "messages", "complete"}}.
+        """
+        rows = self.conn.execute("SELECT source_id, offset, messages, complete FROM load_checkpoints")
+        return {
+            source_id: {"offset": offset, "messages": messages, "complete": bool(complete)}
+            for source_id, offset, messages, complete in rows
+        }
+
+    def save_checkpoint(self, source_id, offset, messages, complete=False):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO load_checkpoints VALUES (?, ?, ?, ?)",
+                (source_id, offset, messages, int(complete))
+            )
+
+    def reset_checkpoints(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM load_checkpoints")
+
+    def _bump_data_version(self):
+        # Called inside the writing transaction
+        self.conn.execute(
+            "INSERT INTO meta VALUES ('data_version', 1) ON CONFLICT(key) DO UPDATE SET value = value + 1"
+        )
+
+    def _meta_value(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _next_seq(self):
+        # Called inside the writing transaction, so sequences commit in order
+        return self.conn.execute(
+            "INSERT INTO meta VALUES ('change_seq', 1) ON CONFLICT(key) DO UPDATE SET value = value + 1 RETURNING value"
+        ).fetchone()[0]
+
+    def _current_seq(self):
+        return self._meta_value("change_seq")
+
+    def _raise_change_floor(self, seq):
+        # Changes at or below the floor may be missing from get_changes
+        self.conn.execute(
+            "INSERT INTO meta VALUES ('change_floor', ?) ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (seq,)
+        )
+
+    def get_data_version(self):
+        """
+        Counter that changes whenever NOTAM data is written or cleared.
+        """
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+        return row[0] if row else 0
+
+    def save_metrics(self, key, value):
+        """
+        Stores a small JSON metrics document (e.g. listener freshness) under key.
+        """
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?)", (key, json.dumps(value)))
+
+    def get_metrics(self, key):
+        row = self.conn.execute("SELECT value FROM metrics WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list_metrics(self, prefix):
+        """
+        Every metrics document whose key starts with prefix (e.g. one per listener).
+        """
+        rows = self.conn.execute(
+            "SELECT value FROM metrics WHERE substr(key, 1, ?) = ? ORDER BY key", (len(prefix), prefix)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_airport_view(self, icao):
+        """
+        Materialized view for an airport: {"version", "body", "count", "updated_at"},
+        body None if a write invalidated it. None if the airport was never written or viewed.
+        """
+        row = self.conn.execute(
+            "SELECT version, body, count, updated_at FROM airport_views WHERE icao = ?", (icao,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"version": row[0], "body": row[1], "count": row[2], "updated_at": row[3]}
+
+    def save_airport_view(self, icao, version, body, count, updated_at):
+        """
+        Stores a materialized view computed at `version`. Returns False (nothing
+        saved) if a write has bumped the version since.
+        """
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT INTO airport_views VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(icao) DO UPDATE SET body = excluded.body, count = excluded.count, "
+                "updated_at = excluded.updated_at WHERE airport_views.version = excluded.version",
+                (icao, version, body, count, updated_at)
+            )
+        return cursor.rowcount == 1
+
+    def time_limit(self, seconds):
+        # Same interface as MongoStorage.time_limit; a local file has no server to wait on
+        return contextlib.nullcontext()
+
+    def ping(self):
+        self.conn.execute("SELECT 1").fetchone()
+
+    def get_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM notams").fetchone()[0]
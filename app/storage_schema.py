@@ -0,0 +1,192 @@
+import zlib
+from app import qcodes
+
+# Compact storage layout for NOTAM documents.
+# DBManager stores documents under short keys and converts at its boundary, so the
+# rest of the app (parser, API, GeoJSON) keeps working with the readable field names.
+FIELD_MAP = {
+    "notam_id": "i",
+    "number": "n",
+    "location_code": "lc",
+    "icao_location": "ic",
+    "start_time": "s",
+    "end_time": "e",
+    "radius_nm": "r",
+    "category": "c",
+    "issued": "is",
+    "last_updated": "lu",
+    "received_at": "ra",
+    "version": "v",
+    "notam_type": "nt",
+    "references": "rf",
+    "starts_at": "sa",
+    "expires_at": "x",
+    "seq": "sq",  # Change sequence, stamped by storage on every write
+    "terms": "tm",  # E-field words for text search, written by storage; never read back
+    "fir": "fi",
+    "location": "loc",
+    "schedule": "d",
+    "active_intervals": "ai",  # Stored as [{"s": start, "e": end}] for the interval index; never read back
+    "lower_limit": "f",
+    "upper_limit": "g",
+    "q_code": "q",
+    "traffic": "tr",
+    "purpose": "pu",
+    "scope": "sc",
+    "lower_fl": "lo",
+    "upper_fl": "up",
+    "q_group": "qg",
+    "q_subject": "qs",
+    "q_condition": "qc",
+    "rwy_id": "rw",
+    "rwy_id_2": "rw2",
+    "twy_id": "tw",
+    "height_val": "hv",
+    "height_ref": "hr",
+    "raw_coordinates": "rc",  # Only stored when it cannot be rebuilt from location
+}
+REVERSE_FIELD_MAP = {short: field for field, short in FIELD_MAP.items()}
+
+# Stored compressed under TEXT_KEY; plain under "t" if compression does not pay off
+TEXT_KEY = "tz"
+PLAIN_TEXT_KEY = "t"
+
+# Every key a stored document can have (documents are rewritten field by field)
+STORED_KEYS = tuple(FIELD_MAP.values()) + (TEXT_KEY, PLAIN_TEXT_KEY)
+
+# Index-only: storage writes them (app.text_search.index_terms, app.schedule.expand), reads drop them
+TERMS_KEY = FIELD_MAP["terms"]
+INTERVALS_KEY = FIELD_MAP["active_intervals"]
+INDEX_ONLY_KEYS = (TERMS_KEY, INTERVALS_KEY)
+
+# Keys of a stored active interval (multikey-indexable subdocuments)
+INTERVAL_START_KEY = "s"
+INTERVAL_END_KEY = "e"
+
+# Fields that are re-derived on read instead of stored
+DERIVED_FIELDS = ("subject_code", "condition_code", "subject", "condition")
+
+# Preset dictionary for zlib: NOTAMs are short, so a shared dictionary of common
+# ICAO phrasing is what makes compression worthwhile. Never edit in place; add a
+# new version instead, since stored text references the dictionary by version.
+TEXT_DICTIONARY_V1 = (
+    b"NOTAMN NOTAMR NOTAMC Q) A) B) C) D) E) F) G) /IV/NBO/A/000/999/ /IV/BO/W/ /IV/M/A/ "
+    b"SFC FT AMSL AGL FL UNL CLSD CLOSED EXC TAX WIP MAINT U/S OUT OF SERVICE "
+    b"RWY TWY APRON AD ILS LOC GP DME VOR NDB PAPI VASI ALS REIL RCLL HIRL MIRL "
+    b"OBST LGT TOWER CRANE BTN AND TO FM TIL DLY MON TUE WED THU FRI SAT SUN "
+    b"FICON PATCHY ICE COMPACTED SN DRY WET SNOW BA MEDIUM GOOD POOR OBS AT "
+    b"CANCELED CNL TEMPO PERM EST REF AIP AMDT SUP WEF PPR ACFT PSN RADIUS NM "
+    b"TEMPORARY FLIGHT RESTRICTIONS TFR UAS AIRSPACE RESTRICTED AREA DANGER ACT "
+)
+TEXT_DICTIONARIES = {1: TEXT_DICTIONARY_V1}
+TEXT_DICTIONARY_VERSION = 1
+
+
+def compress_text(text):
+    """
+    Compresses NOTAM text to bytes: 1 version byte + raw deflate stream.
+    """
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=TEXT_DICTIONARIES[TEXT_DICTIONARY_VERSION])
+    payload = compressor.compress(text.encode("utf-8")) + compressor.flush()
+    return bytes([TEXT_DICTIONARY_VERSION]) + payload
+
+
+def decompress_text(blob):
+    decompressor = zlib.decompressobj(-15, zdict=TEXT_DICTIONARIES[blob[0]])
+    return (decompressor.decompress(blob[1:]) + decompressor.flush()).decode("utf-8")
+
+
+def format_coordinate(coordinates):
+    """
+    Inverse of parse_coordinate: [lon, lat] -> "DDMM[N/S]DDDMM[E/W]".
+    Returns None if the point is not on a whole minute.
+    """
+    lon, lat = coordinates
+
+    def to_deg_min(value):
+        total_minutes = round(abs(value) * 60)
+        if abs(abs(value) * 60 - total_minutes) > 1e-6:
+            return None
+        return divmod(total_minutes, 60)
+
+    lat_dm, lon_dm = to_deg_min(lat), to_deg_min(lon)
+    if lat_dm is None or lon_dm is None:
+        return None
+    return (
+        f"{lat_dm[0]:02d}{lat_dm[1]:02d}{'S' if lat < 0 else 'N'}"
+        f"{lon_dm[0]:03d}{lon_dm[1]:02d}{'W' if lon < 0 else 'E'}"
+    )
+
+
+def field(name):
+    """
+    Storage key for a document field (unknown fields are stored as-is).
+    """
+    return FIELD_MAP.get(name, name)
+
+
+def to_query(filters):
+    """
+    Translates a filter dict written with readable field names to storage keys.
+    """
+    return {field(key): value for key, value in filters.items()}
+
+
+def to_storage(doc):
+    """
+    Readable NOTAM document -> compact stored form. Does not modify doc.
+    """
+    stored = {}
+    for key, value in doc.items():
+        if key in DERIVED_FIELDS:
+            continue
+        if key == "text":
+            if value:
+                blob = compress_text(value)
+                if len(blob) < len(value.encode("utf-8")):
+                    stored[TEXT_KEY] = blob
+                else:
+                    stored[PLAIN_TEXT_KEY] = value
+            continue
+        if key == "raw_coordinates":
+            # Redundant when it is just the location in DDMM form
+            location = doc.get("location")
+            derived = (format_coordinate(location["coordinates"]) or "") if location else ""
+            if value == derived:
+                continue
+        if key == "active_intervals" and value:
+            value = [{INTERVAL_START_KEY: start, INTERVAL_END_KEY: end} for start, end in value]
+        stored[field(key)] = value
+    return stored
+
+
+def from_storage(stored):
+    """
+    Compact stored form -> readable NOTAM document.
+    Keys that are not in the schema (e.g. _id, or documents written before the
+    compact layout) pass through unchanged.
+    """
+    doc = {}
+    for key, value in stored.items():
+        if key in INDEX_ONLY_KEYS:
+            continue
+        if key == TEXT_KEY:
+            doc["text"] = decompress_text(value)
+        elif key == PLAIN_TEXT_KEY:
+            doc["text"] = value
+        else:
+            doc[REVERSE_FIELD_MAP.get(key, key)] = value
+
+    doc.setdefault("text", "")
+    if "raw_coordinates" not in doc:
+        location = doc.get("location")
+        doc["raw_coordinates"] = (format_coordinate(location["coordinates"]) or "") if location else ""
+
+    q_code = doc.get("q_code")
+    if q_code and "subject_code" not in doc:
+        decoded = qcodes.decode_q_code(q_code)
+        doc["subject_code"] = q_code[1:3]
+        doc["condition_code"] = q_code[3:5]
+        doc["subject"] = decoded["subject"]
+        doc["condition"] = decoded["condition"]
+    return doc
@@ -0,0 +1,120 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+
+# Logging for the listener, loaders and parser. Records carry structured fields
+# (logger.info("msg", extra={"count": 3})), rendered as key=value text or one JSON
+# object per line. Debug records can be sampled, and long-running processes log
+# through a queue so the hot path never waits on console I/O.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))  # Fraction of DEBUG records kept
+
+_listener = None  # The QueueListener installed by configure(use_queue=True)
+
+# Attributes every LogRecord has; anything else came in through extra=
+STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+def record_fields(record):
+    """
+    The structured fields passed to a log call via extra=.
+    """
+    return {key: value for key, value in vars(record).items() if key not in STANDARD_ATTRS}
+
+
+class TextFormatter(logging.Formatter):
+    """
+    "2025-12-17T03:48:00Z INFO app.live_ingest message key=value ...".
+    """
+
+    def format(self, record):
+        line = f"{self.formatTime(record)} {record.levelname} {record.name} {record.getMessage()}"
+        fields = record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+    def formatTime(self, record, datefmt=None):
+        return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(record.created))
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: ts, level, logger, msg, then the structured fields.
+    """
+
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname, "logger": record.name, "msg": record.getMessage()}
+        entry.update(record_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """
+    Keeps a `rate` fraction of DEBUG records; other levels always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno != logging.DEBUG or self.rate >= 1 or random.random() < self.rate
+
+
+def stop_listener():
+    """
+    Stops the background writer, if any, after it has written everything queued.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure(level=None, fmt=None, debug_sample_rate=None, use_queue=False, stream=None):
+    """
+    Configures the root logger, replacing earlier handlers. With use_queue,
+    records are handed to a QueueHandler and written by a background
+    QueueListener thread (stopped at exit, flushing what is queued).
+    Returns the listener, or None.
+    """
+    global _listener
+    level = level or LOG_LEVEL
+    fmt = fmt or LOG_FORMAT
+    rate = LOG_DEBUG_SAMPLE_RATE if debug_sample_rate is None else debug_sample_rate
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    stop_listener()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(level)
+
+    if use_queue:
+        records = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+    # Sample before the record is queued, so dropped debug records cost no formatting
+    handler.addFilter(DebugSampler(rate))
+    root.addHandler(handler)
+    return _listener
+
+
+atexit.register(stop_listener)
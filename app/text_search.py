@@ -0,0 +1,94 @@
+import math
+import os
+import re
+from app.notam_text_parser import NotamTextParser
+
+# Keyword search over NOTAM E-field text (/api/search/text). Storage indexes the
+# distinct words of each NOTAM's E-field as "terms" (a multikey index in Mongo, an
+# inverted-index table in SQLite), written with the NOTAM. A search matches every
+# query word through that index, combined with geo/time filters in the same
+# query, and the matches are ranked here.
+WORD_REGEX = re.compile(r"[A-Z0-9]+")
+MAX_TERMS = 200  # Words indexed per NOTAM
+MAX_QUERY_TERMS = 8
+MAX_TEXT_CANDIDATES = int(os.getenv("MAX_TEXT_CANDIDATES", "2000"))  # Newest matches read and ranked per search
+
+# Ranking: BM25-style term frequency saturation, weighted by inverse document frequency
+TF_SATURATION = 1.2
+
+
+def _words(text):
+    # Words with at least one letter: RWY, ILS, 04L, 5000FT; bare numbers (times, dates) are noise
+    return [word for word in WORD_REGEX.findall((text or "").upper()) if len(word) > 1 and not word.isdigit()]
+
+
+def e_field(notam_doc):
+    """
+    The E-field (description) of a NOTAM's text; the whole text if it is not in ICAO format.
+    """
+    return NotamTextParser.tokenize(notam_doc.get("text") or "").get("E") or ""
+
+
+def index_terms(notam_doc):
+    """
+    Distinct E-field words of a NOTAM, as stored in its text index.
+    """
+    terms = []
+    seen = set()
+    for word in _words(e_field(notam_doc)):
+        if word not in seen:
+            seen.add(word)
+            terms.append(word)
+            if len(terms) == MAX_TERMS:
+                break
+    return sorted(terms)
+
+
+def query_terms(query):
+    """
+    Distinct words of a search query (upper-cased, as indexed).
+    Raises ValueError if there are none or too many.
+    """
+    terms = sorted(set(_words(query)))
+    if not terms:
+        raise ValueError("q must contain at least one word (bare numbers are not indexed)")
+    if len(terms) > MAX_QUERY_TERMS:
+        raise ValueError(f"q may contain at most {MAX_QUERY_TERMS} words")
+    return terms
+
+
+def rank(docs, terms, doc_freqs, total):
+    """
+    Sorts matching documents by relevance: each query term scores
+    idf * tf / (tf + TF_SATURATION) on the E-field, so rare words (FICON) outweigh
+    common ones (RWY) and repeats add less and less. Ties go to the newest write.
+    Returns [(score, doc)], best first.
+    """
+    idf = {term: math.log(1 + (total + 1) / (doc_freqs.get(term, 0) + 1)) for term in terms}
+    scored = []
+    for doc in docs:
+        counts = {}
+        for word in _words(e_field(doc)):
+            if word in idf:
+                counts[word] = counts.get(word, 0) + 1
+        score = sum(idf[term] * tf / (tf + TF_SATURATION) for term, tf in counts.items())
+        scored.append((round(score, 4), doc))
+    scored.sort(key=lambda item: (item[0], item[1].get("seq") or 0), reverse=True)
+    return scored
+
+
+def search(db, query, limit, near=None, bbox=None, window=None, filters=None):
+    """
+    Ranked keyword search. near: (lat, lon, radius_nm); bbox: [min_lon, min_lat,
+    max_lon, max_lat]; window: (start, end) epoch seconds, keeping NOTAMs valid at
+    some point in it. Only the MAX_TEXT_CANDIDATES most recently written matches
+    are read and ranked, so a common word cannot pull the whole index into memory.
+    Returns (matches, capped at MAX_TEXT_CANDIDATES, [(score, doc)] for the best
+    `limit`). Raises ValueError for an unusable query.
+    """
+    terms = query_terms(query)
+    docs = db.search_text(terms, near, bbox, window, filters, MAX_TEXT_CANDIDATES)
+    if not docs:
+        return 0, []
+    doc_freqs, total = db.term_counts(terms)
+    return len(docs), rank(docs, terms, doc_freqs, total)[:limit]
@@ -0,0 +1,46 @@
+import os
+from app.geojson_converter import GeoJsonConverter
+
+# Busiest areas to pre-query on boot: "lat,lon,radius_nm;..." (default: major US hubs)
+DEFAULT_WARMUP_LOCATIONS = (
+    "40.64,-73.78,25;"   # KJFK
+    "42.36,-71.01,25;"   # KBOS
+    "41.98,-87.90,25;"   # KORD
+    "33.64,-84.43,25;"   # KATL
+    "33.94,-118.41,25"   # KLAX
+)
+WARMUP_LOCATIONS = os.getenv("WARMUP_LOCATIONS", DEFAULT_WARMUP_LOCATIONS)
+WARMUP_TIMEOUT_SECONDS = float(os.getenv("WARMUP_TIMEOUT", "5"))  # Per attempt, so a down DB fails fast
+
+
+def parse_locations(spec):
+    """
+    "lat,lon,radius;..." -> [(lat, lon, radius_nm)]. Blank entries are ignored.
+    """
+    locations = []
+    for entry in spec.split(";"):
+        if not entry.strip():
+            continue
+        lat, lon, radius = (float(part) for part in entry.split(","))
+        locations.append((lat, lon, radius))
+    return locations
+
+
+def warm_up(db, locations=None):
+    """
+    Connects to the DB and runs the hot queries once so indexes, the partition
+    catalog (Mongo) and circle geometry are warm before traffic arrives.
+    Raises if the DB is unreachable.
+    """
+    GeoJsonConverter.unit_circle(GeoJsonConverter.DEFAULT_CIRCLE_POINTS)
+    locations = parse_locations(WARMUP_LOCATIONS) if locations is None else locations
+
+    total = 0
+    with db.time_limit(WARMUP_TIMEOUT_SECONDS):
+        db.ping()
+
+        for lat, lon, radius_nm in locations:
+            results = db.search_nearby(lat, lon, radius_nm)
+            GeoJsonConverter.to_feature_collection(results)
+            total += len(results)
+    print(f"Warmed {len(locations)} location(s), {total} NOTAMs.")
@@ -1,7 +1,15 @@
 
 import re
+import calendar
+import logging
+import time
 import defusedxml.ElementTree as ET
 from app.notam_text_parser import NotamTextParser
+from app import schedule
+
+# Bump whenever the shape or content of parsed NOTAM documents changes.
+# Used to invalidate parsed-document caches built by older parser code.
+PARSER_VERSION = "10"
 
 # Namespaces for AIXM 5.1
 NS = {
@@ -12,6 +20,8 @@ NS = {
     'fnse': "http://www.aixm.aero/schema/5.1/extensions/FAA/FNSE"
 }
 
+logger = logging.getLogger(__name__)
+
 def parse_coordinate(coord_str):
     """
     Parses a string like "4228N07117W" into (longitude, latitude) dictionary/tuple.
@@ -47,10 +57,42 @@ def parse_coordinate(coord_str):
         
     return [lon_val, lat_val] # GeoJSON uses [Lon, Lat]
 
+def version_key(sequence_number, correction_number, last_updated):
+    """
+    Sortable version string for a NOTAM event: sequenceNumber, then
+    correctionNumber, then lastUpdated. Storage only applies a write whose
+    version is at least the stored one, so comparing these strings orders
+    out-of-order deliveries.
+    """
+    def to_int(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return 0
+    return f"{to_int(sequence_number):08d}.{to_int(correction_number):04d}.{last_updated or ''}"
+
+def to_epoch(notam_time):
+    """
+    Epoch seconds for an effectiveStart/effectiveEnd value ("YYYYMMDDHHMM") or a
+    B)/C) time parsed from the text ("YYYY-MM-DDTHH:MM:00"). None for PERM,
+    estimated ("...EST") or unreadable times: a NOTAM without an end epoch stays
+    until it is cancelled or replaced.
+    """
+    notam_time = (notam_time or "").strip()
+    for fmt, length in (("%Y%m%d%H%M", 12), ("%Y-%m-%dT%H:%M:%S", 19)):
+        if len(notam_time) == length:
+            try:
+                return calendar.timegm(time.strptime(notam_time, fmt))
+            except ValueError:
+                return None
+    return None
+
 def _extract_notams_from_root(root):
     """
     Helper to yield NOTAM dicts from an AIXM root element.
     """
+    # Checked once per message: with DEBUG off, the per-NOTAM trace costs one branch
+    debug = logger.isEnabledFor(logging.DEBUG)
     for member in root.findall(".//msg:hasMember", NS):
         event_node = member.find(".//event:Event", NS)
         if event_node is None:
@@ -72,9 +114,23 @@ def _extract_notams_from_root(root):
         number = notam_node.findtext("event:number", default="", namespaces=NS)
         year = notam_node.findtext("event:year", default="", namespaces=NS)
         full_number = f"{series}{number}/{year}"
+        notam_type = notam_node.findtext("event:type", default="", namespaces=NS).strip()
         
         text = notam_node.findtext("event:text", default="", namespaces=NS)
         location_code = notam_node.findtext("event:location", default="", namespaces=NS)
+        affected_fir = notam_node.findtext("event:affectedFIR", default="", namespaces=NS)
+        
+        # Source timestamps, kept for ingest latency tracking
+        issued = notam_node.findtext("event:issued", default="", namespaces=NS)
+        last_updated = time_slice.findtext(".//fnse:lastUpdated", default="", namespaces=NS)
+        version = version_key(
+            time_slice.findtext("aixm:sequenceNumber", default="", namespaces=NS),
+            time_slice.findtext("aixm:correctionNumber", default="", namespaces=NS),
+            last_updated
+        )
+        
+        # ICAO aerodrome/location indicator: FAA extension, else the A) field, else location if it is ICAO-shaped
+        icao_location = time_slice.findtext(".//fnse:icaoLocation", default="", namespaces=NS).strip()
         
         # Coordinates and Radius
         raw_coords = notam_node.findtext("event:coordinates", default="", namespaces=NS)
@@ -90,45 +146,47 @@ def _extract_notams_from_root(root):
         start_time = notam_node.findtext("event:effectiveStart", default="", namespaces=NS)
         end_time = notam_node.findtext("event:effectiveEnd", default="", namespaces=NS)
 
-        # Try to parse Q-line from translation if available, or text
-        # Usually Q-line is in valid formatted output or sometimes embedded
-        # For this phase, we look for it in the text or try to construct from raw fields if simple
-        
-        # NOTE: The current AIXM dump has Q-lines in the translation field!
-        # Let's check translation field for Q-line
+        # Tokenize the ICAO message once and feed every extractor from the fields.
+        # NOTE: The current AIXM dump has the full ICAO message (incl. Q-line) in the
+        # translation field, so prefer that; the raw text is only tokenized as a
+        # fallback when the translation has no usable Q-line.
         translation_node = notam_node.find(".//event:translation/event:NOTAMTranslation/event:formattedText", NS)
-        q_line_data = None
         
         if translation_node is not None:
-             # Formatted text usually contains the full ICAO message including Q-line
-             # We might need to dig into the html:div or just get text
              # The example shows <html:div><pre>...Q)...</pre></html:div>
-             # ElementTree findtext will get all inner text
-             full_text = "".join(translation_node.itertext())
-             q_line_data = NotamTextParser.parse_q_line(full_text)
+             # ElementTree itertext will get all inner text
+             full_text = "".join(translation_node.itertext()).replace("<pre>", "").replace("</pre>", "")
+             fields = NotamTextParser.tokenize(full_text)
+             q_line_data = NotamTextParser.parse_q_field(fields.get("Q"))
              
-        # Fallback: if no Q-line in translation or translation missing, search in main text
-        if not q_line_data and text:
-            # Clean text specifically for Q-line regex (newlines to spaces)
-            clean_text = text.replace('\n', ' ').replace('\r', ' ')
-            q_line_data = NotamTextParser.parse_q_line(clean_text)
-
-        if q_line_data:
-            print(f"  [DEBUG] Found Q-Line for {full_number}: {q_line_data['lower_fl']}/{q_line_data['upper_fl']}")
+             if not q_line_data and text and "Q)" in text:
+                 q_line_data = NotamTextParser.parse_q_field(NotamTextParser.tokenize(text).get("Q"))
         else:
-            print(f"  [DEBUG] NO Q-Line for {full_number}")
+             full_text = text or ""
+             fields = NotamTextParser.tokenize(full_text)
+             q_line_data = NotamTextParser.parse_q_field(fields.get("Q"))
+
+        # NOTAMR/NOTAMC name the NOTAM they replace or cancel in the header
+        header_type, references = NotamTextParser.parse_header(fields.get("header") or text.split("Q)")[0])
+        notam_type = notam_type or header_type
+
+        if not icao_location:
+            a_field = (fields.get("A") or "").split()
+            if a_field and len(a_field[0]) == 4 and a_field[0].isalnum():
+                icao_location = a_field[0]
+            elif len(location_code) == 4:
+                icao_location = location_code
 
         # Better Date Parsing
-        # If the XML fields are missing or look invalid, parses from text
-        # Prefer full_text (from translation) as it contains B) and C) lines more reliably
-        date_source_text = full_text if translation_node is not None else (text or "")
-        
-        # DEBUG PRINT
-        print(f"Parsing Dates for {full_number}...")
-        # print(f"Source Text: {date_source_text[:100]}...")
-        
-        parsed_start, parsed_end = NotamTextParser.parse_validity_times(date_source_text)
-        print(f"  -> Extracted: {parsed_start} to {parsed_end}")
+        # If the XML fields are missing or look invalid, parses from B) and C)
+        parsed_start, parsed_end = NotamTextParser.parse_validity_fields(fields, full_text)
+        if debug:
+            logger.debug("Parsed NOTAM", extra={
+                "number": full_number,
+                "q_line": bool(q_line_data),
+                "fl": f"{q_line_data['lower_fl']}/{q_line_data['upper_fl']}" if q_line_data else None,
+                "validity": f"{parsed_start}/{parsed_end}"
+            })
         
         if not start_time and parsed_start:
             start_time = parsed_start
@@ -138,7 +196,7 @@ def _extract_notams_from_root(root):
         # Parse E-field (Text) for specifics
         # Use initial category from Q-line if available, else 'Other'
         category = q_line_data['category'] if q_line_data else "Other"
-        e_field_data = NotamTextParser.parse_e_field(text, category)
+        e_field_data = NotamTextParser.parse_e_field(fields.get("E") or text, category)
         
         # Coordinates: Prefer Q-line if available as it's standard
         # But for AIXM usage, the 'event:coordinates' usually matches
@@ -159,19 +217,45 @@ def _extract_notams_from_root(root):
             "number": full_number,
             "text": text,
             "location_code": location_code,
+            "icao_location": icao_location.upper(),
             "start_time": start_time,
             "end_time": end_time,
             "radius_nm": radius_nm,
             "raw_coordinates": raw_coords,
             "category": category,
+            "issued": issued,
+            "last_updated": last_updated,
+            "version": version,
+            "notam_type": notam_type,
+            "references": references,
+            "starts_at": to_epoch(start_time),
+            "expires_at": to_epoch(end_time),
+            "fir": (q_line_data['fir'] if q_line_data else "") or affected_fir,
             **e_field_data # Spread E-field details
         }
         
+        # Schedule and vertical limits, only present on some NOTAMs
+        if fields.get("D"):
+            doc["schedule"] = fields["D"]
+            # Concrete UTC intervals, when the schedule is understood (see app/schedule.py)
+            active_intervals = schedule.expand(fields["D"], doc["starts_at"], doc["expires_at"])
+            if active_intervals:
+                doc["active_intervals"] = active_intervals
+        if fields.get("F"):
+            doc["lower_limit"] = fields["F"]
+        if fields.get("G"):
+            doc["upper_limit"] = fields["G"]
+        
         if q_line_data:
             doc.update({
                 "q_code": q_line_data['q_code'],
                 "subject_code": q_line_data['subject_code'],
                 "condition_code": q_line_data['condition_code'],
+                "q_group": q_line_data['q_group'],
+                "q_subject": q_line_data['q_subject'],
+                "q_condition": q_line_data['q_condition'],
+                "subject": q_line_data['subject'],
+                "condition": q_line_data['condition'],
                 "traffic": q_line_data['traffic'],
                 "purpose": q_line_data['purpose'],
                 "scope": q_line_data['scope'],
@@ -205,7 +289,7 @@ def parse_notam_str(xml_str):
         root = ET.fromstring(xml_str)
         yield from _extract_notams_from_root(root)
     except Exception as e:
-        print(f"Error parsing XML string: {e}")
+        logger.warning("Error parsing XML string", extra={"error": str(e), "payload_bytes": len(xml_str)})
         return
 
 if __name__ == "__main__":
@@ -0,0 +1,66 @@
+import sys
+import os
+import gzip
+import io
+import json
+import random
+import time
+from contextlib import redirect_stdout
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import notam_pbf
+from app.geojson_converter import GeoJsonConverter
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+FEATURES = int(os.getenv("BENCH_FEATURES", "2000"))
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "5"))
+
+def build_docs(seed=42):
+    """
+    FEATURES sample NOTAMs scattered around Boston, as a large /api/geojson result would be.
+    """
+    rng = random.Random(seed)
+    with redirect_stdout(io.StringIO()):  # Parser debug output
+        samples = [doc for doc in parse_notam_xml(DUMP_FILE) if doc.get("location")]
+    docs = []
+    for i in range(FEATURES):
+        doc = dict(rng.choice(samples))
+        doc["notam_id"] = f"BENCH_{i}"
+        doc["location"] = {"type": "Point", "coordinates": [rng.uniform(-73.0, -69.0), rng.uniform(41.0, 44.0)]}
+        docs.append(doc)
+    return docs
+
+def best_of(fn):
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def encode_json(docs, tolerance):
+    # Same serialization as http_cache.json_response
+    return json.dumps(GeoJsonConverter.to_feature_collection(docs, tolerance), separators=(",", ":"), default=str).encode("utf-8")
+
+def run(label, docs, tolerance):
+    print(f"\n{label}")
+    print(f"  {'format':<10} {'encode ms':>10} {'bytes':>10} {'gzip bytes':>11} {'decode ms':>10}")
+    formats = (
+        ("json", lambda: encode_json(docs, tolerance), json.loads),
+        ("protobuf", lambda: notam_pbf.encode_feature_collection(docs, tolerance), notam_pbf.decode_feature_collection),
+    )
+    for name, encode, decode in formats:
+        encode_time, body = best_of(encode)
+        decode_time, _ = best_of(lambda: decode(body))
+        print(f"  {name:<10} {encode_time * 1000:10.1f} {len(body):10d} {len(gzip.compress(body, 6)):11d} {decode_time * 1000:10.1f}")
+
+if __name__ == "__main__":
+    docs = build_docs()
+    print(f"Response format benchmark: {len(docs)} features, best of {ROUNDS}")
+    print("(protobuf decode uses the pure-Python reference decoder; generated protoc clients are faster)")
+    run("full resolution", docs, None)
+    run("zoom 8", docs, GeoJsonConverter.tolerance_for_zoom(8, 42.5))
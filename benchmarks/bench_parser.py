@@ -0,0 +1,66 @@
+import sys
+import os
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import defusedxml.ElementTree as ET
+from app.xml_parser import NS
+from app.notam_text_parser import NotamTextParser
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+ROUNDS = int(os.getenv("BENCH_ROUNDS", "500"))
+REPEATS = int(os.getenv("BENCH_REPEATS", "5"))
+
+def load_samples():
+    """
+    Returns (translation_text, raw_text) pairs for every NOTAM in the sample dump.
+    """
+    samples = []
+    root = ET.parse(DUMP_FILE).getroot()
+    for notam_node in root.iter(f"{{{NS['event']}}}NOTAM"):
+        text = notam_node.findtext("event:text", default="", namespaces=NS)
+        translation_node = notam_node.find(".//event:translation/event:NOTAMTranslation/event:formattedText", NS)
+        full_text = "".join(translation_node.itertext()) if translation_node is not None else text
+        samples.append((full_text.replace("<pre>", "").replace("</pre>", ""), text))
+    return samples
+
+def legacy_parse(full_text, text):
+    # Pre-tokenizer path: separate regex scans per field, Q-line searched twice
+    q_line_data = NotamTextParser.parse_q_line(full_text)
+    if not q_line_data and text:
+        q_line_data = NotamTextParser.parse_q_line(text.replace('\n', ' ').replace('\r', ' '))
+    NotamTextParser.parse_validity_times(full_text)
+    category = q_line_data['category'] if q_line_data else "Other"
+    NotamTextParser.parse_e_field(text, category)
+
+def tokenized_parse(full_text, text):
+    fields = NotamTextParser.tokenize(full_text)
+    q_line_data = NotamTextParser.parse_q_field(fields.get("Q"))
+    if not q_line_data and text and "Q)" in text:
+        q_line_data = NotamTextParser.parse_q_field(NotamTextParser.tokenize(text).get("Q"))
+    NotamTextParser.parse_validity_fields(fields, full_text)
+    category = q_line_data['category'] if q_line_data else "Other"
+    NotamTextParser.parse_e_field(fields.get("E") or text, category)
+
+def run(label, fn, samples):
+    # Best of REPEATS to keep scheduler noise out of the comparison
+    best = None
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            for full_text, text in samples:
+                fn(full_text, text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    per_notam_us = best / (ROUNDS * len(samples)) * 1e6
+    print(f"{label:<12} {per_notam_us:8.2f} us/NOTAM")
+    return per_notam_us
+
+if __name__ == "__main__":
+    samples = load_samples()
+    print(f"Text parsing benchmark: {len(samples)} NOTAMs x {ROUNDS} rounds (best of {REPEATS})")
+    legacy = run("legacy", legacy_parse, samples)
+    tokenized = run("tokenized", tokenized_parse, samples)
+    print(f"Speedup: {legacy / tokenized:.2f}x")
@@ -0,0 +1,91 @@
+import sys
+import os
+import random
+import shutil
+import tempfile
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+NOTAMS = int(os.getenv("BENCH_NOTAMS", "20000"))
+QUERIES = int(os.getenv("BENCH_QUERIES", "500"))
+BATCH_SIZE = 1000
+BENCH_DB_NAME = "notam_bench"  # Mongo database used (and dropped) by the benchmark
+
+# Workload area: roughly the contiguous US
+MIN_LON, MAX_LON, MIN_LAT, MAX_LAT = -124.0, -67.0, 25.0, 49.0
+
+def build_workload(seed=42):
+    """
+    Synthetic NOTAMs (sample documents scattered over the workload area) plus
+    query points. Same seed -> same workload for every backend.
+    """
+    rng = random.Random(seed)
+    samples = list(parse_notam_xml(DUMP_FILE))
+    docs = []
+    for i in range(NOTAMS):
+        doc = dict(rng.choice(samples))
+        doc["notam_id"] = f"BENCH_{i}"
+        doc["location"] = {"type": "Point", "coordinates": [rng.uniform(MIN_LON, MAX_LON), rng.uniform(MIN_LAT, MAX_LAT)]}
+        docs.append(doc)
+    points = [(rng.uniform(MIN_LAT, MAX_LAT), rng.uniform(MIN_LON, MAX_LON)) for _ in range(QUERIES)]
+    codes = sorted({doc["icao_location"] for doc in samples})[:5]
+    return docs, points, codes
+
+def timed(label, fn, count):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<28} {elapsed * 1e6 / count:10.1f} us/op")
+    return result
+
+def run(db, docs, points, codes):
+    db.clear_db()
+
+    def load():
+        for i in range(0, len(docs), BATCH_SIZE):
+            db.upsert_many(docs[i:i + BATCH_SIZE])
+
+    def nearby():
+        return sum(len(db.search_nearby(lat, lon, 25)) for lat, lon in points)
+
+    def bbox():
+        return sum(len(db.search_bbox(lon - 0.5, lat - 0.5, lon + 0.5, lat + 0.5)) for lat, lon in points)
+
+    def icao():
+        return sum(len(found) for _ in range(QUERIES // 10) for found in db.search_by_icao(codes).values())
+
+    timed("upsert_many (per NOTAM)", load, len(docs))
+    hits = timed("search_nearby 25 NM", nearby, len(points))
+    timed("search_bbox 1x1 deg", bbox, len(points))
+    timed("search_by_icao (5 codes)", icao, QUERIES // 10)
+    timed("get_count", db.get_count, 1)
+    print(f"  ({hits} nearby hits, {db.get_count()} documents)")
+
+if __name__ == "__main__":
+    docs, points, codes = build_workload()
+    print(f"Storage benchmark: {len(docs)} NOTAMs, {len(points)} queries")
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        print("\nsqlite (R*Tree)")
+        run(DBManager("sqlite", path=os.path.join(tmp_dir, "bench.sqlite")), docs, points, codes)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    mongo = DBManager("mongo", db_name=BENCH_DB_NAME)
+    try:
+        import pymongo
+        with pymongo.timeout(3):
+            mongo.ping()
+    except Exception as e:
+        print(f"\nmongo: skipped (not reachable: {type(e).__name__})")
+    else:
+        print("\nmongo (2dsphere)")
+        run(mongo, docs, points, codes)
+        mongo.client.drop_database(BENCH_DB_NAME)
@@ -8,6 +8,9 @@ from solace.messaging.messaging_service import MessagingService, ReconnectionLis
 from solace.messaging.resources.queue import Queue
 from solace.messaging.receiver.message_receiver import MessageHandler, InboundMessage
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.snapshot_store import SnapshotWriter, INDEX_FILENAME
+
 load_dotenv()
 
 # Constants
@@ -19,7 +22,8 @@ if not os.path.exists(DATA_DIR):
     except OSError:
         pass # Might be read-only or exists
         
-OUTPUT_FILE = os.path.join(DATA_DIR, "raw_notam_dump.xml")
+INDEX_FILE = os.path.join(DATA_DIR, INDEX_FILENAME)
+APPEND = os.getenv("SNAPSHOT_APPEND", "false").lower() == "true"  # Keep previous segments and add new ones
 TIMEOUT_SECONDS = 60  # Initial wait time
 SILENCE_TIMEOUT = 5   # Stop if no new messages for X seconds
 
@@ -34,7 +38,8 @@ class ServiceEventHandler(ReconnectionListener):
         print(f"Service interrupted: {e}")
 
 class MessageDumper(MessageHandler):
-    def __init__(self):
+    def __init__(self, writer):
+        self.writer = writer
         self.message_count = 0
         self.last_message_time = time.time()
 
@@ -44,25 +49,14 @@ class MessageDumper(MessageHandler):
         
         payload = message.get_payload_as_string() if message.get_payload_as_string() else str(message.get_payload_as_bytes())
         
-        # Strip XML Declaration to allow concatenation
-        if payload.strip().startswith("<?xml"):
-            try:
-                # Find end of declaration ?>
-                idx = payload.find("?>")
-                if idx != -1:
-                    payload = payload[idx+2:]
-            except Exception:
-                pass 
-
         # Determine payload size/info
         size = len(payload)
         sys.stdout.write(f"\r[INFO] Messages Received: {self.message_count} (Last size: {size})")
         sys.stdout.flush()
         
-        # Append to file
+        # Append to the active segment (buffered, compressed, rotated by size)
         try:
-            with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
-                f.write(payload + "\n")
+            self.writer.write(payload)
         except Exception as e:
             print(f"\n[ERROR] Failed to write message: {e}")
 
@@ -84,17 +78,16 @@ def main():
     messaging_service.connect()
     print("Connected to Solace Broker.")
 
-    # Initialize Output File with Root Tag
-    print(f"Preparing {OUTPUT_FILE} for FNS Initial Load...")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        f.write("<FNS_Snapshot>\n")
+    # Initialize Segmented Capture
+    print(f"Preparing snapshot segments in {DATA_DIR} for FNS Initial Load...")
+    writer = SnapshotWriter(DATA_DIR, append=APPEND)
 
     # Create Queue Receiver
     durable_exclusive_queue = Queue.durable_exclusive_queue(queue_name)
     receiver = messaging_service.create_persistent_message_receiver_builder().build(durable_exclusive_queue)
     receiver.start()
     
-    msg_handler = MessageDumper()
+    msg_handler = MessageDumper(writer)
     print(f"Listening on queue: {queue_name}...")
     print(f"Waiting for stream... (Timeout: {TIMEOUT_SECONDS}s, Silence Stop: {SILENCE_TIMEOUT}s)")
     
@@ -129,12 +122,11 @@ def main():
         receiver.terminate()
         messaging_service.disconnect()
         
-        # Close Root Tag
-        with open(OUTPUT_FILE, "a", encoding="utf-8") as f:
-            f.write("</FNS_Snapshot>\n")
+        # Seal the active segment and finalize the index
+        writer.close()
             
         print(f"Disconnected. Total messages captured: {msg_handler.message_count}")
-        print(f"Data saved to {OUTPUT_FILE}")
+        print(f"Data saved to {DATA_DIR} (index: {INDEX_FILE})")
 
 if __name__ == "__main__":
     main()
@@ -1,39 +1,164 @@
 
 import sys
 import os
+import argparse
+import logging
+import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from app.xml_parser import parse_notam_xml
-from app.db_manager import DBManager
+from app.xml_parser import parse_notam_str
+from app.db_manager import DBManager, STORAGE_BACKEND
+from app.snapshot_store import describe_sources, iter_messages
+from app.parse_cache import ParseCache
+from app.partition_router import normalize_fir
+from app.structured_log import configure as configure_logging
 
-def load_xml_to_db(file_path):
-    print(f"Loading data from {file_path}...")
+BATCH_SIZE = int(os.getenv("LOAD_BATCH_SIZE", "1000"))
+
+logger = logging.getLogger(__name__)
+
+def write_batches(db, docs):
+    """
+    Upserts documents in bulk batches. Returns the number written.
+    """
+    count = 0
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            count += db.upsert_many(batch)
+            batch = []
+    if batch:
+        count += db.upsert_many(batch)
+    return count
+
+def load_source(db, source, checkpoint=None, cache_writer=None):
+    """
+    Streams one snapshot file into the DB, resuming after its checkpoint.
+    The checkpoint only advances once the batch containing a message is written,
+    so a crash re-loads at most one batch (upserts make that harmless).
+    """
+    source_id = source["source_id"]
+    offset = checkpoint["offset"] if checkpoint else 0
+    messages = checkpoint["messages"] if checkpoint else 0
+    
+    logger.info("Loading snapshot file", extra={"path": source["path"], "offset": offset, "messages_loaded": messages})
+    
+    count = 0
+    batch = []
+    for end_offset, xml_str in iter_messages(source["path"], offset):
+        for doc in parse_notam_str(xml_str):
+            batch.append(doc)
+            if cache_writer:
+                cache_writer.append(doc)
+        offset = end_offset
+        messages += 1
+        
+        if len(batch) >= BATCH_SIZE:
+            count += db.upsert_many(batch)
+            batch = []
+            db.save_checkpoint(source_id, offset, messages)
+            
+    count += db.upsert_many(batch)
+    db.save_checkpoint(source_id, offset, messages, complete=source["sealed"])
     
+    if cache_writer:
+        cache_writer.sources[source_id] = {"offset": offset, "messages": messages, "complete": source["sealed"]}
+    return count
+
+def load_snapshot_to_db(sources, cache_dir, use_cache=True, full=False):
     db = DBManager()
     db.init_db()
     
-    count = 0
-    for notam in parse_notam_xml(file_path):
-        db.insert_notam(notam)
-        count += 1
+    if full:
+        print("Full reload requested, discarding load checkpoints.")
+        db.reset_checkpoints()
+    
+    started = time.time()
+    checkpoints = db.get_checkpoints()
+    cache = ParseCache(cache_dir)
+    
+    if not checkpoints:
+        key = cache.key_for([s["path"] for s in sources])
+        
+        if use_cache and cache.matches(key):
+            # Input and parser unchanged: skip XML parsing entirely
+            print(f"Parsed cache is current ({cache.path}), bulk loading...")
+            total = write_batches(db, cache.iter_docs())
+            for source_id, state in cache.manifest()["sources"].items():
+                db.save_checkpoint(source_id, state["offset"], state["messages"], state["complete"])
+        else:
+            # Loading from zero: rebuild the cache as a by-product
+            print("Parsing snapshot (cache missing or stale)...")
+            with cache.writer(key) as cache_writer:
+                total = sum(load_source(db, source, cache_writer=cache_writer) for source in sources)
+            print(f"Parsed cache written to {cache.path}")
+    else:
+        # Catch-up: skip completed segments, resume partial ones
+        total = 0
+        for source in sources:
+            checkpoint = checkpoints.get(source["source_id"])
+            if checkpoint and checkpoint.get("complete"):
+                continue
+            total += load_source(db, source, checkpoint)
         
-    print(f"Successfully loaded {count} NOTAMs into MongoDB.")
+    elapsed = time.time() - started
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"Loaded {total} NOTAMs from {len(sources)} file(s) in {elapsed:.1f}s ({rate:.0f}/s).")
     print(f"Total documents in DB: {db.get_count()}")
 
+def reload_partition(sources, cache_dir, fir, use_cache=True):
+    """
+    Rebuilds a single FIR partition without touching the others.
+    Uses the parsed cache when it is current, otherwise re-parses the snapshot.
+    Load checkpoints are left alone: they describe the whole snapshot.
+    """
+    if STORAGE_BACKEND != "mongo":
+        print("Error: --fir requires STORAGE_BACKEND=mongo (FIR partitions are Mongo-only).")
+        sys.exit(1)
+    db = DBManager(partition_by_fir=True)
+    fir = normalize_fir(fir)
+    db.clear_partition(fir)
+    
+    started = time.time()
+    cache = ParseCache(cache_dir)
+    key = cache.key_for([s["path"] for s in sources])
+    
+    if use_cache and cache.matches(key):
+        print(f"Reloading partition {fir} from parsed cache ({cache.path})...")
+        docs = cache.iter_docs()
+    else:
+        print(f"Reloading partition {fir} by parsing snapshot...")
+        docs = (
+            doc
+            for source in sources
+            for _, xml_str in iter_messages(source["path"])
+            for doc in parse_notam_str(xml_str)
+        )
+    
+    total = write_batches(db, (doc for doc in docs if normalize_fir(doc.get("fir")) == fir))
+    elapsed = time.time() - started
+    print(f"Reloaded {total} NOTAMs into partition {fir} in {elapsed:.1f}s.")
+
 
 if __name__ == "__main__":
-    # Check for file in data dir or current dir
+    parser = argparse.ArgumentParser(description="Load captured NOTAM snapshot into the database")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-parse XML, ignoring the parsed-document cache")
+    parser.add_argument("--full", action="store_true", help="Ignore load checkpoints and reload every segment from the start")
+    parser.add_argument("--fir", help="Reload only this FIR partition (requires STORAGE_BACKEND=mongo; always writes to the FIR partitions, even without NOTAM_PARTITION_BY_FIR)")
+    args = parser.parse_args()
+    configure_logging(use_queue=True)
+    
+    # Check for segments (snapshot_index.json) or legacy dump in data dir or current dir
     data_dir = os.getenv("DATA_DIR", "data")
-    filename = "raw_notam_dump.xml"
     
-    path = os.path.join(data_dir, filename)
-    if not os.path.exists(path):
-        # Fallback to current dir
-        if os.path.exists(filename):
-            path = filename
-        else:
-            # Ensure data dir exists if we are going to write (this is load, so read)
-            # If neither exists, error
-            print(f"Error: Could not find {filename} in {data_dir} or .")
-            sys.exit(1)
-            
-    load_xml_to_db(path)
+    sources = describe_sources(data_dir)
+    if not sources:
+        print(f"Error: Could not find a snapshot index or raw_notam_dump.xml in {data_dir} or .")
+        sys.exit(1)
+    
+    # Cache lives next to the snapshot it was built from
+    cache_dir = os.path.dirname(os.path.abspath(sources[0]["path"]))
+    if args.fir:
+        reload_partition(sources, cache_dir, args.fir, use_cache=not args.no_cache)
+    else:
+        load_snapshot_to_db(sources, cache_dir, use_cache=not args.no_cache, full=args.full)
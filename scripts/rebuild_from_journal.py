@@ -0,0 +1,114 @@
+import sys
+import os
+import argparse
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from app.xml_parser import parse_notam_str
+from app.db_manager import DBManager
+from app.journal import JOURNAL_DIR, iter_records
+from app.structured_log import configure as configure_logging
+from scripts.load_data import write_batches
+
+REBUILD_WORKERS = int(os.getenv("REBUILD_WORKERS", str(os.cpu_count() or 1)))
+CHUNK_MESSAGES = 200  # Payloads handed to a parse worker at a time
+
+def parse_chunk(records):
+    """
+    Parses a chunk of (received_at, payload) records into NOTAM documents.
+    Runs in a worker process.
+    """
+    docs = []
+    for received_at, payload in records:
+        received_iso = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(received_at))
+        for doc in parse_notam_str(payload):
+            doc["received_at"] = received_iso
+            docs.append(doc)
+    return docs
+
+def iter_chunks(records, size=CHUNK_MESSAGES):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def parse_parallel(executor, chunks, workers):
+    """
+    Yields parsed documents in journal order while keeping at most 2 chunks per
+    worker in flight, so parsing overlaps the DB writes without reading the
+    whole journal ahead.
+    """
+    pending = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(parse_chunk, chunk))
+        if len(pending) >= workers * 2:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+def rebuild(db, journal_dir=JOURNAL_DIR, until=None, workers=REBUILD_WORKERS):
+    """
+    Replays journaled payloads received up to `until` (epoch seconds, None for
+    everything) through the parser into db. Parsing fans out over `workers`
+    processes; documents are bulk-written in LOAD_BATCH_SIZE batches as chunks complete.
+    Returns (messages, NOTAMs written).
+    """
+    counts = {"messages": 0}
+
+    def counted(records):
+        for record in records:
+            counts["messages"] += 1
+            yield record
+
+    chunks = iter_chunks(counted(iter_records(journal_dir, until)))
+    if workers > 1:
+        # Workers log directly: a forked copy of the parent's queue handler has no listener draining it
+        with ProcessPoolExecutor(max_workers=workers, initializer=configure_logging) as executor:
+            total = write_batches(db, parse_parallel(executor, chunks, workers))
+    else:
+        total = write_batches(db, (doc for chunk in chunks for doc in parse_chunk(chunk)))
+    return counts["messages"], total
+
+def parse_until(value):
+    """
+    ISO-8601 timestamp (UTC if no offset) -> epoch seconds.
+    """
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the NOTAM database from the listener's raw message journal")
+    parser.add_argument("--journal-dir", default=JOURNAL_DIR, help=f"Journal directory (default {JOURNAL_DIR})")
+    parser.add_argument("--until", help="Only replay messages received at or before this ISO-8601 time (UTC), e.g. 2025-12-17T06:00:00Z")
+    parser.add_argument("--workers", type=int, default=REBUILD_WORKERS, help="Parse worker processes")
+    parser.add_argument("--keep", action="store_true", help="Replay onto the current data instead of clearing the DB first")
+    args = parser.parse_args()
+    configure_logging(use_queue=True)
+
+    until = parse_until(args.until) if args.until else None
+    if until is not None and args.keep:
+        print("Error: --until rebuilds a point in time and cannot be combined with --keep.")
+        sys.exit(1)
+
+    db = DBManager()
+    if args.keep:
+        db.init_db()
+    else:
+        print("Clearing database before rebuild...")
+        db.clear_db()
+
+    started = time.time()
+    messages, total = rebuild(db, args.journal_dir, until, args.workers)
+    elapsed = time.time() - started
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"Replayed {messages} messages ({total} NOTAMs) from {args.journal_dir} in {elapsed:.1f}s ({rate:.0f}/s).")
+    print(f"Total documents in DB: {db.get_count()}")
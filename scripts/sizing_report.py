@@ -0,0 +1,76 @@
+import argparse
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import bson
+from app.xml_parser import parse_notam_str
+from app.snapshot_store import list_sources, iter_messages
+from app import storage_schema
+
+def document_sizes(sources):
+    """
+    Returns BSON bytes per NOTAM for the readable (legacy) and compact layouts.
+    """
+    count = 0
+    legacy_bytes = 0
+    compact_bytes = 0
+    text_bytes = 0
+    text_stored_bytes = 0
+    
+    for path in sources:
+        for _, xml_str in iter_messages(path):
+            for doc in parse_notam_str(xml_str):
+                stored = storage_schema.to_storage(doc)
+                count += 1
+                legacy_bytes += len(bson.encode(doc))
+                compact_bytes += len(bson.encode(stored))
+                text_bytes += len(doc.get("text", "").encode("utf-8"))
+                text_stored_bytes += len(stored.get(storage_schema.TEXT_KEY, b"")) + len(stored.get(storage_schema.PLAIN_TEXT_KEY, "").encode("utf-8"))
+                
+    return count, legacy_bytes, compact_bytes, text_bytes, text_stored_bytes
+
+def collection_sizes():
+    """
+    On-disk bytes per NOTAM for the live collection (data after block compression, plus indexes).
+    """
+    from app.mongo_storage import MongoStorage, COLLECTION_NAME
+    db = MongoStorage()
+    stats = db.db.command("collStats", COLLECTION_NAME)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Report bytes per NOTAM for the legacy vs compact storage layouts")
+    parser.add_argument("--db", action="store_true", help="Also report on-disk sizes from the live MongoDB collection")
+    args = parser.parse_args()
+    
+    data_dir = os.getenv("DATA_DIR", "data")
+    sources = list_sources(data_dir)
+    if not sources:
+        print(f"Error: Could not find a snapshot index or raw_notam_dump.xml in {data_dir} or .")
+        sys.exit(1)
+        
+    count, legacy_bytes, compact_bytes, text_bytes, text_stored_bytes = document_sizes(sources)
+    if not count:
+        print("No NOTAMs found.")
+        sys.exit(1)
+    
+    print(f"\n--- Document Sizing ({count} NOTAMs) ---")
+    print(f"Legacy layout (BSON):  {legacy_bytes / count:8.1f} bytes/NOTAM")
+    print(f"Compact layout (BSON): {compact_bytes / count:8.1f} bytes/NOTAM  ({100 * (1 - compact_bytes / legacy_bytes):.0f}% smaller)")
+    print(f"Text raw:              {text_bytes / count:8.1f} bytes/NOTAM")
+    print(f"Text stored:           {text_stored_bytes / count:8.1f} bytes/NOTAM")
+    
+    if args.db:
+        stats = collection_sizes()
+        if stats.get("count"):
+            n = stats["count"]
+            print(f"\n--- Live Collection ({n} documents) ---")
+            print(f"Avg object size:       {stats.get('avgObjSize', 0):8.1f} bytes")
+            print(f"Storage (compressed):  {stats.get('storageSize', 0) / n:8.1f} bytes/NOTAM")
+            print(f"Indexes:               {stats.get('totalIndexSize', 0) / n:8.1f} bytes/NOTAM")
+        else:
+            print("\nLive collection is empty.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+import json
+from urllib.parse import urlencode
+
+# Minimal in-process ASGI client (the httpx-based TestClient is not a dependency)
+
+def call(app, method, path, params=None, headers=None, body=None):
+    """
+    Sends one HTTP request to an ASGI app.
+    Returns (status, {lower-case header: value}, body bytes).
+    """
+    return asyncio.run(call_async(app, method, path, params, headers, body))
+
+async def call_async(app, method, path, params=None, headers=None, body=None):
+    """
+    Same as call(), inside a running event loop (e.g. to send concurrent requests with gather).
+    """
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    raw_headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()]
+    if body is not None:
+        raw_headers.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("latin-1"),
+        "query_string": urlencode(params or {}, doseq=True).encode("latin-1"),
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    messages = [{"type": "http.request", "body": payload, "more_body": False}]
+    response = {"headers": {}, "body": b""}
+
+    async def receive():
+        return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode("latin-1"): v.decode("latin-1") for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
@@ -0,0 +1,250 @@
+import copy
+import itertools
+import re
+from pymongo import DeleteOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Minimal in-memory stand-in for the pymongo collection API used by MongoStorage
+# (no MongoDB server in the test environment). Supports the query and update
+# operators the storage code uses; geo queries and aggregations are not.
+
+_MISSING = object()
+_ids = itertools.count(1)
+
+
+def _get(doc, path):
+    value = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, op, operand):
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$ne":
+        return not _compare(value, "$eq", operand)
+    if op == "$eq":
+        if operand is None:
+            return value is _MISSING or value is None
+        return value == operand or (isinstance(value, list) and operand in value)
+    if op == "$in":
+        return any(_compare(value, "$eq", item) for item in operand)
+    if op == "$all":
+        return isinstance(value, list) and all(item in value for item in operand)
+    if op == "$regex":
+        return isinstance(value, str) and re.search(operand, value) is not None
+    if op == "$elemMatch":
+        return isinstance(value, list) and any(matches(item, operand) for item in value)
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        candidates = value if isinstance(value, list) else [value]
+        for candidate in candidates:
+            if candidate is _MISSING or candidate is None or type(candidate) is not type(operand) and not (
+                isinstance(candidate, (int, float)) and isinstance(operand, (int, float))
+            ):
+                continue
+            if {"$gt": candidate > operand, "$gte": candidate >= operand,
+                "$lt": candidate < operand, "$lte": candidate <= operand}[op]:
+                return True
+        return False
+    raise NotImplementedError(f"fake_mongo does not support {op}")
+
+
+def matches(doc, query):
+    """
+    True if doc matches a find() filter.
+    """
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+            if not all(_compare(_get(doc, key), op, operand) for op, operand in condition.items()):
+                return False
+        elif not _compare(_get(doc, key), "$eq", condition):
+            return False
+    return True
+
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+
+class InsertOneResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+
+class FakeCursor(list):
+    def sort(self, key, direction=1):
+        present = [doc for doc in self if _get(doc, key) is not _MISSING]
+        absent = [doc for doc in self if _get(doc, key) is _MISSING]
+        ordered = sorted(present, key=lambda doc: _get(doc, key), reverse=direction < 0)
+        return FakeCursor(ordered + absent if direction > 0 else absent + ordered)
+
+    def limit(self, count):
+        return FakeCursor(self[:count] if count else self)
+
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self.db = db
+        self.name = name
+        self.docs = []
+        self.unique_keys = set()
+        self.queries = []  # Every find() filter, for tests that count round trips
+
+    def create_index(self, keys, unique=False, **options):
+        if unique:
+            self.unique_keys.add(keys[0][0])
+
+    def drop_index(self, keys):
+        self.unique_keys.discard(keys[0][0])
+
+    def drop(self):
+        self.db.created.discard(self.name)
+        self.docs = []
+        self.unique_keys = set()
+
+    def _project(self, doc, projection):
+        if not projection:
+            return copy.deepcopy(doc)
+        keys = projection if isinstance(projection, (list, tuple)) else [k for k, v in projection.items() if v]
+        return {key: copy.deepcopy(doc[key]) for key in ["_id", *keys] if key in doc}
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query or {})
+        return FakeCursor(self._project(doc, projection) for doc in self.docs if matches(doc, query or {}))
+
+    def find_one(self, query=None, projection=None, sort=None):
+        cursor = self.find(query, projection)
+        for key, direction in sort or ():
+            cursor = cursor.sort(key, direction)
+        return cursor[0] if cursor else None
+
+    def count_documents(self, query):
+        return len(self.find(query))
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+    def _apply(self, doc, update):
+        for key, value in update.get("$set", {}).items():
+            doc[key] = copy.deepcopy(value)
+        for key in update.get("$unset", {}):
+            doc.pop(key, None)
+        for key, value in update.get("$inc", {}).items():
+            doc[key] = doc.get(key, 0) + value
+        for key, value in update.get("$max", {}).items():
+            doc[key] = max(doc.get(key, value), value)
+
+    def _check_unique(self, doc, ignore=None):
+        for key in self.unique_keys:
+            if any(other is not ignore and other.get(key) == doc.get(key) for other in self.docs):
+                raise DuplicateKeyError(f"duplicate {key}", 11000)
+
+    def _insert(self, doc):
+        doc.setdefault("_id", next(_ids))
+        self._check_unique(doc)
+        self.docs.append(doc)
+        self.db.created.add(self.name)
+
+    def insert_one(self, doc):
+        doc = copy.deepcopy(doc)
+        self._insert(doc)
+        return InsertOneResult(doc["_id"])
+
+    def update_one(self, query, update, upsert=False):
+        for doc in self.docs:
+            if matches(doc, query):
+                updated = copy.deepcopy(doc)
+                self._apply(updated, update)
+                self._check_unique(updated, ignore=doc)
+                doc.clear()
+                doc.update(updated)
+                return doc
+        if upsert:
+            doc = {key: value for key, value in query.items() if not key.startswith("$") and not isinstance(value, dict)}
+            self._apply(doc, update)
+            self._insert(doc)
+            return doc
+        return None
+
+    def find_one_and_update(self, query, update, upsert=False, return_document=ReturnDocument.BEFORE):
+        before = self.find_one(query)
+        after = self.update_one(query, update, upsert)
+        return copy.deepcopy(after) if return_document == ReturnDocument.AFTER else before
+
+    def replace_one(self, query, replacement, upsert=False):
+        if self.delete_one(query).deleted_count or upsert:
+            self._insert(copy.deepcopy(replacement))
+
+    def delete_one(self, query):
+        for i, doc in enumerate(self.docs):
+            if matches(doc, query):
+                del self.docs[i]
+                return DeleteResult(1)
+        return DeleteResult(0)
+
+    def delete_many(self, query):
+        before = len(self.docs)
+        self.docs = [doc for doc in self.docs if not matches(doc, query)]
+        return DeleteResult(before - len(self.docs))
+
+    def bulk_write(self, ops, ordered=True):
+        errors = []
+        for index, op in enumerate(ops):
+            try:
+                if isinstance(op, UpdateOne):
+                    self.update_one(op._filter, op._doc, op._upsert)
+                elif isinstance(op, DeleteOne):
+                    self.delete_one(op._filter)
+                else:
+                    raise NotImplementedError(type(op).__name__)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+
+class FakeDatabase(dict):
+    def __init__(self):
+        super().__init__()
+        self.created = set()  # Collections that exist (created or written to, and not dropped)
+
+    def __missing__(self, name):
+        self[name] = FakeCollection(self, name)
+        return self[name]
+
+    def list_collection_names(self, filter=None):
+        pattern = ((filter or {}).get("name") or {}).get("$regex")
+        return [name for name in sorted(self.created) if pattern is None or re.search(pattern, name)]
+
+    def create_collection(self, name, **options):
+        self.created.add(name)
+        return self[name]
+
+
+class FakeAdmin:
+    def command(self, name):
+        return {"ok": 1}
+
+
+class FakeClient:
+    """
+    Drop-in for pymongo.MongoClient(uri): one in-memory database per name.
+    """
+    def __init__(self, uri=None, **options):
+        self.databases = {}
+        self.admin = FakeAdmin()
+
+    def __getitem__(self, name):
+        return self.databases.setdefault(name, FakeDatabase())
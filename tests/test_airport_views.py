@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, airport_views
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestAirportViews(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.docs = list(parse_notam_xml(DUMP_FILE))
+        self.db.upsert_many(self.docs)
+        self.icao = self.docs[0]["icao_location"]
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def new_notam(self, notam_id, icao):
+        return {"notam_id": notam_id, "icao_location": icao, "radius_nm": 1,
+                "location": {"type": "Point", "coordinates": [-71.0, 42.36]}}
+
+    def test_writes_invalidate_only_their_airport(self):
+        airport_views.refresh(self.db, [self.icao, "KXYZ"])
+        view = self.db.get_airport_view(self.icao)
+        self.assertIsNotNone(view["body"])
+        other = self.db.get_airport_view("KXYZ")
+
+        self.db.insert_notam(self.new_notam("NEW", self.icao))
+        stale = self.db.get_airport_view(self.icao)
+        self.assertIsNone(stale["body"])
+        self.assertEqual(stale["version"], view["version"] + 1)
+        self.assertEqual(self.db.get_airport_view("KXYZ"), other)
+
+    def test_refresh_from_older_version_is_not_saved(self):
+        view = self.db.get_airport_view(self.icao)
+        self.db.insert_notam(self.new_notam("NEW", self.icao))
+        self.assertFalse(self.db.save_airport_view(self.icao, view["version"], "{}", 0, 1.0))
+        self.assertIsNone(self.db.get_airport_view(self.icao)["body"])
+
+    def test_endpoint(self):
+        status, headers, body = call(api.app, "GET", f"/api/airport/{self.icao.lower()}")
+        self.assertEqual(status, 200)
+        features = json.loads(body)["features"]
+        expected = {d["notam_id"] for d in self.docs if d["icao_location"] == self.icao and d.get("location")}
+        self.assertEqual({f["properties"]["notam_id"] for f in features}, expected)
+        self.assertIsNotNone(self.db.get_airport_view(self.icao)["body"])
+
+        # Unrelated writes keep the ETag valid
+        etag = headers["etag"]
+        self.db.insert_notam(self.new_notam("ELSEWHERE", "KXYZ"))
+        status, _, _ = call(api.app, "GET", f"/api/airport/{self.icao}", headers={"If-None-Match": etag})
+        self.assertEqual(status, 304)
+
+        self.db.insert_notam(self.new_notam("NEW", self.icao))
+        status, headers, body = call(api.app, "GET", f"/api/airport/{self.icao}", headers={"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertEqual(len(json.loads(body)["features"]), len(expected) + 1)
+
+        status, _, _ = call(api.app, "GET", "/api/airport/not-an-icao")
+        self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api
+from app.api import merge_batch_results
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class RecordingDB:
+    def __init__(self):
+        self.batches = []
+
+    def search_batch(self, points, icaos, filters=None):
+        self.batches.append((points, icaos))
+        return [[] for _ in points], {icao: [] for icao in icaos}
+
+class TestBatchSearch(unittest.TestCase):
+
+    def test_icao_location_extracted(self):
+        docs = list(parse_notam_xml(DUMP_FILE))
+        by_location = {doc["location_code"]: doc["icao_location"] for doc in docs}
+
+        # FAA 3-letter identifiers resolve to the ICAO indicator
+        self.assertEqual(by_location["BOS"], "KBOS")
+        self.assertEqual(by_location["TEB"], "KTEB")
+        self.assertTrue(all(len(doc["icao_location"]) == 4 for doc in docs))
+
+    def test_merge_dedupes_across_inputs(self):
+        shared = {"notam_id": "N1", "_id": "x"}
+        notams, results = merge_batch_results(
+            ["KBOS", "42.36,-71.0,10", "KBOS"],
+            [[shared, {"notam_id": "N2"}], [dict(shared)], [{"notam_id": "N2"}, {"notam_id": "N3"}]]
+        )
+
+        self.assertEqual(sorted(notams), ["N1", "N2", "N3"])
+        self.assertNotIn("_id", notams["N1"])
+        self.assertEqual(results["KBOS"], ["N1", "N2", "N3"])
+        self.assertEqual(results["42.36,-71.0,10"], ["N1"])
+
+    def test_out_of_range_points_rejected(self):
+        db = RecordingDB()
+        api._db = db
+        try:
+            for point in ({"lat": 91, "lon": 0}, {"lat": 0, "lon": -180.5}):
+                status, _, body = call(api.app, "POST", "/api/search/batch", body={"locations": [{"icao": "KBOS"}, point]})
+                self.assertEqual(status, 400, body)
+            self.assertEqual(db.batches, [])
+
+            status, _, _ = call(api.app, "POST", "/api/search/batch", body={"locations": [{"lat": -90, "lon": 180}]})
+            self.assertEqual(status, 200)
+            self.assertEqual(db.batches, [([(-90, 180, 10)], [])])
+        finally:
+            api._db = None
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, change_feed
+from app.db_manager import DBManager
+from app.notam_text_parser import NotamTextParser
+from app.xml_parser import parse_notam_xml, to_epoch
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+def notam(notam_id, number, lon=-71.0, lat=42.36, icao="KBOS", **extra):
+    return {"notam_id": notam_id, "number": number, "icao_location": icao, "notam_type": "N",
+            "radius_nm": 1, "location": {"type": "Point", "coordinates": [lon, lat]}, **extra}
+
+class TestParserFields(unittest.TestCase):
+
+    def test_header(self):
+        self.assertEqual(NotamTextParser.parse_header("A1888/25 NOTAMN"), ("N", None))
+        self.assertEqual(NotamTextParser.parse_header("A3913/25 NOTAMC A3909/25"), ("C", "A3909/2025"))
+        self.assertEqual(NotamTextParser.parse_header("plain text"), (None, None))
+
+    def test_expiry(self):
+        self.assertEqual(to_epoch("202512200348"), 1766202480)
+        self.assertEqual(to_epoch("2025-12-20T03:48:00"), 1766202480)
+        self.assertIsNone(to_epoch("202603170400EST"))
+        self.assertIsNone(to_epoch(""))
+
+    def test_dump(self):
+        docs = list(parse_notam_xml(DUMP_FILE))
+        cancel = next(doc for doc in docs if doc["number"] == "A3913/2025")
+        self.assertEqual((cancel["notam_type"], cancel["references"]), ("C", "A3909/2025"))
+        self.assertTrue(all(doc["references"] is None for doc in docs if doc["notam_type"] == "N"))
+
+class TestChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sequence_and_tombstones(self):
+        self.db.upsert_many([notam("A", "A0001/2025"), notam("B", "A0002/2025"), notam("C", "A0003/2025", icao="KJFK")])
+        full = self.db.get_changes(0)
+        self.assertEqual([doc["notam_id"] for doc in full["upserted"]], ["A", "B", "C"])
+        since = full["seq"]
+        self.assertEqual(self.db.get_changes(since)["upserted"], [])
+
+        # NOTAMR replaces A; B is updated; C is cancelled (same number elsewhere is untouched)
+        self.db.insert_notam(notam("B", "A0002/2025", text="updated"))
+        self.db.insert_notam(notam("R", "A0004/2025", notam_type="R", references="A0001/2025"))
+        self.db.insert_notam(notam("X", "A0005/2025", notam_type="C", references="A0003/2025"))
+        self.assertEqual(self.db.get_count(), 4)
+
+        page = self.db.get_changes(since)
+        self.assertEqual([doc["notam_id"] for doc in page["upserted"]], ["B", "R", "X"])
+        self.assertEqual([(tomb["notam_id"], tomb["reason"]) for tomb in page["removed"]], [("A", change_feed.REPLACED)])
+        self.assertEqual(page["seq"], max(doc["seq"] for doc in page["upserted"]))
+
+        # A NOTAM written again at a newer version is live again
+        self.assertTrue(self.db.insert_notam(notam("A", "A0001/2025", version="2")))
+        self.assertEqual(self.db.get_changes(page["seq"])["removed"], [])
+        self.assertEqual(self.db.get_changes(since)["removed"], [])
+
+    def test_stale_replay_after_cancel(self):
+        self.db.insert_notam(notam("N1", "A0001/2025", version="2"))
+        self.db.insert_notam(notam("X", "A0002/2025", notam_type="C", references="A0001/2025", version="1"))
+        since = self.db.get_changes(0)["seq"]
+
+        # An older (or the same) version delivered late, e.g. by another listener or a journal replay
+        self.assertFalse(self.db.insert_notam(notam("N1", "A0001/2025", version="1")))
+        self.assertEqual(self.db.upsert_many([notam("N1", "A0001/2025", version="2")]), 0)
+        self.assertEqual([doc["notam_id"] for doc in self.db.get_changes(0)["upserted"]], ["X"])
+        self.assertEqual([tomb["notam_id"] for tomb in self.db.get_changes(0)["removed"]], ["N1"])
+        self.assertEqual(self.db.get_changes(since)["upserted"], [])
+
+    def test_expiry_bbox_and_paging(self):
+        self.db.upsert_many([
+            notam("OLD", "A0001/2025", expires_at=1000.0),
+            notam("FAR", "A0002/2025", lon=10.0, lat=50.0, expires_at=1000.0),
+            notam("NEW", "A0003/2025", expires_at=9e9),
+        ])
+        since = self.db.get_changes(0)["seq"]
+        self.assertEqual(sorted(tomb["notam_id"] for tomb in self.db.expire_notams(2000.0)), ["FAR", "OLD"])
+        self.assertEqual(self.db.expire_notams(2000.0), [])
+
+        boston = [-72.0, 42.0, -70.0, 43.0]
+        self.assertEqual([tomb["notam_id"] for tomb in self.db.get_changes(since, boston)["removed"]], ["OLD"])
+        self.assertEqual([doc["notam_id"] for doc in self.db.get_changes(0, boston)["upserted"]], ["NEW"])
+
+        first = self.db.get_changes(since, limit=1)
+        self.assertTrue(first["more"])
+        second = self.db.get_changes(first["seq"], limit=1)
+        self.assertFalse(second["more"])
+        self.assertEqual(len(first["removed"] + second["removed"]), 2)
+
+    def test_reset_after_clear_and_prune(self):
+        self.db.insert_notam(notam("A", "A0001/2025", expires_at=1000.0))
+        since = self.db.get_changes(0)["seq"]
+        self.db.expire_notams(2000.0)
+        self.assertFalse(self.db.get_changes(since)["reset"])
+        self.assertEqual(self.db.prune_tombstones(9e9), 1)
+        self.assertTrue(self.db.get_changes(since)["reset"])
+        self.assertTrue(self.db.get_changes(10 ** 6)["reset"])  # Sequence from another database
+
+        self.db.clear_db()
+        self.db.insert_notam(notam("B", "A0002/2025"))
+        after_clear = self.db.get_changes(0)
+        self.assertFalse(after_clear["reset"])
+        self.assertEqual([doc["notam_id"] for doc in after_clear["upserted"]], ["B"])
+
+    def test_endpoint(self):
+        self.db.upsert_many([notam("A", "A0001/2025"), notam("B", "A0002/2025")])
+        status, headers, body = call(api.app, "GET", "/api/changes", {"since": 0, "bbox": "-72,42,-70,43"})
+        self.assertEqual(status, 200)
+        payload = json.loads(body)
+        self.assertEqual([f["properties"]["notam_id"] for f in payload["features"]["features"]], ["A", "B"])
+
+        status, _, _ = call(api.app, "GET", "/api/changes", {"since": 0, "bbox": "-72,42,-70,43"}, {"If-None-Match": headers["etag"]})
+        self.assertEqual(status, 304)
+
+        self.db.insert_notam(notam("C", "A0003/2025", notam_type="C", references="A0001/2025"))
+        api.data_version._value = None
+        status, _, body = call(api.app, "GET", "/api/changes", {"since": payload["seq"]})
+        delta = json.loads(body)
+        self.assertEqual([f["properties"]["notam_id"] for f in delta["features"]["features"]], ["C"])
+        self.assertEqual([tomb["notam_id"] for tomb in delta["removed"]], ["A"])
+        self.assertGreater(delta["seq"], payload["seq"])
+
+        status, _, _ = call(api.app, "GET", "/api/changes", {"bbox": "1,2,3"})
+        self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
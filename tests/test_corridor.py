@@ -0,0 +1,57 @@
+import sys
+import os
+import math
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import corridor
+
+def point_in_ring(point, ring):
+    x, y = point
+    inside = False
+    for (x1, y1), (x2, y2) in zip(ring, ring[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            inside = not inside
+    return inside
+
+class TestCorridor(unittest.TestCase):
+
+    def test_long_legs_are_split(self):
+        # BOS -> JFK is ~160 NM
+        segments = corridor.route_segments([[-71.0, 42.36], [-73.78, 40.64]], max_segment_nm=50)
+        self.assertEqual(len(segments), 4)
+        self.assertEqual(segments[0][0], [-71.0, 42.36])
+        self.assertAlmostEqual(segments[-1][1][0], -73.78)
+
+    def test_invalid_routes(self):
+        with self.assertRaises(ValueError):
+            corridor.route_segments([])
+        with self.assertRaises(ValueError):
+            corridor.route_segments([[179.0, 10.0], [-179.0, 10.0]])
+
+    def test_distance_to_route(self):
+        segments = corridor.route_segments([[0.0, 0.0], [1.0, 0.0]])
+        self.assertAlmostEqual(corridor.distance_to_route_nm([0.5, 0.1], segments), 6.0)
+        self.assertAlmostEqual(corridor.distance_to_route_nm([-0.1, 0.0], segments), 6.0)
+
+    def test_buffer_covers_corridor(self):
+        a, b = [-71.0, 42.36], [-71.5, 42.0]
+        ring = corridor.buffer_segment(a, b, 10)["coordinates"][0]
+        self.assertEqual(ring[0], ring[-1])
+
+        # Points just inside the buffer (including around the end caps) are covered
+        for i in range(72):
+            angle = math.radians(i * 5)
+            for centre in (a, b):
+                lat = centre[1] + 9.9 / 60 * math.sin(angle)
+                lon = centre[0] + 9.9 / 60 * math.cos(angle) / math.cos(math.radians(centre[1]))
+                self.assertTrue(point_in_ring([lon, lat], ring))
+        self.assertFalse(point_in_ring([-71.25, 42.6], ring))
+
+    def test_buffer_out_of_bounds(self):
+        self.assertIsNone(corridor.buffer_segment([179.9, 0.0], [179.9, 1.0], 20))
+
+if __name__ == '__main__':
+    unittest.main()
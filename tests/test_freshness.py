@@ -0,0 +1,78 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import freshness
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class TestFreshness(unittest.TestCase):
+
+    def test_parser_keeps_source_timestamps(self):
+        doc = next(parse_notam_xml(DUMP_FILE))
+        self.assertTrue(doc["issued"].startswith("2025-12-17T"))
+        self.assertGreaterEqual(freshness.source_time(doc), freshness.parse_iso_timestamp(doc["issued"]))
+
+    def test_parse_iso_timestamp(self):
+        self.assertEqual(freshness.parse_iso_timestamp("1970-01-01T00:01:00.000Z"), 60.0)
+        self.assertIsNone(freshness.parse_iso_timestamp(""))
+        self.assertIsNone(freshness.parse_iso_timestamp("not a date"))
+
+    def test_stage_breakdown(self):
+        clock = FakeClock(1000.0)
+        tracker = freshness.LagTracker(window_seconds=60, clock=clock)
+        tracker.record(source_at=900.0, received_at=990.0, parsed_at=990.5, persisted_at=992.0)
+        tracker.record(source_at=None, received_at=995.0, parsed_at=995.2, persisted_at=995.3)
+
+        stages = tracker.snapshot()["stages"]
+        self.assertEqual(stages["broker"]["max"], 90.0)
+        self.assertEqual(stages["total"]["max"], 92.0)
+        self.assertEqual(stages["parse"]["count"], 2)
+        self.assertAlmostEqual(stages["db"]["max"], 1.5)
+        # 90 s broker lag falls in the (60, 120] bucket
+        self.assertEqual(stages["broker"]["histogram"][freshness.BUCKETS.index(120)], 1)
+
+    def test_window_expiry(self):
+        clock = FakeClock(1000.0)
+        tracker = freshness.LagTracker(window_seconds=60, clock=clock)
+        tracker.record(900.0, 990.0, 990.0, 990.0)
+        clock.now = 1100.0
+        snapshot = tracker.snapshot()
+        self.assertEqual(snapshot["samples"], 0)
+        self.assertIsNone(snapshot["stages"]["total"]["max"])
+        self.assertEqual(snapshot["recorded_total"], 1)
+
+    def test_listener_snapshots_combined(self):
+        clock = FakeClock(1000.0)
+        trackers = [freshness.LagTracker(window_seconds=60, clock=clock) for _ in range(3)]
+        trackers[0].record(source_at=900.0, received_at=990.0, parsed_at=990.5, persisted_at=992.0)
+        trackers[1].record(source_at=990.0, received_at=992.0, parsed_at=992.0, persisted_at=993.0)
+        trackers[1].record(source_at=995.0, received_at=996.0, parsed_at=996.0, persisted_at=997.0)
+        trackers[2].record(source_at=0.0, received_at=880.0, parsed_at=880.0, persisted_at=880.0)
+        snapshots = [dict(tracker.snapshot(), listener=name) for tracker, name in zip(trackers, "abc")]
+        snapshots[2]["generated_at"] = 900.0  # Listener c stopped reporting
+
+        combined = freshness.combine(snapshots, now=1000.0)
+        total = combined["stages"]["total"]
+        self.assertEqual(combined["samples"], 3)
+        self.assertEqual(total["count"], 3)
+        self.assertEqual(total["max"], 92.0)
+        self.assertEqual(total["p95"], 92.0)
+        self.assertEqual(sum(total["histogram"]), 3)
+        self.assertEqual(combined["last_persisted_at"], 997.0)
+        self.assertEqual([(l["listener"], l["stale"]) for l in combined["listeners"]], [("a", False), ("b", False), ("c", True)])
+        self.assertIsNone(freshness.combine([]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import json
+import math
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.geojson_converter import GeoJsonConverter
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+def best_time(fn, rounds=50, repeats=5):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+class TestGeometrySimplification(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = list(parse_notam_xml(DUMP_FILE))
+
+    def test_vertex_count_follows_radius_and_tolerance(self):
+        self.assertEqual(GeoJsonConverter.vertices_for(5, None), GeoJsonConverter.DEFAULT_CIRCLE_POINTS)
+        self.assertEqual(GeoJsonConverter.vertices_for(1, 0.5), GeoJsonConverter.MIN_CIRCLE_POINTS)
+        self.assertLess(GeoJsonConverter.vertices_for(5, 0.25), GeoJsonConverter.vertices_for(50, 0.25))
+        self.assertEqual(GeoJsonConverter.vertices_for(300, 0.01), GeoJsonConverter.MAX_CIRCLE_POINTS)
+
+        # Chords stay within tolerance (unless clamped)
+        for radius, tolerance in ((5, 0.25), (25, 0.1), (100, 1.0)):
+            n = GeoJsonConverter.vertices_for(radius, tolerance)
+            if n < GeoJsonConverter.MAX_CIRCLE_POINTS:
+                self.assertLessEqual(radius * (1 - math.cos(math.pi / n)), tolerance)
+
+    def test_tolerance_and_precision_follow_zoom(self):
+        coarse = GeoJsonConverter.tolerance_for_zoom(6, 42)
+        fine = GeoJsonConverter.tolerance_for_zoom(12, 42)
+        self.assertAlmostEqual(coarse / fine, 64)
+        self.assertLess(GeoJsonConverter.precision_for(coarse), GeoJsonConverter.precision_for(fine))
+        self.assertIsNone(GeoJsonConverter.precision_for(None))
+
+        # Rounding error stays below the tolerance
+        tolerance = GeoJsonConverter.tolerance_for_zoom(8, 42)
+        self.assertLessEqual(0.5 * 10 ** -GeoJsonConverter.precision_for(tolerance) * 60, tolerance)
+
+    def test_small_circles_become_points(self):
+        doc = {"notam_id": "N1", "location": {"type": "Point", "coordinates": [-71.0, 42.0]}, "radius_nm": 2}
+        self.assertEqual(GeoJsonConverter.to_geojson_feature(doc)["geometry"]["type"], "Polygon")
+        self.assertEqual(GeoJsonConverter.to_geojson_feature(doc, tolerance_nm=3)["geometry"]["type"], "Point")
+
+    def test_viewport_payload_and_time_drop(self):
+        # Typical regional viewport (zoom 8) vs the fixed 32-vertex, full-precision output
+        tolerance = GeoJsonConverter.tolerance_for_zoom(8, 42)
+
+        def full():
+            return json.dumps(GeoJsonConverter.to_feature_collection(self.docs))
+
+        def simplified():
+            return json.dumps(GeoJsonConverter.to_feature_collection(self.docs, tolerance))
+
+        full_bytes, simplified_bytes = len(full()), len(simplified())
+        full_time, simplified_time = best_time(full), best_time(simplified)
+        print(f"\nzoom 8 viewport: {full_bytes} -> {simplified_bytes} bytes "
+              f"({100 * (1 - simplified_bytes / full_bytes):.0f}% smaller), "
+              f"{full_time * 1e3:.1f} -> {simplified_time * 1e3:.1f} ms per 50 conversions")
+
+        self.assertLess(simplified_bytes, full_bytes * 0.6)
+        self.assertLess(simplified_time, full_time)
+
+if __name__ == '__main__':
+    unittest.main()
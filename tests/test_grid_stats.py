@@ -0,0 +1,81 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestGridStats(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.docs = {doc["notam_id"]: doc for doc in parse_notam_xml(DUMP_FILE)}
+        self.db.upsert_many(self.docs.values())
+        api._db = self.db
+        api.data_version._value = None
+        api.grid_cache._entries.clear()
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def grid(self, **params):
+        status, _, body = call(api.app, "GET", "/api/stats/grid", params)
+        return status, json.loads(body)
+
+    def test_counts_per_cell(self):
+        # North-east US at 1 degree
+        status, grid = self.grid(min_lon=-80, min_lat=38, max_lon=-68, max_lat=46, cell=1)
+        self.assertEqual(status, 200)
+        self.assertEqual((grid["columns"], grid["rows"]), (12, 8))
+
+        expected = {}
+        for doc in self.docs.values():
+            lon, lat = (doc.get("location") or {}).get("coordinates", (None, None))
+            if lon is not None and -80 <= lon <= -68 and 38 <= lat <= 46:
+                key = (int(lon + 80), int(lat - 38))
+                expected[key] = expected.get(key, 0) + 1
+        self.assertEqual({(ix, iy): count for ix, iy, count in grid["cells"]}, expected)
+        self.assertEqual(grid["total"], sum(expected.values()))
+
+    def test_group_by_category(self):
+        _, plain = self.grid(min_lon=-180, min_lat=-90, max_lon=180, max_lat=90, cell=10)
+        _, grouped = self.grid(min_lon=-180, min_lat=-90, max_lon=180, max_lat=90, cell=10, group_by="category")
+        self.assertEqual(grouped["total"], plain["total"])
+        self.assertTrue(all(len(row) == 4 for row in grouped["cells"]))
+        self.assertEqual(self.grid(min_lon=0, min_lat=0, max_lon=1, max_lat=1, group_by="text")[0], 400)
+
+    def test_results_cached_per_data_version(self):
+        calls = []
+        original = self.db.storage.grid_counts
+        self.db.storage.grid_counts = lambda *args: calls.append(args) or original(*args)
+
+        params = dict(min_lon=-80, min_lat=38, max_lon=-68, max_lat=46, cell=2)
+        self.grid(**params)
+        self.grid(**params)
+        self.assertEqual(len(calls), 1)
+
+        self.db.upsert_many([{"notam_id": "NEW", "location": {"type": "Point", "coordinates": [-71.0, 42.5]}, "radius_nm": 1}])
+        api.data_version._value = None
+        _, grid = self.grid(**params)
+        self.assertEqual(len(calls), 2)
+
+    def test_too_many_cells(self):
+        status, _ = self.grid(min_lon=-180, min_lat=-90, max_lon=180, max_lat=90, cell=0.01)
+        self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import asyncio
+import time
+import gzip
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, http_cache
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestHttpCacheHelpers(unittest.TestCase):
+
+    def test_etag_depends_on_query_and_version(self):
+        etag = http_cache.make_etag("/api/geojson", [("lat", "1"), ("lon", "2")], 7)
+        self.assertEqual(etag, http_cache.make_etag("/api/geojson", [("lon", "2"), ("lat", "1")], 7))
+        self.assertNotEqual(etag, http_cache.make_etag("/api/geojson", [("lat", "1"), ("lon", "2")], 8))
+        self.assertNotEqual(etag, http_cache.make_etag("/api/geojson", [("lat", "1"), ("lon", "3")], 7))
+
+    def test_etag_matches(self):
+        etag = 'W/"3-abc"'
+        self.assertTrue(http_cache.etag_matches('"x", W/"3-abc"', etag))
+        self.assertTrue(http_cache.etag_matches('"3-abc"', etag))
+        self.assertTrue(http_cache.etag_matches("*", etag))
+        self.assertFalse(http_cache.etag_matches('W/"2-abc"', etag))
+        self.assertFalse(http_cache.etag_matches(None, etag))
+
+    def test_choose_encoding(self):
+        self.assertEqual(http_cache.choose_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(http_cache.choose_encoding("gzip;q=0"))
+        self.assertIsNone(http_cache.choose_encoding(None))
+        if http_cache.brotli is None:
+            self.assertEqual(http_cache.choose_encoding("br, gzip"), "gzip")
+
+    def test_data_version_refresh_off_the_event_loop(self):
+        def slow_fetch():
+            time.sleep(0.2)  # A DB that is slow to answer
+            return 5
+        cache = http_cache.DataVersionCache(slow_fetch, ttl=60)
+
+        async def main():
+            ticks = []
+            async def ticker():
+                for _ in range(5):
+                    ticks.append(time.monotonic())
+                    await asyncio.sleep(0.02)
+            _, version = await asyncio.gather(ticker(), cache.get_async())
+            return version, ticks
+
+        version, ticks = asyncio.run(main())
+        self.assertEqual(version, 5)
+        self.assertLess(ticks[-1] - ticks[0], 0.19)  # Other coroutines kept running during the fetch
+        self.assertEqual(asyncio.run(cache.get_async()), 5)
+
+class TestConditionalGeoJson(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(parse_notam_xml(DUMP_FILE))
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_not_modified_until_data_changes(self):
+        params = {"lat": 42.36, "lon": -71.01, "radius": 30}
+        status, headers, body = call(api.app, "GET", "/api/geojson", params, {"Accept-Encoding": "gzip"})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-encoding"], "gzip")
+        features = json.loads(gzip.decompress(body))["features"]
+        self.assertTrue(features)
+
+        etag = headers["etag"]
+        status, _, body = call(api.app, "GET", "/api/geojson", params, {"If-None-Match": etag})
+        self.assertEqual(status, 304)
+        self.assertEqual(body, b"")
+
+        # A write bumps the data version, so the old ETag no longer matches
+        self.db.upsert_many([{"notam_id": "NEW", "location": {"type": "Point", "coordinates": [-71.0, 42.36]}, "radius_nm": 1}])
+        api.data_version._value = None
+        status, headers, body = call(api.app, "GET", "/api/geojson", params, {"If-None-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(headers["etag"], etag)
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(len(json.loads(body)["features"]), len(features) + 1)
+
+if __name__ == '__main__':
+    unittest.main()
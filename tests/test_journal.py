@@ -0,0 +1,102 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.journal import JournalWriter, iter_records, list_segments
+from app.db_manager import DBManager
+from app.snapshot_store import iter_messages
+from scripts.rebuild_from_journal import rebuild
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestJournal(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.messages = [xml for _, xml in iter_messages(DUMP_FILE)]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal_dir = os.path.join(self.tmp.name, "journal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_all(self, stream="listener-1", segment_max_bytes=20000):
+        with JournalWriter(self.journal_dir, stream, segment_max_bytes) as journal:
+            for i, xml in enumerate(self.messages):
+                journal.append(xml, received_at=1000.0 + i)
+
+    def test_segment_rotation_and_replay(self):
+        self.write_all()
+        self.assertGreater(len(list_segments(self.journal_dir)), 1)
+        replayed = list(iter_records(self.journal_dir))
+        self.assertEqual([payload for _, payload in replayed], self.messages)
+        self.assertEqual([received_at for received_at, _ in replayed], [1000.0 + i for i in range(len(self.messages))])
+
+    def test_until_cuts_off_by_received_time(self):
+        self.write_all()
+        replayed = list(iter_records(self.journal_dir, until=1009.5))
+        self.assertEqual([payload for _, payload in replayed], self.messages[:10])
+
+    def test_until_with_clock_step_back(self):
+        # Records stamped earlier after a later one are still within the cut-off
+        with JournalWriter(self.journal_dir, "listener-1") as journal:
+            for received_at, xml in zip((1000.0, 2000.0, 1001.0), self.messages):
+                journal.append(xml, received_at=received_at)
+        replayed = list(iter_records(self.journal_dir, until=1500.0))
+        self.assertEqual(replayed, [(1000.0, self.messages[0]), (1001.0, self.messages[2])])
+
+    def test_streams_merged_by_received_time(self):
+        # Listener "b" received A3909/2025 before listener "a" received the NOTAMC
+        # cancelling it; stream-by-stream replay would apply the cancel first
+        target = self.messages[28].replace("3914", "3909")
+        with JournalWriter(self.journal_dir, "a") as journal:
+            journal.append(self.messages[0], received_at=2000.0)
+        with JournalWriter(self.journal_dir, "b") as journal:
+            journal.append(target, received_at=1000.0)
+            journal.append(self.messages[1], received_at=3000.0)
+
+        replayed = list(iter_records(self.journal_dir))
+        self.assertEqual([received_at for received_at, _ in replayed], [1000.0, 2000.0, 3000.0])
+
+        db = DBManager("sqlite", path=os.path.join(self.tmp.name, "notams.sqlite"))
+        db.init_db()
+        rebuild(db, self.journal_dir, workers=1)
+        numbers = [doc["number"] for doc in db.search_by_icao(["KMHT"])["KMHT"]]
+        self.assertEqual(numbers, ["A3913/2025"])  # The NOTAMC itself; A3909/2025 stays cancelled
+        self.assertEqual([change["reason"] for change in db.get_changes(0)["removed"]], ["cancelled"])
+
+    def test_reopen_appends_and_drops_torn_tail(self):
+        with JournalWriter(self.journal_dir, "listener-1") as journal:
+            for xml in self.messages[:3]:
+                journal.append(xml)
+        # Simulate a crash mid-write: half a record after the last indexed one
+        _, log_path, _ = list_segments(self.journal_dir)[-1]
+        with open(log_path, "ab") as f:
+            f.write(b"\x10\x00\x00\x00partial")
+
+        with JournalWriter(self.journal_dir, "listener-1") as journal:
+            journal.append(self.messages[3])
+        self.assertEqual([payload for _, payload in iter_records(self.journal_dir)], self.messages[:4])
+
+    def test_rebuild_into_storage(self):
+        self.write_all(stream="a")
+        db = DBManager("sqlite", path=os.path.join(self.tmp.name, "notams.sqlite"))
+        db.init_db()
+        messages, written = rebuild(db, self.journal_dir, workers=2)
+        self.assertEqual(messages, len(self.messages))
+        self.assertGreater(written, 0)
+        self.assertGreater(db.get_count(), 0)
+
+        # Point-in-time rebuild only sees the earlier messages
+        db.clear_db()
+        messages, _ = rebuild(db, self.journal_dir, until=1004.0, workers=1)
+        self.assertEqual(messages, 5)
+
+if __name__ == '__main__':
+    unittest.main()
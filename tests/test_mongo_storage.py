@@ -0,0 +1,165 @@
+import sys
+import os
+import unittest
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fake_mongo import FakeClient
+from app import mongo_storage, schedule
+from app.xml_parser import to_epoch
+
+def make_storage(partition_by_fir=False):
+    with mock.patch.object(mongo_storage, "MongoClient", FakeClient):
+        storage = mongo_storage.MongoStorage("mongodb://fake", partition_by_fir=partition_by_fir)
+    storage.init_db()
+    return storage
+
+def notam(notam_id, number, version="1", **fields):
+    return {"notam_id": notam_id, "number": number, "icao_location": "KBOS", "version": version, **fields}
+
+class TestMongoStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = make_storage()
+
+    def stored(self, notam_id):
+        return self.storage.collection.find_one({"i": notam_id})
+
+    def test_rewrite_drops_schedule(self):
+        start, end = to_epoch("202512150000"), to_epoch("202512220000")
+        scheduled = notam("N1", "A0001/2025", starts_at=start, expires_at=end, schedule="MON-FRI 1200-2000",
+                          active_intervals=schedule.expand("MON-FRI 1200-2000", start, end))
+        self.assertTrue(self.storage.insert_notam(scheduled))
+        self.assertIn("ai", self.stored("N1"))
+
+        # The next version has no D) field: its schedule and intervals must not linger
+        self.assertTrue(self.storage.insert_notam(notam("N1", "A0001/2025", version="2", starts_at=start, expires_at=end)))
+        self.assertNotIn("ai", self.stored("N1"))
+        self.assertNotIn("d", self.stored("N1"))
+
+        self.storage.upsert_many([dict(scheduled, version="3")])
+        self.storage.upsert_many([notam("N1", "A0001/2025", version="4", starts_at=start, expires_at=end)])
+        self.assertNotIn("ai", self.stored("N1"))
+
+    def test_metrics_listed_by_prefix(self):
+        self.storage.save_metrics("freshness:host-2:7", {"listener": "host-2:7"})
+        self.storage.save_metrics("freshness:host-1:7", {"listener": "host-1:7"})
+        self.storage.save_metrics("freshness", {"listener": None})
+        self.assertEqual(self.storage.list_metrics("freshness:"), [{"listener": "host-1:7"}, {"listener": "host-2:7"}])
+
+    def test_stale_versions_rejected(self):
+        self.assertTrue(self.storage.insert_notam(notam("N1", "A0001/2025", version="2", text="v2")))
+        self.assertFalse(self.storage.insert_notam(notam("N1", "A0001/2025", version="1", text="v1")))
+
+        # In a bulk write the stale document is settled on its own, the rest applied
+        self.storage.upsert_many([notam("N1", "A0001/2025", version="1", text="v1"), notam("N2", "A0002/2025")])
+        self.assertEqual(self.stored("N1")["v"], "2")
+        self.assertEqual(self.storage.get_count(), 2)
+        self.assertTrue(self.storage.insert_notam(notam("N1", "A0001/2025", version="3", text="v3")))
+        self.assertEqual(self.stored("N1")["v"], "3")
+
+    def test_tombstones_reject_stale_copies(self):
+        self.storage.upsert_many([notam("N1", "A0001/2025", version="2")])
+        cancel = notam("X", "A0009/2025", notam_type="C", references="A0001/2025")
+        self.assertTrue(self.storage.insert_notam(cancel))
+        self.assertIsNone(self.stored("N1"))
+        self.assertEqual(self.storage.tombstones.find_one({"_id": "N1"})["version"], "2")
+
+        # A replay at the removed version (or older) stays removed
+        self.assertFalse(self.storage.insert_notam(notam("N1", "A0001/2025", version="2")))
+        self.assertEqual(self.storage.upsert_many([notam("N1", "A0001/2025", version="1")]), 0)
+        self.assertIsNone(self.stored("N1"))
+
+        # A newer version is live again
+        self.assertTrue(self.storage.insert_notam(notam("N1", "A0001/2025", version="3")))
+        self.assertIsNone(self.storage.tombstones.find_one({"_id": "N1"}))
+
+    def test_get_changes_paging(self):
+        self.storage.upsert_many([notam(f"N{i}", f"A000{i}/2025", expires_at=1000 + i) for i in range(5)])
+        self.storage.expire_notams(now=1002)  # N0 and N1
+
+        upserted, removed, since, pages = [], [], 0, 0
+        while True:
+            page = self.storage.get_changes(since, limit=2)
+            upserted += [doc["notam_id"] for doc in page["upserted"]]
+            removed += [(tomb["notam_id"], tomb["reason"]) for tomb in page["removed"]]
+            since, pages = page["seq"], pages + 1
+            if not page["more"]:
+                break
+        self.assertEqual(upserted, ["N2", "N3", "N4"])
+        self.assertEqual(removed, [("N0", "expired"), ("N1", "expired")])
+        self.assertEqual(pages, 3)
+        self.assertEqual(self.storage.get_changes(since)["upserted"], [])
+
+        # Pruned tombstones: a client that synced before them has to start over
+        self.storage.prune_tombstones(older_than=float("inf"))
+        self.assertTrue(self.storage.get_changes(1)["reset"])
+
+    def test_get_changes_waits_for_writes_in_flight(self):
+        self.storage.insert_notam(notam("N1", "A0001/2025"))
+        with self.storage._seq_lease():
+            # A slow writer reserved seq 2 and hasn't written yet; another writer lands seq 3
+            slow_seq = self.storage._next_seqs(1)[0]
+            self.storage.insert_notam(notam("N3", "A0003/2025"))
+            page = self.storage.get_changes(0)
+            self.assertEqual([doc["notam_id"] for doc in page["upserted"]], ["N1"])
+            self.assertEqual(page["seq"], 1)
+            self.storage._conditional_upsert(self.storage.collection, notam("N2", "A0002/2025"), slow_seq)
+
+        page = self.storage.get_changes(page["seq"])
+        self.assertEqual([doc["notam_id"] for doc in page["upserted"]], ["N2", "N3"])
+        self.assertEqual(page["seq"], 3)
+
+        # A lease left behind by a writer that died doesn't hold the feed back for good
+        self.storage.seq_leases.insert_one({"floor": 0, "at": 0.0})
+        self.assertEqual(self.storage.get_changes(0)["seq"], 3)
+        self.storage.prune_tombstones(older_than=0)
+        self.assertEqual(self.storage.seq_leases.count_documents({}), 0)
+
+class TestFirPartitions(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = make_storage(partition_by_fir=True)
+
+    def partition(self, fir):
+        return self.storage.router.collection_for_fir(fir)
+
+    def test_fir_change_moves_the_notam(self):
+        self.assertTrue(self.storage.insert_notam(notam("N1", "A0001/2025", fir="KZBW")))
+        self.assertEqual(self.storage.upsert_many([notam("N1", "A0001/2025", version="2", fir="KZNY")]), 1)
+        self.assertIsNone(self.partition("KZBW").find_one({"i": "N1"}))
+        self.assertEqual(self.partition("KZNY").find_one({"i": "N1"})["v"], "2")
+
+        # A late copy of the old version, still naming the old FIR, is stale
+        self.assertFalse(self.storage.insert_notam(notam("N1", "A0001/2025", fir="KZBW")))
+        self.assertIsNone(self.partition("KZBW").find_one({"i": "N1"}))
+
+    def test_same_fir_writes_skip_other_partitions(self):
+        self.storage.upsert_many([notam("N1", "A0001/2025", fir="KZBW"), notam("N2", "A0002/2025", fir="KZNY")])
+        for fir in ("KZBW", "KZNY"):
+            self.partition(fir).queries.clear()
+        self.storage.upsert_many([notam("N1", "A0001/2025", version="2", fir="KZBW")])
+        self.assertEqual(self.partition("KZNY").queries, [])
+        self.assertEqual(self.storage.notam_firs.find_one({"_id": "N1"})["fir"], "KZBW")
+
+    def test_get_changes_merges_partitions(self):
+        for i in range(5):  # Sequences alternate between the partitions
+            self.storage.insert_notam(notam(f"N{i}", f"A000{i}/2025", fir=("KZBW", "KZNY")[i % 2]))
+        first = self.storage.get_changes(0, limit=3)
+        self.assertEqual([doc["notam_id"] for doc in first["upserted"]], ["N0", "N1", "N2"])
+        self.assertTrue(first["more"])
+        rest = self.storage.get_changes(first["seq"], limit=3)
+        self.assertEqual([doc["notam_id"] for doc in rest["upserted"]], ["N3", "N4"])
+
+    def test_unbounded_queries_reach_partitions_without_extent(self):
+        located = notam("N1", "A0001/2025", fir="KZBW", location={"type": "Point", "coordinates": [-71.0, 42.36]})
+        self.storage.upsert_many([located, notam("N2", "A0002/2025", fir="KZNY")])  # N2 has no location
+        self.assertEqual(self.storage.router.firs_for_bbox([-180, -90, 180, 90]), ["KZBW"])
+
+        self.assertEqual(sorted(doc["notam_id"] for doc in self.storage.search_by_icao(["KBOS"])["KBOS"]), ["N1", "N2"])
+        self.assertEqual(sorted(doc["notam_id"] for doc in self.storage.get_changes(0)["upserted"]), ["N1", "N2"])
+
+if __name__ == '__main__':
+    unittest.main()
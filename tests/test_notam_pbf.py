@@ -0,0 +1,103 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, http_cache, notam_pbf
+from app.db_manager import DBManager
+from app.geojson_converter import GeoJsonConverter
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestNotamPbf(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = list(parse_notam_xml(DUMP_FILE))
+
+    def assertSameGeometry(self, decoded, expected, places):
+        self.assertEqual(decoded["type"], expected["type"])
+        if expected["type"] == "Point":
+            pairs = [(decoded["coordinates"], expected["coordinates"])]
+        else:
+            pairs = zip(decoded["coordinates"][0], expected["coordinates"][0])
+        for got, want in pairs:
+            self.assertAlmostEqual(got[0], want[0], places=places)
+            self.assertAlmostEqual(got[1], want[1], places=places)
+
+    def test_roundtrip_matches_geojson(self):
+        expected = GeoJsonConverter.to_feature_collection(self.docs)["features"]
+        decoded = notam_pbf.decode_feature_collection(notam_pbf.encode_feature_collection(self.docs))["features"]
+        self.assertEqual(len(decoded), len(expected))
+        for got, want in zip(decoded, expected):
+            self.assertSameGeometry(got["geometry"], want["geometry"], places=6)
+            for key in ("notam_id", "number", "icao_location", "text", "q_code"):
+                self.assertEqual(got["properties"].get(key), want["properties"].get(key) or None)
+            self.assertEqual(got["properties"].get("upper_fl"), want["properties"].get("upper_fl"))
+
+    def test_simplified_geometry_matches_geojson(self):
+        tolerance = GeoJsonConverter.tolerance_for_zoom(8, 42)
+        expected = GeoJsonConverter.to_feature_collection(self.docs, tolerance)["features"]
+        body = notam_pbf.encode_feature_collection(self.docs, tolerance)
+        decoded = notam_pbf.decode_feature_collection(body)["features"]
+        for got, want in zip(decoded, expected):
+            self.assertEqual(len(got["geometry"]["coordinates"][0]), len(want["geometry"]["coordinates"][0]))
+            self.assertSameGeometry(got["geometry"], want["geometry"], places=GeoJsonConverter.precision_for(tolerance) - 1)
+        self.assertLess(len(body), len(json.dumps(GeoJsonConverter.to_feature_collection(self.docs, tolerance))) / 2)
+
+    def test_negative_flight_level(self):
+        doc = {"notam_id": "N", "location": {"type": "Point", "coordinates": [-71.0, 42.0]}, "lower_fl": -5}
+        decoded = notam_pbf.decode_feature_collection(notam_pbf.encode_feature_collection([doc]))
+        self.assertEqual(decoded["features"][0]["properties"]["lower_fl"], -5)
+
+    def test_negotiate(self):
+        offered = api.FEATURE_MEDIA_TYPES
+        self.assertEqual(http_cache.negotiate(None, offered), "application/geo+json")
+        self.assertEqual(http_cache.negotiate("*/*", offered), "application/geo+json")
+        self.assertEqual(http_cache.negotiate("application/x-protobuf", offered), notam_pbf.MEDIA_TYPE)
+        self.assertEqual(http_cache.negotiate("application/json;q=0.5, application/x-protobuf", offered), notam_pbf.MEDIA_TYPE)
+        self.assertEqual(http_cache.negotiate("application/x-protobuf;q=0.1, */*", offered), "application/geo+json")
+
+class TestProtobufEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(parse_notam_xml(DUMP_FILE))
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_geojson_endpoint_negotiates_protobuf(self):
+        params = {"lat": 42.36, "lon": -71.01, "radius": 30}
+        _, json_headers, json_body = call(api.app, "GET", "/api/geojson", params)
+        status, headers, body = call(api.app, "GET", "/api/geojson", params, {"Accept": notam_pbf.MEDIA_TYPE})
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], notam_pbf.MEDIA_TYPE)
+        self.assertIn("Accept", headers["vary"])
+        self.assertNotEqual(headers["etag"], json_headers["etag"])
+
+        decoded = notam_pbf.decode_feature_collection(body)
+        expected = json.loads(json_body)
+        self.assertEqual(
+            [f["properties"]["notam_id"] for f in decoded["features"]],
+            [f["properties"]["notam_id"] for f in expected["features"]]
+        )
+
+        status, _, _ = call(api.app, "GET", "/api/geojson", params, {"Accept": notam_pbf.MEDIA_TYPE, "If-None-Match": headers["etag"]})
+        self.assertEqual(status, 304)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.parse_cache import ParseCache
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.data_dir, "raw_notam_dump.xml")
+        shutil.copy(DUMP_FILE, self.source)
+
+    def tearDown(self):
+        shutil.rmtree(self.data_dir)
+
+    def test_roundtrip_and_key_match(self):
+        cache = ParseCache(self.data_dir)
+        key = cache.key_for([self.source])
+        docs = [
+            {"notam_id": "N1", "radius_nm": 5, "location": {"type": "Point", "coordinates": [-71.1, 42.3]}},
+            {"notam_id": "N2", "radius_nm": 0, "start_time": None},
+        ]
+
+        self.assertFalse(cache.matches(key))
+        with cache.writer(key) as w:
+            for doc in docs:
+                w.append(doc)
+
+        self.assertTrue(cache.matches(key))
+        self.assertEqual(list(cache.iter_docs()), docs)
+
+    def test_changed_input_invalidates(self):
+        cache = ParseCache(self.data_dir)
+        with cache.writer(cache.key_for([self.source])) as w:
+            w.append({"notam_id": "N1"})
+
+        with open(self.source, "a", encoding="utf-8") as f:
+            f.write("\n")
+        self.assertFalse(cache.matches(cache.key_for([self.source])))
+
+    def test_interrupted_write_is_not_published(self):
+        cache = ParseCache(self.data_dir)
+        key = cache.key_for([self.source])
+        with self.assertRaises(RuntimeError):
+            with cache.writer(key) as w:
+                w.append({"notam_id": "N1"})
+                raise RuntimeError("parse failed")
+        self.assertFalse(cache.matches(key))
+
+if __name__ == '__main__':
+    unittest.main()
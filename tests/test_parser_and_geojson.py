@@ -25,6 +25,37 @@ class TestNotamProcessing(unittest.TestCase):
         self.assertEqual(data['radius_nm'], 5)
         self.assertEqual(data['raw_coords'], "5319N11335W")
         
+    def test_tokenize_icao_fields(self):
+        text = (
+            "A1234/25 NOTAMN\n"
+            "Q) KZNY/QRTCA/IV/BO/W/000/180/4038N07347W010\n"
+            "A) KJFK B) 2512170400 C) 2512171100\n"
+            "D) DAILY 0400-1100\n"
+            "E) TEMPORARY FLIGHT RESTRICTIONS. SEE B) ABOVE\n"
+            "F) SFC G) FL180"
+        )
+        fields = NotamTextParser.tokenize(text)
+
+        self.assertEqual(fields['header'], "A1234/25 NOTAMN")
+        self.assertEqual(fields['A'], "KJFK")
+        self.assertEqual(fields['D'], "DAILY 0400-1100")
+        self.assertEqual(fields['E'], "TEMPORARY FLIGHT RESTRICTIONS. SEE B) ABOVE") # Out-of-order marker stays in E
+        self.assertEqual(fields['F'], "SFC")
+        self.assertEqual(fields['G'], "FL180")
+
+        q_data = NotamTextParser.parse_q_field(fields['Q'])
+        self.assertEqual(q_data['q_code'], "QRTCA")
+        self.assertEqual(q_data['upper_fl'], 180)
+        self.assertEqual(
+            NotamTextParser.parse_validity_fields(fields, text),
+            ("2025-12-17T04:00:00", "2025-12-17T11:00:00")
+        )
+
+    def test_tokenize_non_icao_text(self):
+        text = "SWUU3660 UUDD 12170330\n(SNOWTAM 3660\nA)UUDD B)12170330\nC)13R F)5/5/5 G)2/2/2"
+        fields = NotamTextParser.tokenize(text)
+        self.assertEqual(fields, {"header": "", "E": text})
+
     def test_coordinate_parsing(self):
         coord_str = "5319N11335W"
         coords = NotamTextParser.parse_coordinate_str(coord_str)
@@ -0,0 +1,97 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.partition_router import PartitionRouter, normalize_fir, radius_bbox, boxes_intersect, UNKNOWN_FIR, PARTITION_PREFIX
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class FakeCatalog:
+    def __init__(self):
+        self.docs = {}
+
+    def update_one(self, filt, update, upsert=False):
+        doc = self.docs.setdefault(filt["_id"], {"_id": filt["_id"]})
+        doc.update(update.get("$set", {}))
+        for key, value in update.get("$min", {}).items():
+            doc[key] = min(doc.get(key, value), value)
+        for key, value in update.get("$max", {}).items():
+            doc[key] = max(doc.get(key, value), value)
+
+    def find(self):
+        return list(self.docs.values())
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key], reverse=direction < 0))
+
+    def limit(self, count):
+        return FakeCursor(self[:count] if count else self)
+
+class FakePartition:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return FakeCursor(self.docs)
+
+class FakeDB(dict):
+    def __missing__(self, name):
+        self[name] = FakeCatalog()
+        return self[name]
+
+class TestPartitionRouter(unittest.TestCase):
+
+    def test_normalize_fir(self):
+        self.assertEqual(normalize_fir(" kzny "), "KZNY")
+        self.assertEqual(normalize_fir(None), UNKNOWN_FIR)
+        self.assertEqual(normalize_fir("NOT A FIR"), UNKNOWN_FIR)
+
+    def test_radius_bbox(self):
+        min_lon, min_lat, max_lon, max_lat = radius_bbox(40.0, -74.0, 60)
+        self.assertAlmostEqual(min_lat, 39.0)
+        self.assertAlmostEqual(max_lat, 41.0)
+        self.assertLess(min_lon, -75.0)  # Longitude degrees shrink away from the equator
+        self.assertIsNone(radius_bbox(88.5, 0.0, 60))
+        self.assertIsNone(radius_bbox(0.0, 179.5, 60))
+
+    def test_boxes_intersect(self):
+        self.assertTrue(boxes_intersect([0, 0, 2, 2], [1, 1, 3, 3]))
+        self.assertFalse(boxes_intersect([0, 0, 1, 1], [2, 2, 3, 3]))
+
+    def test_routing_prunes_partitions(self):
+        router = PartitionRouter(FakeDB(), ensure_indexes=lambda collection: None)
+        docs_by_fir = {}
+        for doc in parse_notam_xml(DUMP_FILE):
+            docs_by_fir.setdefault(normalize_fir(doc.get("fir")), []).append(doc)
+        router.record_extents(docs_by_fir)
+
+        located = [fir for fir, docs in docs_by_fir.items() if any(d.get("location") for d in docs)]
+        self.assertGreater(len(located), 1)
+        self.assertCountEqual(router.firs_for_bbox([-180, -90, 180, 90]), located)
+
+        # A small box around one NOTAM selects its partition but not all of them
+        fir, docs = next((fir, docs) for fir, docs in docs_by_fir.items() if any(d.get("location") for d in docs))
+        lon, lat = next(d for d in docs if d.get("location"))["location"]["coordinates"]
+        selected = router.firs_for_bbox(radius_bbox(lat, lon, 1))
+        self.assertIn(fir, selected)
+        self.assertLess(len(selected), len(located))
+
+    def test_sorted_find_merges_partitions(self):
+        db = FakeDB()
+        db[PARTITION_PREFIX + "KZNY"] = FakePartition([{"sq": seq} for seq in (7, 1, 4)])
+        db[PARTITION_PREFIX + "KZBW"] = FakePartition([{"sq": seq} for seq in (2, 9, 3, 8)])
+        router = PartitionRouter(db, ensure_indexes=lambda collection: None)
+
+        merged = router.find(["KZNY", "KZBW"], {}, sort=("sq", 1), limit=4)
+        self.assertEqual([doc["sq"] for doc in merged], [1, 2, 3, 4])
+        newest = router.find(["KZNY", "KZBW"], {}, sort=("sq", -1), limit=3)
+        self.assertEqual([doc["sq"] for doc in newest], [9, 8, 7])
+        self.assertEqual(len(router.find(["KZNY", "KZBW"], {})), 7)
+
+if __name__ == '__main__':
+    unittest.main()
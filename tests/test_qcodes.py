@@ -0,0 +1,35 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import qcodes
+from app.notam_text_parser import NotamTextParser
+
+class TestQCodes(unittest.TestCase):
+
+    def test_decode_full_tables(self):
+        data = NotamTextParser.parse_q_line("Q) KZBW/QLRAS/IV/NBO/A/000/999/4222N07100W005")
+        self.assertEqual(data['subject'], "All landing area lighting facilities")
+        self.assertEqual(data['condition'], "Unserviceable")
+        self.assertEqual(data['q_group'], qcodes.encode_letter('L'))
+        self.assertEqual(data['category'], "Other") # Legacy categories unchanged
+
+    def test_integer_codes_roundtrip(self):
+        for code in list(qcodes.SUBJECT_CODES) + list(qcodes.CONDITION_CODES):
+            self.assertEqual(qcodes.decode_pair(qcodes.encode_pair(code)), code)
+        self.assertEqual(len(qcodes.SUBJECT_NAMES_BY_ID), len(qcodes.SUBJECT_CODES))
+
+    def test_build_filter(self):
+        self.assertEqual(
+            qcodes.build_filter(q_group="navaid", condition="as"),
+            {"q_group": qcodes.encode_letter('N'), "q_condition": qcodes.encode_pair('AS')}
+        )
+        self.assertEqual(qcodes.build_filter(subject="MR"), {"q_subject": qcodes.encode_pair('MR')})
+        with self.assertRaises(ValueError):
+            qcodes.build_filter(q_group="ZZ")
+
+if __name__ == '__main__':
+    unittest.main()
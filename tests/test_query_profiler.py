@@ -0,0 +1,72 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api
+from app.db_manager import DBManager
+from app.query_profiler import QueryProfiler
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestQueryProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(parse_notam_xml(DUMP_FILE))
+
+    def tearDown(self):
+        api._db = None
+        shutil.rmtree(self.tmp_dir)
+
+    def test_fast_queries_are_timed_not_explained(self):
+        self.db.profiler = QueryProfiler(threshold_ms=60000, sample_rate=0)
+        self.db.search_nearby(42.36, -71.01, 30)
+        self.db.search_nearby(42.36, -71.01, 30)
+        report = self.db.profiler.report()
+        self.assertEqual(report["stats"]["search_nearby"]["count"], 2)
+        self.assertEqual(report["stats"]["search_nearby"]["slow"], 0)
+        self.assertEqual(report["plans"], [])
+
+    def test_slow_query_captures_plan(self):
+        self.db.profiler = QueryProfiler(threshold_ms=0, sample_rate=0)
+        with self.assertLogs("app.query_profiler", level="WARNING") as logs:
+            results = self.db.search_nearby(42.36, -71.01, 30, {"category": "Runway"})
+        self.assertEqual(logs.records[0].getMessage(), "Slow query")
+        self.assertEqual(logs.records[0].query, "search_nearby")
+        self.assertEqual(logs.records[0].returned, len(results))
+        plan_entry = self.db.profiler.report()["plans"][0]
+        self.assertTrue(plan_entry["slow"])
+        self.assertEqual(plan_entry["params"]["radius_nm"], 30)
+        self.assertEqual(plan_entry["returned"], len(results))
+
+        plan = plan_entry["plan"]
+        self.assertIn("notams_rtree", plan["indexes"])
+        self.assertGreaterEqual(plan["docs_examined"], plan["returned"])
+        self.assertGreaterEqual(plan["returned"], len(results))
+
+    def test_icao_lookup_uses_index(self):
+        self.db.profiler = QueryProfiler(threshold_ms=0, sample_rate=0)
+        self.db.search_by_icao(["KBOS"])
+        self.assertIn("idx_notams_icao", self.db.profiler.report()["plans"][0]["plan"]["indexes"])
+
+    def test_admin_endpoint(self):
+        api._db = self.db
+        self.db.profiler = QueryProfiler(threshold_ms=0, sample_rate=0)
+        self.db.search_bbox(-72, 41, -70, 43)
+        status, _, body = call(api.app, "GET", "/api/admin/query-plans")
+        self.assertEqual(status, 200)
+        report = json.loads(body)
+        self.assertEqual(report["plans"][0]["query"], "search_bbox")
+
+if __name__ == '__main__':
+    unittest.main()
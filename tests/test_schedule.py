@@ -0,0 +1,124 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, schedule, storage_schema
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml, to_epoch
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+def epochs(*times):
+    return [to_epoch(value) for value in times]
+
+class TestExpand(unittest.TestCase):
+
+    def test_weekdays_and_overnight(self):
+        # 2025-12-15 is a Monday
+        intervals = schedule.expand("MON-FRI 1200-2000", *epochs("202512150000", "202512220000"))
+        self.assertEqual(intervals[0], epochs("202512151200", "202512152000"))
+        self.assertEqual(len(intervals), 5)
+
+        daily = schedule.expand("DLY 1200-2000", *epochs("202512150000", "202512220000"))
+        self.assertEqual(len(daily), 7)
+        self.assertEqual(daily, schedule.expand("DAILY 1200-2000", *epochs("202512150000", "202512220000")))
+
+        overnight = schedule.expand("FRI-SUN 2200/0200", *epochs("202512150000", "202512220000"))
+        self.assertEqual(overnight, [
+            epochs("202512150000", "202512150200"),  # Sunday night's run, from the start of validity
+            epochs("202512192200", "202512200200"),
+            epochs("202512202200", "202512210200"),
+            epochs("202512212200", "202512220000"),  # Clipped to the end of validity
+        ])
+
+    def test_dates_months_and_exclusions(self):
+        intervals = schedule.expand(
+            "DEC 30-JAN 02 0600-0700 EXC JAN 01", *epochs("202512290000", "202601100000")
+        )
+        self.assertEqual([start for start, _ in intervals], epochs("202512300600", "202512310600", "202601020600"))
+
+        # H24 on consecutive days is one run, split into day-long intervals
+        h24 = schedule.expand("DAILY H24", *epochs("202512150900", "202512180000"))
+        self.assertEqual(h24[0], epochs("202512150900", "202512160900"))
+        self.assertTrue(all(end - start <= schedule.MAX_INTERVAL_SECONDS for start, end in h24))
+        self.assertEqual(h24[-1][1], to_epoch("202512180000"))
+
+    def test_unexpanded(self):
+        start, end = epochs("202512150000", "202512220000")
+        for text in ("SR-SS", "MON-FRI 0800-2500", "HJ", "1200-2000 MON-FRI", "MON 0800-1000 TUE"):
+            self.assertIsNone(schedule.expand(text, start, end))
+        self.assertIsNone(schedule.expand("DAILY 0800-1600", start, None))  # PERM
+
+    def test_dump(self):
+        doc = next(doc for doc in parse_notam_xml(DUMP_FILE) if doc.get("schedule"))
+        intervals = doc["active_intervals"]
+        self.assertEqual(intervals[0], epochs("202512212300", "202512220815"))
+        self.assertEqual(intervals[10], epochs("202512312300", "202601010820"))
+        self.assertEqual(intervals[-1], epochs("202601202300", "202601210829"))
+
+        stored = storage_schema.to_storage(doc)
+        self.assertEqual(stored["ai"][0], {"s": intervals[0][0], "e": intervals[0][1]})
+        self.assertNotIn("active_intervals", storage_schema.from_storage(stored))  # Index-only
+
+class TestActiveWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        start, end = epochs("202512150000", "202512220000")
+        location = {"type": "Point", "coordinates": [-71.0, 42.36]}
+        self.db.upsert_many([
+            {"notam_id": "SCHED", "number": "A0001/2025", "icao_location": "KBOS", "location": location,
+             "starts_at": start, "expires_at": end, "schedule": "MON-FRI 1200-2000",
+             "active_intervals": schedule.expand("MON-FRI 1200-2000", start, end)},
+            {"notam_id": "ALWAYS", "number": "A0002/2025", "icao_location": "KBOS", "location": location,
+             "starts_at": start, "expires_at": end},
+        ])
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def active(self, *times):
+        return sorted(doc["notam_id"] for doc in self.db.search_nearby(42.36, -71.0, 5, window=tuple(epochs(*times))))
+
+    def test_search_nearby(self):
+        self.assertEqual(self.active("202512151300", "202512151300"), ["ALWAYS", "SCHED"])
+        self.assertEqual(self.active("202512152000", "202512152000"), ["ALWAYS"])  # Intervals end-exclusive
+        self.assertEqual(self.active("202512200000", "202512202359"), ["ALWAYS"])  # Saturday
+        self.assertEqual(self.active("202512200000", "202512221300"), ["ALWAYS"])  # Validity ends first
+        self.assertEqual(self.active("202512192100", "202512201200"), ["ALWAYS"])
+        self.assertEqual(self.active("202512191900", "202512201200"), ["ALWAYS", "SCHED"])
+
+        # Re-written without a schedule: no longer restricted
+        self.db.insert_notam({"notam_id": "SCHED", "number": "A0001/2025", "icao_location": "KBOS",
+                              "location": {"type": "Point", "coordinates": [-71.0, 42.36]}})
+        self.assertEqual(self.active("202512200000", "202512200000"), ["ALWAYS", "SCHED"])
+
+    def test_endpoints(self):
+        params = {"lat": 42.36, "lon": -71.0, "radius": 5, "valid_from": "2025-12-20T12:00:00Z"}
+        status, _, body = call(api.app, "GET", "/api/geojson", params)
+        self.assertEqual(status, 200)
+        self.assertEqual([f["properties"]["notam_id"] for f in json.loads(body)["features"]], ["ALWAYS"])
+
+        status, _, body = call(api.app, "GET", "/api/search", {**params, "valid_from": "2025-12-19T12:00:00Z"})
+        results = json.loads(body)["results"]
+        self.assertEqual(sorted(doc["notam_id"] for doc in results), ["ALWAYS", "SCHED"])
+        self.assertTrue(all("active_intervals" not in doc for doc in results))
+
+        status, _, _ = call(api.app, "GET", "/api/geojson", {**params, "valid_to": "2025-12-19T00:00:00Z"})
+        self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import sys
+import os
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call_async
+from app import api, http_cache
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_concurrent_calls_share_one_computation(self):
+        flights = http_cache.SingleFlight()
+        calls = []
+
+        def compute(value):
+            calls.append(value)
+            time.sleep(0.05)
+            return {"value": value}
+
+        async def main():
+            return await asyncio.gather(
+                *[flights.run("a", compute, 1) for _ in range(10)],
+                flights.run("b", compute, 2)
+            )
+
+        results = asyncio.run(main())
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertTrue(all(result is results[0] for result in results[:10]))
+        self.assertEqual(results[10], {"value": 2})
+        self.assertEqual(flights.stats, {"computed": 2, "coalesced": 9})
+
+        # Nothing is kept once the flight lands
+        asyncio.run(flights.run("a", compute, 1))
+        self.assertEqual(len(calls), 3)
+
+    def test_errors_reach_every_caller(self):
+        flights = http_cache.SingleFlight()
+
+        def fail():
+            time.sleep(0.02)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(*[flights.run("k", fail) for _ in range(3)], return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(flights.stats["computed"], 1)
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        flights = http_cache.SingleFlight()
+        release = threading.Event()
+
+        def compute():
+            release.wait(1)
+            return "done"
+
+        async def main():
+            first = asyncio.ensure_future(flights.run("k", compute))
+            second = asyncio.ensure_future(flights.run("k", compute))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            release.set()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), "done")
+
+class TestCoalescedEndpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(parse_notam_xml(DUMP_FILE))
+        api._db = self.db
+        api.data_version._value = None
+
+        # Count (and slow down) searches so concurrent requests overlap
+        self.searches = 0
+        search_nearby = self.db.search_nearby
+        def counting_search(*args, **kwargs):
+            self.searches += 1
+            time.sleep(0.05)
+            return search_nearby(*args, **kwargs)
+        self.db.search_nearby = counting_search
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def gather(self, *requests):
+        async def main():
+            return await asyncio.gather(*[call_async(api.app, "GET", path, params, headers) for path, params, headers in requests])
+        return asyncio.run(main())
+
+    def test_identical_geojson_requests_share_one_query(self):
+        params = {"lat": 42.36, "lon": -71.01, "radius": 30}
+        gzip_headers = {"Accept-Encoding": "gzip"}
+        responses = self.gather(*[("/api/geojson", params, gzip_headers if i % 2 else None) for i in range(8)])
+        self.assertEqual(self.searches, 1)
+        self.assertTrue(all(status == 200 for status, _, _ in responses))
+        self.assertEqual(len({headers["etag"] for _, headers, _ in responses}), 1)
+        self.assertEqual(responses[1][1].get("content-encoding"), "gzip")
+        self.assertEqual(responses[0][2], responses[2][2])
+        self.assertTrue(json.loads(responses[0][2])["features"])
+
+    def test_different_parameters_are_not_coalesced(self):
+        self.gather(
+            ("/api/geojson", {"lat": 42.36, "lon": -71.01, "radius": 30}, None),
+            ("/api/geojson", {"lat": 42.36, "lon": -71.01, "radius": 20}, None),
+            ("/api/geojson", {"lat": 42.36, "lon": -71.01, "radius": 30}, {"Accept": "application/x-protobuf"}),
+        )
+        self.assertEqual(self.searches, 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import sys
+import os
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.snapshot_store import SnapshotWriter, iter_messages, list_sources, load_index, describe_sources
+from app.xml_parser import parse_notam_str
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestSnapshotStore(unittest.TestCase):
+
+    def setUp(self):
+        self.messages = [xml for _, xml in iter_messages(DUMP_FILE)]
+
+    def test_legacy_dump_streaming(self):
+        self.assertEqual(len(self.messages), 42)
+        notams = list(parse_notam_str(self.messages[0]))
+        self.assertEqual(notams[0]['number'], "A3913/2025")
+
+    def test_segment_rotation_and_roundtrip(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            with SnapshotWriter(data_dir, compression="gzip", segment_max_bytes=20000) as writer:
+                for xml in self.messages:
+                    writer.write('<?xml version="1.0" encoding="UTF-8"?>' + xml)
+
+            index = load_index(data_dir)
+            self.assertGreater(len(index['segments']), 1)
+            self.assertTrue(all(seg['sealed'] for seg in index['segments']))
+            self.assertEqual(sum(seg['messages'] for seg in index['segments']), 42)
+            self.assertLess(
+                sum(seg['stored_bytes'] for seg in index['segments']),
+                sum(seg['raw_bytes'] for seg in index['segments'])
+            )
+
+            replayed = [xml for path in list_sources(data_dir) for _, xml in iter_messages(path)]
+            self.assertEqual(replayed, [xml.strip() for xml in self.messages])
+
+    def test_resume_offset_and_truncated_tail(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            path = os.path.join(data_dir, "partial.xml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("<FNS_Snapshot>\n" + "\n".join(self.messages[:3]) + "\n" + self.messages[3][:500])
+
+            offsets = [offset for offset, _ in iter_messages(path)]
+            self.assertEqual(len(offsets), 3) # Truncated 4th message is skipped
+
+            resumed = [xml for _, xml in iter_messages(path, start_offset=offsets[0])]
+            self.assertEqual(resumed, self.messages[1:3])
+
+    def test_unsealed_gzip_segment(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            with SnapshotWriter(data_dir, compression="gzip") as writer:
+                for xml in self.messages:
+                    writer.write(xml)
+
+            # Cut the segment short, as if capture was killed before the gzip trailer
+            path = list_sources(data_dir)[0]
+            with open(path, "rb") as f:
+                data = f.read()
+            with open(path, "wb") as f:
+                f.write(data[:len(data) * 2 // 3])
+
+            with self.assertLogs("app.snapshot_store", level="WARNING"):
+                replayed = [xml for _, xml in iter_messages(path)]
+            self.assertGreater(len(replayed), 0)
+            self.assertLess(len(replayed), 42)
+            self.assertEqual(replayed, [xml.strip() for xml in self.messages[:len(replayed)]])
+
+    def test_append_keeps_source_ids_stable(self):
+        with tempfile.TemporaryDirectory() as data_dir:
+            with SnapshotWriter(data_dir, segment_max_bytes=20000) as writer:
+                for xml in self.messages[:10]:
+                    writer.write(xml)
+            before = describe_sources(data_dir)
+
+            with SnapshotWriter(data_dir, segment_max_bytes=20000, append=True) as writer:
+                for xml in self.messages[10:]:
+                    writer.write(xml)
+            after = describe_sources(data_dir)
+
+            self.assertEqual([s['source_id'] for s in after[:len(before)]], [s['source_id'] for s in before])
+            self.assertGreater(len(after), len(before))
+            self.assertTrue(all(s['sealed'] for s in after))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml, version_key
+from app import qcodes
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestSqliteStorage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = list(parse_notam_xml(DUMP_FILE))
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(self.docs)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_upsert_is_keyed_on_notam_id(self):
+        unique = len({doc["notam_id"] for doc in self.docs})
+        self.assertEqual(self.db.get_count(), unique)
+        self.db.upsert_many(self.docs[:5])
+        self.assertEqual(self.db.get_count(), unique)
+
+    def test_documents_roundtrip(self):
+        stored = {doc["notam_id"]: doc for doc in self.db.search_bbox(-180, -90, 180, 90)}
+        # The dump repeats some NOTAMs; the newest version wins
+        latest = {doc["notam_id"]: doc for doc in self.docs if doc.get("location")}
+        for notam_id, doc in latest.items():
+            self.assertGreater(stored[notam_id].pop("seq"), 0)  # Stamped by storage
+            doc.pop("active_intervals", None)  # Index-only
+            self.assertEqual(stored[notam_id], doc)
+
+    def test_upserts_are_version_ordered(self):
+        doc = dict(self.docs[0], notam_id="VERSIONED", text="v2")
+        doc["version"] = version_key(2, 0, "2025-12-17T04:00:00.000Z")
+        self.assertTrue(self.db.insert_notam(doc))
+
+        # An older sequence (or correction) delivered late is dropped
+        stale = dict(doc, text="v1", version=version_key(1, 3, "2025-12-17T05:00:00.000Z"))
+        self.assertFalse(self.db.insert_notam(stale))
+        self.assertEqual(self.db.upsert_many([stale]), 0)
+        self.assertEqual(self.db.search_by_icao([doc["icao_location"]])[doc["icao_location"]][-1]["text"], "v2")
+
+        newer = dict(doc, text="v2 corrected", version=version_key(2, 1, "2025-12-17T03:00:00.000Z"))
+        self.assertTrue(self.db.insert_notam(newer))
+        # Re-delivery of the same version is applied (idempotent)
+        self.assertTrue(self.db.insert_notam(newer))
+        found = [d for d in self.db.search_by_icao([doc["icao_location"]])[doc["icao_location"]] if d["notam_id"] == "VERSIONED"]
+        self.assertEqual([d["text"] for d in found], ["v2 corrected"])
+
+    def test_search_nearby(self):
+        # Boston Logan
+        results = self.db.search_nearby(42.36, -71.01, 10)
+        self.assertTrue(results)
+        self.assertTrue(all(doc["icao_location"] == "KBOS" for doc in results))
+        self.assertEqual(self.db.search_nearby(0.0, 0.0, 10), [])
+
+    def test_filters(self):
+        closed = qcodes.build_filter(condition="LC")
+        results = self.db.search_nearby(40.7, -73.9, 50, closed)
+        self.assertTrue(results)
+        self.assertTrue(all(doc["condition_code"] == "LC" for doc in results))
+
+    def test_search_by_icao(self):
+        results = self.db.search_by_icao(["kbos", "ZZZZ"])
+        self.assertEqual(len(results["KBOS"]), len({doc["notam_id"] for doc in self.docs if doc["icao_location"] == "KBOS"}))
+        self.assertEqual(results["ZZZZ"], [])
+
+    def test_search_corridor(self):
+        # BOS -> JFK picks up NOTAMs at both ends
+        results = self.db.search_corridor([[-71.0, 42.36], [-73.78, 40.64]], 10)
+        locations = {doc["icao_location"] for doc in results}
+        self.assertIn("KBOS", locations)
+        self.assertIn("KJFK", locations)
+        self.assertNotIn("KMHT", locations)
+
+    def test_checkpoints(self):
+        self.db.save_checkpoint("seg:1", 100, 3)
+        self.db.save_checkpoint("seg:1", 200, 5, complete=True)
+        self.assertEqual(self.db.get_checkpoints(), {"seg:1": {"offset": 200, "messages": 5, "complete": True}})
+        self.db.clear_db()
+        self.assertEqual(self.db.get_checkpoints(), {})
+        self.assertEqual(self.db.get_count(), 0)
+
+    def test_metrics_listed_by_prefix(self):
+        self.db.save_metrics("freshness:b", {"listener": "b"})
+        self.db.save_metrics("freshness:a", {"listener": "a"})
+        self.db.save_metrics("other", {"listener": None})
+        self.assertEqual(self.db.list_metrics("freshness:"), [{"listener": "a"}, {"listener": "b"}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import sys
+import os
+import contextlib
+import subprocess
+import threading
+import unittest
+from unittest import mock
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import api, warmup
+
+class FakeDB:
+    def __init__(self):
+        self.pings = 0
+        self.queries = []
+        self.limits = []
+
+    def time_limit(self, seconds):
+        self.limits.append(seconds)
+        return contextlib.nullcontext()
+
+    def ping(self):
+        self.pings += 1
+
+    def search_nearby(self, lat, lon, radius_nm, filters=None):
+        self.queries.append((lat, lon, radius_nm))
+        return [{"notam_id": "N1", "location": {"type": "Point", "coordinates": [lon, lat]}, "radius_nm": 5}]
+
+class TestStartup(unittest.TestCase):
+
+    def test_import_does_not_connect(self):
+        self.assertIsNone(api._db)
+        self.assertIsNotNone(api.startup_state["import_seconds"])
+        self.assertFalse(api.startup_state["ready"])
+
+    def test_parse_locations(self):
+        self.assertEqual(warmup.parse_locations("40.64,-73.78,25; ;42.36,-71.01,10"), [(40.64, -73.78, 25.0), (42.36, -71.01, 10.0)])
+        self.assertEqual(len(warmup.parse_locations(warmup.DEFAULT_WARMUP_LOCATIONS)), 5)
+
+    def test_warm_up_runs_hot_queries(self):
+        db = FakeDB()
+        warmup.warm_up(db, [(40.64, -73.78, 25)])
+        self.assertEqual(db.pings, 1)
+        self.assertEqual(db.queries, [(40.64, -73.78, 25)])
+        self.assertEqual(db.limits, [warmup.WARMUP_TIMEOUT_SECONDS])
+
+    def test_warm_up_retries_are_logged(self):
+        attempts = []
+        def flaky_warm_up(db):
+            attempts.append(db)
+            if len(attempts) == 1:
+                raise ConnectionError("not up yet")
+        state = dict(api.startup_state)
+        try:
+            with mock.patch.object(warmup, "warm_up", flaky_warm_up), mock.patch.object(api, "get_db", FakeDB), \
+                    mock.patch.object(api, "WARMUP_RETRY_SECONDS", 0), self.assertLogs("app.api", "INFO") as logs:
+                api._warm_up(threading.Event())
+            self.assertTrue(api.startup_state["ready"])
+        finally:
+            api.startup_state.update(state)
+        self.assertEqual(len(attempts), 2)
+        warning, ready = logs.records
+        self.assertEqual((warning.levelname, warning.error), ("WARNING", "not up yet"))
+        self.assertEqual(ready.levelname, "INFO")
+        self.assertIsNotNone(ready.warmup_seconds)
+
+    def test_sqlite_deployment_does_not_load_pymongo(self):
+        code = "import sys; sys.modules['pymongo'] = None; import app.api, app.warmup, app.db_manager; app.db_manager.DBManager('sqlite', path=':memory:')"
+        root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+if __name__ == '__main__':
+    unittest.main()
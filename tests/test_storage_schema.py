@@ -0,0 +1,43 @@
+import sys
+import os
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import bson
+from app import storage_schema
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestStorageSchema(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = list(parse_notam_xml(DUMP_FILE))
+
+    def test_roundtrip_is_lossless(self):
+        for doc in self.docs:
+            readable = {key: value for key, value in doc.items() if key != "active_intervals"}  # Index-only
+            self.assertEqual(storage_schema.from_storage(storage_schema.to_storage(doc)), readable)
+
+    def test_compact_layout_is_smaller(self):
+        legacy = sum(len(bson.encode(doc)) for doc in self.docs)
+        compact = sum(len(bson.encode(storage_schema.to_storage(doc))) for doc in self.docs)
+        self.assertLess(compact, legacy * 0.7)
+
+    def test_query_translation(self):
+        self.assertEqual(
+            storage_schema.to_query({"category": "Runway", "q_group": 12, "custom": 1}),
+            {"c": "Runway", "qg": 12, "custom": 1}
+        )
+
+    def test_text_compression(self):
+        text = "A1888/25 NOTAMN\nQ) KZBW/QMRLC/IV/NBO/A/000/999/4222N07100W005\nE) BOS RWY 04L/22R CLSD EXC TAX"
+        blob = storage_schema.compress_text(text)
+        self.assertLess(len(blob), len(text))
+        self.assertEqual(storage_schema.decompress_text(blob), text)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import sys
+import os
+import io
+import json
+import logging
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import structured_log
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+class TestStructuredLog(unittest.TestCase):
+
+    def setUp(self):
+        root = logging.getLogger()
+        self.saved = (root.level, list(root.handlers))
+
+    def tearDown(self):
+        structured_log.stop_listener()
+        root = logging.getLogger()
+        root.handlers[:] = self.saved[1]
+        root.setLevel(self.saved[0])
+
+    def test_json_lines_through_queue(self):
+        stream = io.StringIO()
+        structured_log.configure(level="INFO", fmt="json", use_queue=True, stream=stream)
+        logging.getLogger("app.test").info("Loaded", extra={"notams": 84, "path": "dump.xml"})
+        logging.getLogger("app.test").debug("Not written")
+        structured_log.stop_listener()  # Drains the queue
+
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 1)
+        entry = json.loads(lines[0])
+        self.assertEqual((entry["level"], entry["logger"], entry["msg"]), ("INFO", "app.test", "Loaded"))
+        self.assertEqual((entry["notams"], entry["path"]), (84, "dump.xml"))
+
+    def test_text_format_and_debug_sampling(self):
+        stream = io.StringIO()
+        structured_log.configure(level="DEBUG", fmt="text", debug_sample_rate=0, stream=stream)
+        logger = logging.getLogger("app.test")
+        for _ in range(20):
+            logger.debug("Dropped")
+        logger.warning("Kept", extra={"count": 3})
+        self.assertRegex(stream.getvalue(), r"^\S+Z WARNING app.test Kept count=3\n$")
+
+        sampler = structured_log.DebugSampler(0.5)
+        records = [logging.LogRecord("app.test", logging.DEBUG, "", 0, "m", (), None) for _ in range(1000)]
+        self.assertTrue(100 < sum(map(sampler.filter, records)) < 900)
+
+    def test_parser_debug_only_when_enabled(self):
+        recorder = RecordingHandler()
+        logger = logging.getLogger("app.xml_parser")
+        logger.addHandler(recorder)
+        try:
+            logger.setLevel(logging.INFO)
+            docs = list(parse_notam_xml(DUMP_FILE))
+            self.assertEqual(recorder.records, [])
+
+            logger.setLevel(logging.DEBUG)
+            list(parse_notam_xml(DUMP_FILE))
+            self.assertEqual(len(recorder.records), len(docs))
+            self.assertEqual(recorder.records[0].number, docs[0]["number"])
+        finally:
+            logger.removeHandler(recorder)
+            logger.setLevel(logging.NOTSET)
+
+if __name__ == '__main__':
+    unittest.main()
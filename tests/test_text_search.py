@@ -0,0 +1,114 @@
+import sys
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from asgi_helper import call
+from app import api, text_search
+from app.db_manager import DBManager
+from app.xml_parser import parse_notam_xml
+
+DUMP_FILE = os.path.join(os.path.dirname(__file__), '..', 'raw_notam_dump.xml')
+
+class TestTextSearch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.docs = list(parse_notam_xml(DUMP_FILE))
+        cls.latest = {doc["notam_id"]: doc for doc in cls.docs}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DBManager("sqlite", path=os.path.join(self.tmp_dir, "notams.sqlite"))
+        self.db.init_db()
+        self.db.upsert_many(self.docs)
+        api._db = self.db
+        api.data_version._value = None
+
+    def tearDown(self):
+        api._db = None
+        api.data_version._value = None
+        shutil.rmtree(self.tmp_dir)
+
+    def expected(self, *terms, where=lambda doc: True):
+        return {
+            notam_id for notam_id, doc in self.latest.items()
+            if set(terms) <= set(text_search.index_terms(doc)) and where(doc)
+        }
+
+    def test_terms(self):
+        doc = {"text": "A1/25 NOTAMN\nQ) KZBW/QMRLC/IV/NBO/A/000/999/4222N07100W005\nA) KBOS B) 2512160925 C) 2512161200\nE) RWY 04L/22R CLSD 1200-2000, rwy clsd"}
+        self.assertEqual(text_search.index_terms(doc), ["04L", "22R", "CLSD", "RWY"])
+        self.assertEqual(text_search.query_terms("ils  Crane ils"), ["CRANE", "ILS"])
+        with self.assertRaises(ValueError):
+            text_search.query_terms("1200 - 2000")
+
+    def test_all_words_match(self):
+        docs = self.db.search_text(["FICON", "TWY"])
+        self.assertEqual({doc["notam_id"] for doc in docs}, self.expected("FICON", "TWY"))
+        self.assertTrue(all("terms" not in doc for doc in docs))  # Index-only field
+
+    def test_candidates_capped_to_newest(self):
+        everything = self.db.search_text(["FICON"])
+        capped = self.db.search_text(["FICON"], limit=2)
+        self.assertGreater(len(everything), 2)
+        self.assertEqual([doc["seq"] for doc in capped], sorted((doc["seq"] for doc in everything), reverse=True)[:2])
+
+        text_search.MAX_TEXT_CANDIDATES, saved = 2, text_search.MAX_TEXT_CANDIDATES
+        try:
+            count, ranked = text_search.search(self.db, "ficon", 10)
+        finally:
+            text_search.MAX_TEXT_CANDIDATES = saved
+        self.assertEqual((count, len(ranked)), (2, 2))
+
+    def test_geo_and_time_filters(self):
+        near_teb = self.db.search_text(["FICON"], near=(40.85, -74.07, 10))
+        self.assertEqual(
+            {doc["notam_id"] for doc in near_teb},
+            self.expected("FICON", where=lambda doc: doc["icao_location"] == "KTEB")
+        )
+        self.assertTrue(near_teb)
+
+        # The KBOS closures end at 1765965600
+        later = 1765965700
+        valid = self.db.search_text(["CLSD"], window=(later, later + 60))
+        self.assertEqual(
+            {doc["notam_id"] for doc in valid},
+            self.expected("CLSD", where=lambda doc: doc["expires_at"] > later and doc["starts_at"] <= later + 60)
+        )
+        self.assertNotIn("KBOS", {doc["icao_location"] for doc in valid})
+
+    def test_ranking(self):
+        docs = [
+            {"notam_id": "ONCE", "seq": 1, "text": "E) RWY 04 CLSD"},
+            {"notam_id": "TWICE", "seq": 2, "text": "E) RWY 04 CLSD AND RWY 22 CLSD"},
+            {"notam_id": "RARE", "seq": 3, "text": "E) ILS RWY 04 U/S"},
+        ]
+        ranked = text_search.rank(docs, ["CLSD", "ILS"], {"CLSD": 50, "ILS": 2}, 100)
+        self.assertEqual([doc["notam_id"] for _, doc in ranked], ["RARE", "TWICE", "ONCE"])
+
+    def test_endpoint(self):
+        status, _, body = call(api.app, "GET", "/api/search/text", {"q": "clsd", "lat": 42.36, "lon": -71.0, "radius": 10})
+        self.assertEqual(status, 200)
+        payload = json.loads(body)
+        self.assertEqual(payload["terms"], ["CLSD"])
+        self.assertEqual(payload["count"], len(self.expected("CLSD", where=lambda doc: doc["icao_location"] == "KBOS")))
+        scores = [result["score"] for result in payload["results"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+        status, _, body = call(api.app, "GET", "/api/search/text", {"q": "ficon", "bbox": "-75,40,-73,41", "limit": 2, "valid_from": "2025-12-17T04:00:00Z"})
+        payload = json.loads(body)
+        self.assertEqual(payload["count"], 4)
+        self.assertEqual(len(payload["results"]), 2)
+
+        for params in ({"q": "1200"}, {"q": "ils", "lat": 42.0}, {"q": "ils", "valid_from": "yesterday"}):
+            status, _, _ = call(api.app, "GET", "/api/search/text", params)
+            self.assertEqual(status, 400)
+
+if __name__ == '__main__':
+    unittest.main()